@@ -1797,6 +1797,33 @@ PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH = int(
     os.environ.get("PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH", "1536")
 )
 
+# Approximate nearest neighbour index of the vectors: "hnsw", "ivfflat" or "none".
+# After changing the method or its parameters, rebuild the index with
+# POST /api/v1/retrieval/vector/index/rebuild (an empty table gets it on startup).
+PGVECTOR_INDEX_METHOD = os.environ.get("PGVECTOR_INDEX_METHOD", "hnsw").lower()
+PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+)
+# Size of the candidate list when searching, raised to the search limit if lower
+PGVECTOR_HNSW_EF_SEARCH = int(os.environ.get("PGVECTOR_HNSW_EF_SEARCH", "100"))
+# Keep scanning the index until enough rows of the collection are found (pgvector
+# 0.8+): "relaxed_order", "strict_order" or "off"
+PGVECTOR_HNSW_ITERATIVE_SCAN = os.environ.get(
+    "PGVECTOR_HNSW_ITERATIVE_SCAN", "relaxed_order"
+).lower()
+PGVECTOR_IVFFLAT_LISTS = int(os.environ.get("PGVECTOR_IVFFLAT_LISTS", "100"))
+PGVECTOR_IVFFLAT_PROBES = int(os.environ.get("PGVECTOR_IVFFLAT_PROBES", "10"))
+# Hash partitions of document_chunk by collection name, only applied when the table
+# is created. 0 creates a regular table.
+PGVECTOR_PARTITIONS = int(os.environ.get("PGVECTOR_PARTITIONS", "0"))
+
+# Rows per COPY (insert) and per INSERT ... ON CONFLICT statement (upsert)
+PGVECTOR_INSERT_BATCH_SIZE = int(os.environ.get("PGVECTOR_INSERT_BATCH_SIZE", "1000"))
+PGVECTOR_UPSERT_BATCH_SIZE = int(os.environ.get("PGVECTOR_UPSERT_BATCH_SIZE", "500"))
+# Rows per transaction when writing, 0 writes all items of a call in one transaction
+PGVECTOR_COMMIT_BATCH_SIZE = int(os.environ.get("PGVECTOR_COMMIT_BATCH_SIZE", "0"))
+
 # Pinecone
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", None)
 PINECONE_ENVIRONMENT = os.environ.get("PINECONE_ENVIRONMENT", None)
@@ -2080,6 +2107,15 @@ RAG_EMBEDDING_BATCH_SIZE = PersistentConfig(
     ),
 )
 
+# Number of embedding batches sent to the embedding engine at the same time
+RAG_EMBEDDING_CONCURRENCY = int(os.environ.get("RAG_EMBEDDING_CONCURRENCY", "4"))
+
+# Retries of an embedding request on rate limiting (429), server errors and connection errors
+RAG_EMBEDDING_MAX_RETRIES = int(os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "3"))
+
+# Seconds to wait for the embedding engine to answer a single request
+RAG_EMBEDDING_TIMEOUT = int(os.environ.get("RAG_EMBEDDING_TIMEOUT", "60"))
+
 RAG_EMBEDDING_QUERY_PREFIX = os.environ.get("RAG_EMBEDDING_QUERY_PREFIX", None)
 
 RAG_EMBEDDING_CONTENT_PREFIX = os.environ.get("RAG_EMBEDDING_CONTENT_PREFIX", None)
@@ -2088,6 +2124,31 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+ENABLE_RAG_EMBEDDING_CACHE = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_CACHE", "True").lower() == "true"
+)
+
+RAG_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("RAG_EMBEDDING_CACHE_MAX_ENTRIES", "10000")
+)
+
+RAG_EMBEDDING_CACHE_TTL = int(os.environ.get("RAG_EMBEDDING_CACHE_TTL", "86400"))
+
+# Share cached embeddings between all instances through Redis (requires REDIS_URL)
+ENABLE_RAG_EMBEDDING_CACHE_REDIS = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_CACHE_REDIS", "False").lower() == "true"
+)
+
+# Reuse the stored embeddings of unchanged chunks when saving documents
+ENABLE_RAG_CHUNK_EMBEDDING_STORE = (
+    os.environ.get("ENABLE_RAG_CHUNK_EMBEDDING_STORE", "True").lower() == "true"
+)
+
+# Seconds a stored chunk embedding is kept without being reused (0 keeps them)
+RAG_CHUNK_EMBEDDING_STORE_TTL = int(
+    os.environ.get("RAG_CHUNK_EMBEDDING_STORE_TTL", str(30 * 24 * 60 * 60))
+)
+
 RAG_RERANKING_ENGINE = PersistentConfig(
     "RAG_RERANKING_ENGINE",
     "rag.reranking_engine",
@@ -317,6 +317,55 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Seconds to coalesce streamed updates to a chat message before writing them to the database.
+# Updates are always written when the response ends or is cancelled; at most this many seconds
+# of a response can be lost if the process crashes. 0 writes every update immediately.
+CHAT_SAVE_FLUSH_INTERVAL = os.environ.get("CHAT_SAVE_FLUSH_INTERVAL", "1")
+
+try:
+    CHAT_SAVE_FLUSH_INTERVAL = float(CHAT_SAVE_FLUSH_INTERVAL)
+except Exception:
+    CHAT_SAVE_FLUSH_INTERVAL = 1.0
+
+# Process uploaded files (extraction, transcription, embedding) in a background queue
+# instead of inside the upload request. The queue is stored in the file table, so
+# queued files are picked up by any instance and after a restart.
+ENABLE_BACKGROUND_FILE_PROCESSING = (
+    os.environ.get("ENABLE_BACKGROUND_FILE_PROCESSING", "True").lower() == "true"
+)
+
+FILE_PROCESSING_CONCURRENCY = os.environ.get("FILE_PROCESSING_CONCURRENCY", "2")
+
+try:
+    FILE_PROCESSING_CONCURRENCY = int(FILE_PROCESSING_CONCURRENCY)
+except Exception:
+    FILE_PROCESSING_CONCURRENCY = 2
+
+# Seconds between checks for queued files added by other instances
+FILE_PROCESSING_POLL_INTERVAL = os.environ.get("FILE_PROCESSING_POLL_INTERVAL", "5")
+
+try:
+    FILE_PROCESSING_POLL_INTERVAL = float(FILE_PROCESSING_POLL_INTERVAL)
+except Exception:
+    FILE_PROCESSING_POLL_INTERVAL = 5.0
+
+# Seconds without a heartbeat after which a file being processed is considered abandoned
+# (e.g. the instance processing it crashed) and is processed again
+FILE_PROCESSING_STALE_TIMEOUT = os.environ.get("FILE_PROCESSING_STALE_TIMEOUT", "300")
+
+try:
+    FILE_PROCESSING_STALE_TIMEOUT = int(FILE_PROCESSING_STALE_TIMEOUT)
+except Exception:
+    FILE_PROCESSING_STALE_TIMEOUT = 300
+
+# Number of files processed in parallel when reindexing the knowledge bases
+KNOWLEDGE_REINDEX_CONCURRENCY = os.environ.get("KNOWLEDGE_REINDEX_CONCURRENCY", "4")
+
+try:
+    KNOWLEDGE_REINDEX_CONCURRENCY = int(KNOWLEDGE_REINDEX_CONCURRENCY)
+except Exception:
+    KNOWLEDGE_REINDEX_CONCURRENCY = 4
+
 ####################################
 # REDIS
 ####################################
@@ -325,6 +374,70 @@ REDIS_URL = os.environ.get("REDIS_URL", "")
 REDIS_SENTINEL_HOSTS = os.environ.get("REDIS_SENTINEL_HOSTS", "")
 REDIS_SENTINEL_PORT = os.environ.get("REDIS_SENTINEL_PORT", "26379")
 
+# Cache invalidations are published on this Redis channel so every instance drops its
+# cached copies; without REDIS_URL the caches are only invalidated within the process.
+CACHE_INVALIDATION_CHANNEL = os.environ.get(
+    "CACHE_INVALIDATION_CHANNEL", "open-webui:cache-invalidation"
+)
+
+####################################
+# USER CACHE
+####################################
+
+# Users looked up by the authentication of every request, and their group memberships,
+# are cached in memory for this many seconds, and dropped on every instance as soon as
+# they change. 0 disables.
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "60")
+
+try:
+    USER_CACHE_TTL = int(USER_CACHE_TTL)
+except Exception:
+    USER_CACHE_TTL = 60
+
+USER_CACHE_MAX_ENTRIES = os.environ.get("USER_CACHE_MAX_ENTRIES", "10000")
+
+try:
+    USER_CACHE_MAX_ENTRIES = int(USER_CACHE_MAX_ENTRIES)
+except Exception:
+    USER_CACHE_MAX_ENTRIES = 10000
+
+# Functions (rows, valves and compiled modules) and the filter chains resolved from them
+# are cached in memory, and dropped after this many seconds without a change or use.
+FUNCTION_CACHE_TTL = os.environ.get("FUNCTION_CACHE_TTL", "3600")
+
+try:
+    FUNCTION_CACHE_TTL = int(FUNCTION_CACHE_TTL)
+except Exception:
+    FUNCTION_CACHE_TTL = 3600
+
+# The last active timestamps of users are collected in memory and written in one batch
+# every this many seconds. 0 writes every timestamp immediately.
+USER_LAST_ACTIVE_FLUSH_INTERVAL = os.environ.get(
+    "USER_LAST_ACTIVE_FLUSH_INTERVAL", "30"
+)
+
+try:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = float(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+except Exception:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = 30.0
+
+####################################
+# MODEL REGISTRY
+####################################
+
+# The list of models (connections, custom models and function models) is rebuilt in the
+# background every this many seconds, and right away when models, functions or
+# connections change. With REDIS_URL it is built by one instance and shared with all.
+# 0 only rebuilds on changes.
+MODEL_REGISTRY_REFRESH_INTERVAL = os.environ.get(
+    "MODEL_REGISTRY_REFRESH_INTERVAL", "300"
+)
+
+try:
+    MODEL_REGISTRY_REFRESH_INTERVAL = float(MODEL_REGISTRY_REFRESH_INTERVAL)
+except Exception:
+    MODEL_REGISTRY_REFRESH_INTERVAL = 300.0
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -435,6 +548,39 @@ else:
         AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST = 10
 
 
+AIOHTTP_CLIENT_POOL_LIMIT = os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT", "100")
+
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT = int(AIOHTTP_CLIENT_POOL_LIMIT)
+except Exception:
+    AIOHTTP_CLIENT_POOL_LIMIT = 100
+
+AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST", "0"
+)
+
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = int(AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST)
+except Exception:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = 0
+
+AIOHTTP_CLIENT_DNS_CACHE_TTL = os.environ.get("AIOHTTP_CLIENT_DNS_CACHE_TTL", "300")
+
+try:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = int(AIOHTTP_CLIENT_DNS_CACHE_TTL)
+except Exception:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = 300
+
+AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT", "30"
+)
+
+try:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT)
+except Exception:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = 30.0
+
+
 AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA = os.environ.get(
     "AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA", "10"
 )
@@ -29,6 +29,7 @@ from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 
 from open_webui.utils.plugin import (
+    FUNCTION_REGISTRY,
     load_function_module_by_id,
     get_function_module_from_cache,
 )
@@ -59,7 +60,7 @@ def get_function_module_by_id(request: Request, pipe_id: str):
     function_module, _, _ = get_function_module_from_cache(request, pipe_id)
 
     if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-        valves = Functions.get_function_valves_by_id(pipe_id)
+        valves = FUNCTION_REGISTRY.get_valves(pipe_id)
         function_module.valves = function_module.Valves(**(valves if valves else {}))
     return function_module
 
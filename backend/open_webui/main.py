@@ -87,6 +87,7 @@ from open_webui.routers.retrieval import (
     get_ef,
     get_rf,
 )
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
 
 from open_webui.internal.db import Session, engine
 
@@ -94,6 +95,13 @@ from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 from open_webui.models.users import UserModel, Users
 from open_webui.models.chats import Chats
+from open_webui.utils.message_buffer import MESSAGE_WRITE_BUFFER
+from open_webui.utils.http_client import HTTP_CLIENT_POOL
+from open_webui.utils.ingestion import INGESTION_QUEUE
+from open_webui.utils.reindex import KNOWLEDGE_REINDEXER
+from open_webui.utils.cache import INVALIDATION_BUS
+from open_webui.utils.model_registry import MODEL_REGISTRY
+from open_webui.utils.user_activity import LAST_ACTIVE_BUFFER
 
 from open_webui.config import (
     LICENSE_KEY,
@@ -412,11 +420,11 @@ from open_webui.env import (
     ENABLE_OTEL,
     EXTERNAL_PWA_MANIFEST_URL,
     AIOHTTP_CLIENT_SESSION_SSL,
+    ENABLE_BACKGROUND_FILE_PROCESSING,
 )
 
 
 from open_webui.utils.models import (
-    get_all_models,
     get_all_base_models,
     check_model_access,
 )
@@ -512,8 +520,37 @@ async def lifespan(app: FastAPI):
 
     asyncio.create_task(periodic_usage_pool_cleanup())
 
+    # Drop cached users (and other cached state) when another instance changes them
+    INVALIDATION_BUS.start()
+    LAST_ACTIVE_BUFFER.start()
+
+    # Build the model list in the background instead of per request
+    MODEL_REGISTRY.start(app)
+
+    if ENABLE_BACKGROUND_FILE_PROCESSING:
+        INGESTION_QUEUE.start(app)
+
+    # Resume a knowledge reindex that was interrupted by a restart
+    KNOWLEDGE_REINDEXER.resume(app)
+
     yield
 
+    if ENABLE_BACKGROUND_FILE_PROCESSING:
+        await INGESTION_QUEUE.stop()
+
+    await KNOWLEDGE_REINDEXER.stop()
+    await MODEL_REGISTRY.stop()
+
+    # Write chat messages that are still buffered in memory
+    MESSAGE_WRITE_BUFFER.flush_all()
+
+    # Write the last active times of users that are still buffered in memory
+    await LAST_ACTIVE_BUFFER.stop()
+    INVALIDATION_BUS.stop()
+
+    # Close the pooled connections to the model providers
+    await HTTP_CLIENT_POOL.close()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -671,7 +708,6 @@ app.state.TOOLS = {}
 app.state.TOOL_CONTENTS = {}
 
 app.state.FUNCTIONS = {}
-app.state.FUNCTION_CONTENTS = {}
 
 ########################################
 #
@@ -856,6 +892,7 @@ app.state.EMBEDDING_FUNCTION = get_embedding_function(
         if app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
         else None
     ),
+    embedding_cache=EMBEDDING_CACHE,
 )
 
 ########################################
@@ -1170,7 +1207,7 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
 
         return filtered_models
 
-    all_models = await get_all_models(request, user=user)
+    all_models = await MODEL_REGISTRY.get_models(request)
 
     models = []
     for model in all_models:
@@ -1178,6 +1215,8 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
         if "pipeline" in model and model["pipeline"].get("type", None) == "filter":
             continue
 
+        # The models of the registry are shared between requests
+        model = {**model}
         try:
             model_tags = [
                 tag.get("name")
@@ -1224,8 +1263,7 @@ async def chat_completion(
     form_data: dict,
     user=Depends(get_verified_user),
 ):
-    if not request.app.state.MODELS:
-        await get_all_models(request, user=user)
+    await MODEL_REGISTRY.ensure_built(request.app)
 
     model_item = form_data.pop("model_item", {})
     tasks = form_data.pop("background_tasks", None)
@@ -1289,13 +1327,14 @@ async def chat_completion(
         log.debug(f"Error processing chat payload: {e}")
         if metadata.get("chat_id") and metadata.get("message_id"):
             # Update the chat message with the error
-            Chats.upsert_message_to_chat_by_id_and_message_id(
+            MESSAGE_WRITE_BUFFER.upsert(
                 metadata["chat_id"],
                 metadata["message_id"],
                 {
                     "error": {"content": str(e)},
                 },
             )
+            MESSAGE_WRITE_BUFFER.flush(metadata["chat_id"], metadata["message_id"])
 
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1528,6 +1567,11 @@ class UrlForm(BaseModel):
     url: str
 
 
+@app.get("/api/http/pools")
+async def get_http_client_pool_stats(user=Depends(get_admin_user)):
+    return HTTP_CLIENT_POOL.get_stats()
+
+
 @app.get("/api/webhook")
 async def get_webhook_url(user=Depends(get_admin_user)):
     return {
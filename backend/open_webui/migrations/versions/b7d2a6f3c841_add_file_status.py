@@ -0,0 +1,28 @@
+"""Add status to file table
+
+Revision ID: b7d2a6f3c841
+Revises: 9f0c9cd09105
+Create Date: 2025-06-02 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b7d2a6f3c841"
+down_revision = "9f0c9cd09105"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "file",
+        sa.Column("status", sa.Text(), nullable=True),
+    )
+    op.create_index("file_status_idx", "file", ["status"])
+
+
+def downgrade():
+    op.drop_index("file_status_idx", table_name="file")
+    op.drop_column("file", "status")
@@ -0,0 +1,30 @@
+"""Add chunk embedding table
+
+Revision ID: d4e1f0a9b3c2
+Revises: b7d2a6f3c841
+Create Date: 2025-06-04 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d4e1f0a9b3c2"
+down_revision = "b7d2a6f3c841"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "chunk_embedding",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("dimensions", sa.Integer(), nullable=True),
+        sa.Column("vector", sa.LargeBinary(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("chunk_embedding")
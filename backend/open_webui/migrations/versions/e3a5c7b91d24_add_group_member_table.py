@@ -0,0 +1,58 @@
+"""Add group member table
+
+Revision ID: e3a5c7b91d24
+Revises: d4e1f0a9b3c2
+Create Date: 2025-06-10 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column, select
+import json
+import time
+
+revision = "e3a5c7b91d24"
+down_revision = "d4e1f0a9b3c2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    group_member_table = op.create_table(
+        "group_member",
+        sa.Column("group_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("group_id", "user_id"),
+    )
+    op.create_index("group_member_user_id_idx", "group_member", ["user_id"])
+
+    # Fill the table from the user_ids column of the groups, which is kept as well
+    group_table = table(
+        "group",
+        column("id", sa.Text()),
+        column("user_ids", sa.JSON()),
+    )
+
+    now = int(time.time())
+    rows = []
+    for group in op.get_bind().execute(
+        select(group_table.c.id, group_table.c.user_ids)
+    ):
+        user_ids = group.user_ids
+        if isinstance(user_ids, str):
+            user_ids = json.loads(user_ids)
+
+        rows.extend(
+            {"group_id": group.id, "user_id": user_id, "created_at": now}
+            for user_id in dict.fromkeys(user_ids or [])
+        )
+
+    if rows:
+        op.bulk_insert(group_member_table, rows)
+
+
+def downgrade():
+    op.drop_index("group_member_user_id_idx", table_name="group_member")
+    op.drop_table("group_member")
@@ -0,0 +1,49 @@
+"""Add chunk embedding references and last use
+
+Revision ID: f6b8d2c4a017
+Revises: e3a5c7b91d24
+Create Date: 2025-06-16 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "f6b8d2c4a017"
+down_revision = "e3a5c7b91d24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "chunk_embedding", sa.Column("used_at", sa.BigInteger(), nullable=True)
+    )
+    op.execute("UPDATE chunk_embedding SET used_at = created_at")
+    op.create_index("ix_chunk_embedding_used_at", "chunk_embedding", ["used_at"])
+
+    op.create_table(
+        "chunk_embedding_ref",
+        sa.Column("chunk_embedding_id", sa.String(), nullable=False),
+        sa.Column("collection_name", sa.String(), nullable=False),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("chunk_embedding_id", "collection_name", "file_id"),
+    )
+    op.create_index(
+        "ix_chunk_embedding_ref_collection_name",
+        "chunk_embedding_ref",
+        ["collection_name"],
+    )
+    op.create_index(
+        "ix_chunk_embedding_ref_file_id", "chunk_embedding_ref", ["file_id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_chunk_embedding_ref_file_id", table_name="chunk_embedding_ref")
+    op.drop_index(
+        "ix_chunk_embedding_ref_collection_name", table_name="chunk_embedding_ref"
+    )
+    op.drop_table("chunk_embedding_ref")
+    op.drop_index("ix_chunk_embedding_used_at", table_name="chunk_embedding")
+    op.drop_column("chunk_embedding", "used_at")
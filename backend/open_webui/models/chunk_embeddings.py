@@ -0,0 +1,232 @@
+import logging
+import time
+from array import array
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from sqlalchemy import BigInteger, Column, Integer, LargeBinary, String, select
+from sqlalchemy.exc import IntegrityError
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+# Number of ids per query, stays below the variable limit of SQLite
+BATCH_SIZE = 500
+
+# Seconds between updates of the last use of an embedding, so lookups rarely write
+USED_AT_RESOLUTION = 24 * 60 * 60
+
+####################
+# Chunk Embedding DB Schema
+####################
+
+
+class ChunkEmbedding(Base):
+    __tablename__ = "chunk_embedding"
+
+    # Hash of (embedding engine, model, prefix, chunk text hash)
+    id = Column(String, primary_key=True)
+    dimensions = Column(Integer)
+    # float32 array
+    vector = Column(LargeBinary)
+    created_at = Column(BigInteger)
+    # Last time the embedding was stored or reused, unused embeddings are pruned
+    used_at = Column(BigInteger, index=True)
+
+
+class ChunkEmbeddingRef(Base):
+    """A file with the chunk in a collection. An embedding is deleted with its last
+    reference; embeddings stored before references were kept only expire."""
+
+    __tablename__ = "chunk_embedding_ref"
+
+    chunk_embedding_id = Column(String, primary_key=True)
+    collection_name = Column(String, primary_key=True, index=True)
+    file_id = Column(String, primary_key=True, index=True)
+
+
+def pack_vector(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(data: bytes) -> list[float]:
+    vector = array("f")
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+class ChunkEmbeddingsTable:
+    def get_embeddings_by_ids(self, ids: list[str]) -> dict[str, list[float]]:
+        embeddings = {}
+        now = int(time.time())
+        with get_db() as db:
+            for i in range(0, len(ids), BATCH_SIZE):
+                batch = ids[i : i + BATCH_SIZE]
+                for chunk_embedding in (
+                    db.query(ChunkEmbedding.id, ChunkEmbedding.vector)
+                    .filter(ChunkEmbedding.id.in_(batch))
+                    .all()
+                ):
+                    embeddings[chunk_embedding.id] = unpack_vector(
+                        chunk_embedding.vector
+                    )
+
+                db.query(ChunkEmbedding).filter(
+                    ChunkEmbedding.id.in_(batch),
+                    ChunkEmbedding.used_at < now - USED_AT_RESOLUTION,
+                ).update({"used_at": now}, synchronize_session=False)
+            db.commit()
+        return embeddings
+
+    def insert_embeddings(self, embeddings: dict[str, list[float]]):
+        ids = list(embeddings)
+        with get_db() as db:
+            for i in range(0, len(ids), BATCH_SIZE):
+                batch = ids[i : i + BATCH_SIZE]
+                existing_ids = {
+                    row.id
+                    for row in db.query(ChunkEmbedding.id)
+                    .filter(ChunkEmbedding.id.in_(batch))
+                    .all()
+                }
+                db.add_all(
+                    [
+                        ChunkEmbedding(
+                            id=id,
+                            dimensions=len(embeddings[id]),
+                            vector=pack_vector(embeddings[id]),
+                            created_at=int(time.time()),
+                            used_at=int(time.time()),
+                        )
+                        for id in batch
+                        if id not in existing_ids
+                    ]
+                )
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Stored concurrently by another ingestion of the same chunks
+                    db.rollback()
+
+    def insert_references(self, collection_name: str, file_id: str, ids: list[str]):
+        ids = list(dict.fromkeys(ids))
+        with get_db() as db:
+            for i in range(0, len(ids), BATCH_SIZE):
+                batch = ids[i : i + BATCH_SIZE]
+                existing_ids = {
+                    row.chunk_embedding_id
+                    for row in db.query(ChunkEmbeddingRef.chunk_embedding_id)
+                    .filter(
+                        ChunkEmbeddingRef.collection_name == collection_name,
+                        ChunkEmbeddingRef.file_id == file_id,
+                        ChunkEmbeddingRef.chunk_embedding_id.in_(batch),
+                    )
+                    .all()
+                }
+                db.add_all(
+                    [
+                        ChunkEmbeddingRef(
+                            chunk_embedding_id=id,
+                            collection_name=collection_name,
+                            file_id=file_id,
+                        )
+                        for id in batch
+                        if id not in existing_ids
+                    ]
+                )
+                try:
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+
+    def _delete_unreferenced_embeddings(self, db, ids: list[str]) -> int:
+        deleted = 0
+        for i in range(0, len(ids), BATCH_SIZE):
+            batch = ids[i : i + BATCH_SIZE]
+            referenced_ids = select(ChunkEmbeddingRef.chunk_embedding_id).where(
+                ChunkEmbeddingRef.chunk_embedding_id.in_(batch)
+            )
+            deleted += (
+                db.query(ChunkEmbedding)
+                .filter(
+                    ChunkEmbedding.id.in_(batch),
+                    ChunkEmbedding.id.not_in(referenced_ids),
+                )
+                .delete(synchronize_session=False)
+            )
+        return deleted
+
+    def delete_references(
+        self, collection_name: Optional[str] = None, file_id: Optional[str] = None
+    ) -> int:
+        """Delete the references of a collection and/or file (without either, all of
+        them), and the embeddings that are no longer referenced. Returns the number of
+        deleted embeddings."""
+        with get_db() as db:
+            query = db.query(ChunkEmbeddingRef)
+            if collection_name is not None:
+                query = query.filter(
+                    ChunkEmbeddingRef.collection_name == collection_name
+                )
+            if file_id is not None:
+                query = query.filter(ChunkEmbeddingRef.file_id == file_id)
+
+            ids = list(
+                {
+                    row.chunk_embedding_id
+                    for row in query.with_entities(
+                        ChunkEmbeddingRef.chunk_embedding_id
+                    ).all()
+                }
+            )
+            query.delete(synchronize_session=False)
+            deleted = self._delete_unreferenced_embeddings(db, ids)
+            db.commit()
+
+        if deleted:
+            log.info(f"Deleted {deleted} chunk embeddings that are no longer used")
+        return deleted
+
+    def replace_references(self, collection_name: str, source_collection_name: str):
+        """Move the references of the source collection to the collection it replaced"""
+        self.delete_references(collection_name=collection_name)
+        with get_db() as db:
+            db.query(ChunkEmbeddingRef).filter(
+                ChunkEmbeddingRef.collection_name == source_collection_name
+            ).update({"collection_name": collection_name}, synchronize_session=False)
+            db.commit()
+
+    def delete_unused_embeddings(self, used_before: int) -> int:
+        """Delete the embeddings that were not stored or reused since `used_before`,
+        whether they are referenced or not"""
+        with get_db() as db:
+            ids = [
+                row.id
+                for row in db.query(ChunkEmbedding.id)
+                .filter(ChunkEmbedding.used_at < used_before)
+                .all()
+            ]
+            for i in range(0, len(ids), BATCH_SIZE):
+                batch = ids[i : i + BATCH_SIZE]
+                db.query(ChunkEmbeddingRef).filter(
+                    ChunkEmbeddingRef.chunk_embedding_id.in_(batch)
+                ).delete(synchronize_session=False)
+                db.query(ChunkEmbedding).filter(ChunkEmbedding.id.in_(batch)).delete(
+                    synchronize_session=False
+                )
+            db.commit()
+
+        if ids:
+            log.info(f"Deleted {len(ids)} chunk embeddings unused since {used_before}")
+        return len(ids)
+
+    def delete_all_embeddings(self):
+        with get_db() as db:
+            db.query(ChunkEmbeddingRef).delete(synchronize_session=False)
+            deleted = db.query(ChunkEmbedding).delete(synchronize_session=False)
+            db.commit()
+        log.info(f"Deleted all {deleted} chunk embeddings")
+
+
+ChunkEmbeddings = ChunkEmbeddingsTable()
@@ -3,9 +3,10 @@ import time
 from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.models.chunk_embeddings import ChunkEmbeddings
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, or_, and_
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -29,6 +30,9 @@ class File(Base):
 
     access_control = Column(JSON, nullable=True)
 
+    # Processing (ingestion) status, see FileStatus. None for files that are not processed
+    status = Column(Text, nullable=True)
+
     created_at = Column(BigInteger)
     updated_at = Column(BigInteger)
 
@@ -48,10 +52,19 @@ class FileModel(BaseModel):
 
     access_control: Optional[dict] = None
 
+    status: Optional[str] = None
+
     created_at: Optional[int]  # timestamp in epoch
     updated_at: Optional[int]  # timestamp in epoch
 
 
+class FileStatus:
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+
+
 ####################
 # Forms
 ####################
@@ -74,6 +87,8 @@ class FileModelResponse(BaseModel):
     data: Optional[dict] = None
     meta: FileMeta
 
+    status: Optional[str] = None
+
     created_at: int  # timestamp in epoch
     updated_at: int  # timestamp in epoch
 
@@ -95,6 +110,7 @@ class FileForm(BaseModel):
     data: dict = {}
     meta: dict = {}
     access_control: Optional[dict] = None
+    status: Optional[str] = None
 
 
 class FilesTable:
@@ -211,25 +227,108 @@ class FilesTable:
             except Exception:
                 return None
 
+    def update_file_status_by_id(
+        self, id: str, status: Optional[str], error: Optional[str] = None
+    ) -> Optional[FileModel]:
+        with get_db() as db:
+            try:
+                file = db.query(File).filter_by(id=id).first()
+                file.status = status
+                file.data = {
+                    **{k: v for k, v in (file.data or {}).items() if k != "error"},
+                    **({"error": error} if error else {}),
+                }
+                file.updated_at = int(time.time())
+                db.commit()
+                return FileModel.model_validate(file)
+            except Exception:
+                return None
+
+    def claim_file_for_processing(self, id: str, stale_before: int) -> bool:
+        """Atomically mark a queued (or abandoned) file as processing.
+        Returns False if another worker claimed it first."""
+        with get_db() as db:
+            try:
+                claimed = (
+                    db.query(File)
+                    .filter(
+                        File.id == id,
+                        or_(
+                            File.status == FileStatus.QUEUED,
+                            and_(
+                                File.status == FileStatus.PROCESSING,
+                                File.updated_at < stale_before,
+                            ),
+                        ),
+                    )
+                    .update(
+                        {
+                            "status": FileStatus.PROCESSING,
+                            "updated_at": int(time.time()),
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+                return claimed == 1
+            except Exception as e:
+                log.exception(f"Error claiming file {id}: {e}")
+                return False
+
+    def touch_file_by_id(self, id: str):
+        with get_db() as db:
+            db.query(File).filter_by(id=id).update(
+                {"updated_at": int(time.time())}, synchronize_session=False
+            )
+            db.commit()
+
+    def get_file_ids_to_process(self, stale_before: int, limit: int) -> list[str]:
+        """Queued files and files abandoned while processing, oldest first"""
+        with get_db() as db:
+            return [
+                file.id
+                for file in db.query(File.id)
+                .filter(
+                    or_(
+                        File.status == FileStatus.QUEUED,
+                        and_(
+                            File.status == FileStatus.PROCESSING,
+                            File.updated_at < stale_before,
+                        ),
+                    )
+                )
+                .order_by(File.updated_at)
+                .limit(limit)
+                .all()
+            ]
+
     def delete_file_by_id(self, id: str) -> bool:
         with get_db() as db:
             try:
                 db.query(File).filter_by(id=id).delete()
                 db.commit()
-
-                return True
             except Exception:
                 return False
 
+        try:
+            ChunkEmbeddings.delete_references(file_id=id)
+        except Exception as e:
+            log.warning(f"Error deleting the chunk embeddings of file {id}: {e}")
+        return True
+
     def delete_all_files(self) -> bool:
         with get_db() as db:
             try:
                 db.query(File).delete()
                 db.commit()
-
-                return True
             except Exception:
                 return False
 
+        try:
+            ChunkEmbeddings.delete_references()
+        except Exception as e:
+            log.warning(f"Error deleting the chunk embeddings of all files: {e}")
+        return True
+
 
 Files = FilesTable()
@@ -5,6 +5,7 @@ from typing import Optional
 from open_webui.internal.db import Base, JSONField, get_db
 from open_webui.models.users import Users
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.cache import INVALIDATION_BUS
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Boolean, Column, String, Text
 
@@ -100,6 +101,7 @@ class FunctionsTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                INVALIDATION_BUS.publish("functions", result.id)
                 if result:
                     return FunctionModel.model_validate(result)
                 else:
@@ -147,6 +149,7 @@ class FunctionsTable:
                         db.delete(func)
 
                 db.commit()
+                INVALIDATION_BUS.publish("functions")
 
                 return [
                     FunctionModel.model_validate(func)
@@ -164,6 +167,15 @@ class FunctionsTable:
         except Exception:
             return None
 
+    def get_function_updated_at_by_id(self, id: str) -> Optional[int]:
+        """The updated_at of a function, without loading its content. None when it
+        does not exist (anymore)."""
+        try:
+            with get_db() as db:
+                return db.query(Function.updated_at).filter_by(id=id).scalar()
+        except Exception:
+            return None
+
     def get_functions(self, active_only=False) -> list[FunctionModel]:
         with get_db() as db:
             if active_only:
@@ -230,6 +242,8 @@ class FunctionsTable:
                 function.valves = valves
                 function.updated_at = int(time.time())
                 db.commit()
+                # Not "functions": new valves do not change the model list
+                INVALIDATION_BUS.publish("function_valves", id)
                 db.refresh(function)
                 return self.get_function_by_id(id)
             except Exception:
@@ -239,7 +253,7 @@ class FunctionsTable:
         self, id: str, user_id: str
     ) -> Optional[dict]:
         try:
-            user = Users.get_user_by_id(user_id)
+            user = Users.get_cached_user_by_id(user_id)
             user_settings = user.settings.model_dump() if user.settings else {}
 
             # Check if user has "functions" and "valves" settings
@@ -290,6 +304,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                INVALIDATION_BUS.publish("functions", id)
                 return self.get_function_by_id(id)
             except Exception:
                 return None
@@ -304,6 +319,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                INVALIDATION_BUS.publish("functions")
                 return True
             except Exception:
                 return None
@@ -313,6 +329,7 @@ class FunctionsTable:
             try:
                 db.query(Function).filter_by(id=id).delete()
                 db.commit()
+                INVALIDATION_BUS.publish("functions", id)
 
                 return True
             except Exception:
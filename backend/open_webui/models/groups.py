@@ -5,13 +5,14 @@ from typing import Optional
 import uuid
 
 from open_webui.internal.db import Base, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL
 
 from open_webui.models.files import FileMetadataResponse
+from open_webui.utils.cache import INVALIDATION_BUS, TTLCache
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
+from sqlalchemy import BigInteger, Column, Index, PrimaryKeyConstraint, Text, JSON
 
 
 log = logging.getLogger(__name__)
@@ -41,6 +42,22 @@ class Group(Base):
     updated_at = Column(BigInteger)
 
 
+class GroupMember(Base):
+    """Group membership, indexed by user. Kept in sync with Group.user_ids, which
+    remains the membership list returned by the API."""
+
+    __tablename__ = "group_member"
+
+    group_id = Column(Text, nullable=False)
+    user_id = Column(Text, nullable=False)
+    created_at = Column(BigInteger)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("group_id", "user_id"),
+        Index("group_member_user_id_idx", "user_id"),
+    )
+
+
 class GroupModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -87,7 +104,61 @@ class GroupUpdateForm(GroupForm):
     user_ids: Optional[list[str]] = None
 
 
+####################
+# Group Membership Cache
+####################
+
+# Group ids by member user id, for the access checks of every request
+GROUP_MEMBERSHIP_CACHE = TTLCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL)
+
+
+def invalidate_group_membership_cache(user_ids: Optional[list[str]] = None):
+    """Drop the cached groups of these users (all users if None) on every instance"""
+    if user_ids is None or user_ids:
+        INVALIDATION_BUS.publish(
+            "group_member", list(user_ids) if user_ids is not None else None
+        )
+
+
+def _on_group_membership_invalidated(user_ids: Optional[list[str]]):
+    if user_ids is None:
+        GROUP_MEMBERSHIP_CACHE.clear()
+    else:
+        for user_id in user_ids:
+            GROUP_MEMBERSHIP_CACHE.delete(user_id)
+
+
+INVALIDATION_BUS.subscribe("group_member", _on_group_membership_invalidated)
+
+
 class GroupTable:
+    def _sync_group_members(self, db, group_id: str, user_ids: list[str]) -> set[str]:
+        """Make the group_member rows of a group match its user_ids, in the caller's
+        transaction. Returns the ids of the users that were added or removed."""
+        existing = {
+            row.user_id
+            for row in db.query(GroupMember.user_id).filter_by(group_id=group_id)
+        }
+        user_ids = set(user_ids or [])
+
+        removed = existing - user_ids
+        if removed:
+            db.query(GroupMember).filter(
+                GroupMember.group_id == group_id, GroupMember.user_id.in_(removed)
+            ).delete(synchronize_session=False)
+
+        added = user_ids - existing
+        if added:
+            now = int(time.time())
+            db.add_all(
+                [
+                    GroupMember(group_id=group_id, user_id=user_id, created_at=now)
+                    for user_id in added
+                ]
+            )
+
+        return removed | added
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -105,7 +176,9 @@ class GroupTable:
             try:
                 result = Group(**group.model_dump())
                 db.add(result)
+                self._sync_group_members(db, group.id, group.user_ids)
                 db.commit()
+                invalidate_group_membership_cache(group.user_ids)
                 db.refresh(result)
                 if result:
                     return GroupModel.model_validate(result)
@@ -127,16 +200,26 @@ class GroupTable:
             return [
                 GroupModel.model_validate(group)
                 for group in db.query(Group)
-                .filter(
-                    func.json_array_length(Group.user_ids) > 0
-                )  # Ensure array exists
-                .filter(
-                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
-                )  # String-based check
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == user_id)
                 .order_by(Group.updated_at.desc())
                 .all()
             ]
 
+    def get_group_ids_by_member_id(self, user_id: str) -> list[str]:
+        """Ids of the groups of a user, through GROUP_MEMBERSHIP_CACHE"""
+        group_ids = GROUP_MEMBERSHIP_CACHE.get(user_id)
+        if group_ids is None:
+            generation = GROUP_MEMBERSHIP_CACHE.get_generation()
+            with get_db() as db:
+                group_ids = tuple(
+                    row.group_id
+                    for row in db.query(GroupMember.group_id).filter_by(user_id=user_id)
+                )
+            GROUP_MEMBERSHIP_CACHE.set(user_id, group_ids, generation)
+
+        return list(group_ids)
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -163,8 +246,21 @@ class GroupTable:
                         "updated_at": int(time.time()),
                     }
                 )
+                changed_user_ids = set()
+                if form_data.user_ids is not None:
+                    changed_user_ids = self._sync_group_members(
+                        db, id, form_data.user_ids
+                    )
                 db.commit()
-                return self.get_group_by_id(id=id)
+                invalidate_group_membership_cache(changed_user_ids)
+
+                group = self.get_group_by_id(id=id)
+                if group and form_data.permissions is not None:
+                    # The effective permissions of all members may have changed
+                    user_ids = set(group.user_ids) - changed_user_ids
+                    if user_ids:
+                        INVALIDATION_BUS.publish("group_permissions", list(user_ids))
+                return group
         except Exception as e:
             log.exception(e)
             return None
@@ -173,7 +269,9 @@ class GroupTable:
         try:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
+                user_ids = self._sync_group_members(db, id, [])
                 db.commit()
+                invalidate_group_membership_cache(user_ids)
                 return True
         except Exception:
             return False
@@ -182,7 +280,9 @@ class GroupTable:
         with get_db() as db:
             try:
                 db.query(Group).delete()
+                db.query(GroupMember).delete()
                 db.commit()
+                invalidate_group_membership_cache()
 
                 return True
             except Exception:
@@ -201,8 +301,12 @@ class GroupTable:
                             "updated_at": int(time.time()),
                         }
                     )
+                    db.query(GroupMember).filter_by(
+                        group_id=group.id, user_id=user_id
+                    ).delete()
                     db.commit()
 
+                invalidate_group_membership_cache([user_id])
                 return True
             except Exception:
                 return False
@@ -227,6 +331,9 @@ class GroupTable:
                                 "updated_at": int(time.time()),
                             }
                         )
+                        db.query(GroupMember).filter_by(
+                            group_id=group.id, user_id=user_id
+                        ).delete()
 
                 # Add user to new groups
                 for group in groups:
@@ -238,8 +345,16 @@ class GroupTable:
                                 "updated_at": int(time.time()),
                             }
                         )
+                        db.add(
+                            GroupMember(
+                                group_id=group.id,
+                                user_id=user_id,
+                                created_at=int(time.time()),
+                            )
+                        )
 
                 db.commit()
+                invalidate_group_membership_cache([user_id])
                 return True
             except Exception as e:
                 log.exception(e)
@@ -198,6 +198,47 @@ class KnowledgeTable:
             log.exception(e)
             return None
 
+    def _update_file_ids_by_id(self, id: str, update) -> Optional[KnowledgeModel]:
+        """Read-modify-write of data.file_ids in one transaction. The row is written
+        first, which locks it (and takes the write lock on SQLite), so concurrent
+        updates from other workers or instances wait instead of overwriting each other.
+        """
+        try:
+            with get_db() as db:
+                locked = (
+                    db.query(Knowledge)
+                    .filter_by(id=id)
+                    .update({"updated_at": int(time.time())})
+                )
+                if not locked:
+                    db.rollback()
+                    return None
+
+                knowledge = db.query(Knowledge).filter_by(id=id).first()
+                data = dict(knowledge.data or {})
+                data["file_ids"] = update(list(data.get("file_ids", [])))
+                knowledge.data = data
+                db.commit()
+                return KnowledgeModel.model_validate(knowledge)
+        except Exception as e:
+            log.exception(e)
+            return None
+
+    def add_file_id_to_knowledge_by_id(
+        self, id: str, file_id: str
+    ) -> Optional[KnowledgeModel]:
+        return self._update_file_ids_by_id(
+            id,
+            lambda file_ids: file_ids if file_id in file_ids else [*file_ids, file_id],
+        )
+
+    def remove_file_id_from_knowledge_by_id(
+        self, id: str, file_id: str
+    ) -> Optional[KnowledgeModel]:
+        return self._update_file_ids_by_id(
+            id, lambda file_ids: [other for other in file_ids if other != file_id]
+        )
+
     def delete_knowledge_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
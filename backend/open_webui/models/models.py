@@ -16,6 +16,7 @@ from sqlalchemy import BigInteger, Column, Text, JSON, Boolean
 
 
 from open_webui.utils.access_control import has_access
+from open_webui.utils.cache import INVALIDATION_BUS
 
 
 log = logging.getLogger(__name__)
@@ -160,6 +161,7 @@ class ModelsTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                INVALIDATION_BUS.publish("models", result.id)
 
                 if result:
                     return ModelModel.model_validate(result)
@@ -226,6 +228,7 @@ class ModelsTable:
                     }
                 )
                 db.commit()
+                INVALIDATION_BUS.publish("models", id)
 
                 return self.get_model_by_id(id)
             except Exception:
@@ -241,6 +244,7 @@ class ModelsTable:
                     .update(model.model_dump(exclude={"id"}))
                 )
                 db.commit()
+                INVALIDATION_BUS.publish("models", id)
 
                 model = db.get(Model, id)
                 db.refresh(model)
@@ -254,6 +258,7 @@ class ModelsTable:
             with get_db() as db:
                 db.query(Model).filter_by(id=id).delete()
                 db.commit()
+                INVALIDATION_BUS.publish("models", id)
 
                 return True
         except Exception:
@@ -264,6 +269,7 @@ class ModelsTable:
             with get_db() as db:
                 db.query(Model).delete()
                 db.commit()
+                INVALIDATION_BUS.publish("models")
 
                 return True
         except Exception:
@@ -2,15 +2,17 @@ import time
 from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.env import USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL
 
 
 from open_webui.models.chats import Chats
 from open_webui.models.groups import Groups
+from open_webui.utils.cache import INVALIDATION_BUS, TTLCache
 
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text
-from sqlalchemy import or_
+from sqlalchemy import case, or_, update
 
 
 ####################
@@ -101,6 +103,32 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+####################
+# User Cache
+####################
+
+# Users by id, for the authentication of requests and socket connections
+USER_CACHE = TTLCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL)
+
+# Number of users per statement when writing last active timestamps
+LAST_ACTIVE_BATCH_SIZE = 500
+
+
+def invalidate_user_cache(id: str):
+    """Drop a changed user from the cache of every instance"""
+    INVALIDATION_BUS.publish("user", id)
+
+
+def _on_user_invalidated(id: Optional[str]):
+    if id is None:
+        USER_CACHE.clear()
+    else:
+        USER_CACHE.delete(id)
+
+
+INVALIDATION_BUS.subscribe("user", _on_user_invalidated)
+
+
 class UsersTable:
     def insert_new_user(
         self,
@@ -150,6 +178,34 @@ class UsersTable:
         except Exception:
             return None
 
+    def get_cached_user_by_id(self, id: str) -> Optional[UserModel]:
+        """get_user_by_id through USER_CACHE, for lookups on every request. The
+        last_active_at of a cached user can be up to USER_CACHE_TTL seconds old."""
+        user = USER_CACHE.get(id)
+        if user is None:
+            generation = USER_CACHE.get_generation()
+            user = self.get_user_by_id(id)
+            if user is None:
+                return None
+            USER_CACHE.set(id, user, generation)
+
+        # Callers get their own copy, the cached user is shared between requests
+        return user.model_copy()
+
+    def get_cached_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        # API keys map to user ids, so invalidating a user also covers their key
+        id = USER_CACHE.get(("api_key", api_key))
+        user = USER_CACHE.get(id) if id else None
+        if user is None or user.api_key != api_key:
+            generation = USER_CACHE.get_generation()
+            user = self.get_user_by_api_key(api_key)
+            if user is None:
+                return None
+            USER_CACHE.set(user.id, user, generation)
+            USER_CACHE.set(("api_key", api_key), user.id, generation)
+
+        return user.model_copy()
+
     def get_user_by_email(self, email: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -274,6 +330,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                invalidate_user_cache(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -288,6 +345,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -307,6 +365,23 @@ class UsersTable:
         except Exception:
             return None
 
+    def update_users_last_active_by_ids(self, last_active: dict[str, int]):
+        """Write the last active timestamps of many users (user id -> timestamp).
+        Cached users are not invalidated for this."""
+        user_ids = list(last_active.keys())
+        with get_db() as db:
+            for i in range(0, len(user_ids), LAST_ACTIVE_BATCH_SIZE):
+                batch = {
+                    id: last_active[id]
+                    for id in user_ids[i : i + LAST_ACTIVE_BATCH_SIZE]
+                }
+                db.execute(
+                    update(User)
+                    .where(User.id.in_(list(batch.keys())))
+                    .values(last_active_at=case(batch, value=User.id))
+                )
+            db.commit()
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
@@ -314,6 +389,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -325,6 +401,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -344,6 +421,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -362,6 +440,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                invalidate_user_cache(id)
 
                 return True
             else:
@@ -374,6 +453,7 @@ class UsersTable:
             with get_db() as db:
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                invalidate_user_cache(id)
                 return True if result == 1 else False
         except Exception:
             return False
@@ -0,0 +1,400 @@
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from open_webui.config import CACHE_DIR
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.utils.file_lock import locked
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Number of ids per statement when deleting, stays below SQLite's variable limit
+DELETE_BATCH_SIZE = 500
+
+# Seconds between checks of an index against the items of its vector DB collection
+VERIFY_INTERVAL = 60
+
+TOKEN_REGEX = re.compile(r"\w+")
+COLLECTION_NAME_REGEX = re.compile(r"[\w-]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    metadata TEXT,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    doc_length INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc_id ON postings (doc_id);
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    doc_count INTEGER NOT NULL,
+    total_length INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (id, doc_count, total_length) VALUES (0, 0, 0);
+"""
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_REGEX.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Persistent BM25 (lexical) index per vector DB collection.
+
+    Each collection has an SQLite file with an inverted index (term -> postings), so a
+    hybrid search query only reads the postings of its own terms instead of fetching and
+    tokenizing every chunk of the collection. The index is built from the vector DB the
+    first time a collection is searched, and kept up to date by `add` and `delete`,
+    which are no-ops for collections without an index.
+
+    The index files are local to an instance, while other instances (or replicas
+    without shared storage) can change the collection. So before searching, an index is
+    checked against the item ids of the collection in the vector DB, at most every
+    VERIFY_INTERVAL seconds: items deleted from the collection are removed from the
+    index, and the index is rebuilt when the collection has items it does not. Chunks
+    are stored under new ids whenever their content changes, so the ids cover updates
+    too. Backends without `get_ids` are checked by item count. Building, adding and
+    deleting hold a per-collection file lock, shared by the workers on this host, so an
+    item added while the index is being built is not lost when the new index replaces
+    the old one.
+    """
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = index_dir
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        # Collection name -> time of the last check against the vector DB
+        self.verified_at: dict[str, float] = {}
+
+    def _get_path(self, collection_name: str) -> Path:
+        if not COLLECTION_NAME_REGEX.fullmatch(collection_name):
+            collection_name = hashlib.sha256(collection_name.encode()).hexdigest()
+        return self.index_dir / f"{collection_name}.sqlite3"
+
+    def _connect(self, path: Path) -> sqlite3.Connection:
+        return sqlite3.connect(path, timeout=30)
+
+    def _lock(self, collection_name: str):
+        path = self._get_path(collection_name)
+        return locked(path.with_name(f"{path.name}.lock"))
+
+    def _sync(self, collection_name: str) -> bool:
+        """
+        Bring an existing index in line with the collection in the vector DB, by
+        removing the documents that are no longer in the collection. Returns False if
+        the collection has items that are missing from the index, which then has to be
+        rebuilt. Call with the lock of the collection held.
+        """
+        ids = VECTOR_DB_CLIENT.get_ids(collection_name)
+
+        conn = self._connect(self._get_path(collection_name))
+        try:
+            if ids is None:
+                count = VECTOR_DB_CLIENT.count(collection_name)
+                doc_count = conn.execute("SELECT doc_count FROM stats").fetchone()[0]
+                if count is not None and count != doc_count:
+                    log.info(
+                        f"BM25 index for {collection_name} has {doc_count} documents, "
+                        f"the collection has {count}: rebuilding"
+                    )
+                    return False
+                return True
+
+            ids = set(ids)
+            index_ids = {row[0] for row in conn.execute("SELECT id FROM docs")}
+
+            missing_count = len(ids - index_ids)
+            if missing_count:
+                log.info(
+                    f"BM25 index for {collection_name} is missing {missing_count} "
+                    f"documents of the collection: rebuilding"
+                )
+                return False
+
+            deleted_ids = list(index_ids - ids)
+            if deleted_ids:
+                with conn:
+                    self._delete_ids(conn, deleted_ids)
+                log.info(
+                    f"Removed {len(deleted_ids)} documents from the BM25 index for "
+                    f"{collection_name} that are no longer in the collection"
+                )
+            return True
+        finally:
+            conn.close()
+
+    def _insert(
+        self,
+        conn: sqlite3.Connection,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[Optional[dict]],
+    ):
+        self._delete_ids(conn, ids)
+
+        doc_rows = []
+        posting_rows = []
+        total_length = 0
+        for id, text, metadata in zip(ids, documents, metadatas):
+            term_frequencies = Counter(tokenize(text or ""))
+            length = sum(term_frequencies.values())
+            total_length += length
+
+            doc_rows.append((id, text or "", json.dumps(metadata or {}), length))
+            posting_rows.extend(
+                (term, id, tf, length) for term, tf in term_frequencies.items()
+            )
+
+        conn.executemany(
+            "INSERT INTO docs (id, text, metadata, length) VALUES (?, ?, ?, ?)",
+            doc_rows,
+        )
+        conn.executemany(
+            "INSERT INTO postings (term, doc_id, tf, doc_length) VALUES (?, ?, ?, ?)",
+            posting_rows,
+        )
+        conn.execute(
+            "UPDATE stats SET doc_count = doc_count + ?, total_length = total_length + ?",
+            (len(doc_rows), total_length),
+        )
+
+    def _delete_ids(self, conn: sqlite3.Connection, ids: list[str]):
+        for i in range(0, len(ids), DELETE_BATCH_SIZE):
+            batch = ids[i : i + DELETE_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+
+            doc_count, total_length = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs WHERE id IN ({placeholders})",
+                batch,
+            ).fetchone()
+            if not doc_count:
+                continue
+
+            conn.execute(
+                f"DELETE FROM postings WHERE doc_id IN ({placeholders})", batch
+            )
+            conn.execute(f"DELETE FROM docs WHERE id IN ({placeholders})", batch)
+            conn.execute(
+                "UPDATE stats SET doc_count = doc_count - ?, total_length = total_length - ?",
+                (doc_count, total_length),
+            )
+
+    def has_index(self, collection_name: str) -> bool:
+        return self._get_path(collection_name).exists()
+
+    def build(
+        self,
+        collection_name: str,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[Optional[dict]],
+    ):
+        """(Re)build the index of a collection, replacing an existing index atomically.
+        Call with the lock of the collection held, from before the items were read."""
+        path = self._get_path(collection_name)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+
+        try:
+            conn = self._connect(tmp_path)
+            try:
+                with conn:
+                    conn.executescript(SCHEMA)
+                    self._insert(conn, ids, documents, metadatas)
+            finally:
+                conn.close()
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        log.info(f"Built BM25 index for {collection_name} with {len(ids)} documents")
+
+    def ensure_index(self, collection_name: str) -> bool:
+        """Build the index from the vector DB if the collection has none yet, or if it
+        is out of date. Returns False if the collection does not exist."""
+        verified_at = self.verified_at.get(collection_name, 0)
+        if (
+            self.has_index(collection_name)
+            and time.monotonic() - verified_at < VERIFY_INTERVAL
+        ):
+            return True
+
+        with self._lock(collection_name):
+            if self.has_index(collection_name) and self._sync(collection_name):
+                self.verified_at[collection_name] = time.monotonic()
+                return True
+
+            result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+            if result is None:
+                return False
+
+            self.build(
+                collection_name,
+                result.ids[0],
+                result.documents[0],
+                result.metadatas[0],
+            )
+            self.verified_at[collection_name] = time.monotonic()
+        return True
+
+    def add(self, collection_name: str, items: list[dict]):
+        """Add vector DB items (id, text, metadata) to the index of a collection"""
+        if not self.has_index(collection_name):
+            return
+
+        try:
+            # Waits for a build in progress, which may not have read these items
+            with self._lock(collection_name):
+                if not self.has_index(collection_name):
+                    return
+
+                conn = self._connect(self._get_path(collection_name))
+                try:
+                    with conn:
+                        self._insert(
+                            conn,
+                            [item["id"] for item in items],
+                            [item["text"] for item in items],
+                            [item.get("metadata") for item in items],
+                        )
+                finally:
+                    conn.close()
+        except Exception as e:
+            # An index missing documents gives wrong results; drop it so it is rebuilt
+            log.exception(f"Error updating BM25 index for {collection_name}: {e}")
+            self.delete_collection(collection_name)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        """Remove documents by id or metadata filter, mirroring VECTOR_DB_CLIENT.delete"""
+        if not self.has_index(collection_name):
+            return
+
+        try:
+            with self._lock(collection_name):
+                if not self.has_index(collection_name):
+                    return
+
+                conn = self._connect(self._get_path(collection_name))
+                try:
+                    with conn:
+                        if filter:
+                            conditions = " AND ".join(
+                                "json_extract(metadata, ?) = ?" for _ in filter
+                            )
+                            params = []
+                            for key, value in filter.items():
+                                params.extend([f'$."{key}"', value])
+
+                            ids = [
+                                row[0]
+                                for row in conn.execute(
+                                    f"SELECT id FROM docs WHERE {conditions}", params
+                                )
+                            ]
+                        self._delete_ids(conn, ids or [])
+                finally:
+                    conn.close()
+        except Exception as e:
+            log.exception(f"Error updating BM25 index for {collection_name}: {e}")
+            self.delete_collection(collection_name)
+
+    def delete_collection(self, collection_name: str):
+        self.verified_at.pop(collection_name, None)
+        try:
+            self._get_path(collection_name).unlink(missing_ok=True)
+        except Exception as e:
+            log.exception(f"Error deleting BM25 index for {collection_name}: {e}")
+
+    def reset(self):
+        self.verified_at.clear()
+        for path in self.index_dir.glob("*.sqlite3"):
+            path.unlink(missing_ok=True)
+
+    def search(self, collection_name: str, query: str, k: int) -> list[tuple]:
+        """Return the top k (id, text, metadata, score) of a collection for the query"""
+        query_terms = Counter(tokenize(query))
+        if not query_terms or not self.has_index(collection_name):
+            return []
+
+        conn = self._connect(self._get_path(collection_name))
+        try:
+            doc_count, total_length = conn.execute(
+                "SELECT doc_count, total_length FROM stats"
+            ).fetchone()
+            if not doc_count:
+                return []
+            avg_length = total_length / doc_count or 1
+
+            placeholders = ",".join("?" * len(query_terms))
+            postings = {}
+            for term, doc_id, tf, doc_length in conn.execute(
+                f"SELECT term, doc_id, tf, doc_length FROM postings WHERE term IN ({placeholders})",
+                list(query_terms),
+            ):
+                postings.setdefault(term, []).append((doc_id, tf, doc_length))
+
+            scores = Counter()
+            for term, term_postings in postings.items():
+                df = len(term_postings)
+                # Lucene's variant of the idf, which is never negative
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                weight = query_terms[term] * idf
+                for doc_id, tf, doc_length in term_postings:
+                    scores[doc_id] += weight * (
+                        tf
+                        * (BM25_K1 + 1)
+                        / (
+                            tf
+                            + BM25_K1 * (1 - BM25_B + BM25_B * doc_length / avg_length)
+                        )
+                    )
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            if not top:
+                return []
+
+            placeholders = ",".join("?" * len(top))
+            docs = {
+                id: (text, json.loads(metadata) if metadata else {})
+                for id, text, metadata in conn.execute(
+                    f"SELECT id, text, metadata FROM docs WHERE id IN ({placeholders})",
+                    [doc_id for doc_id, _ in top],
+                )
+            }
+        finally:
+            conn.close()
+
+        return [
+            (doc_id, *docs[doc_id], score) for doc_id, score in top if doc_id in docs
+        ]
+
+
+BM25_INDEX = BM25Index(CACHE_DIR / "bm25")
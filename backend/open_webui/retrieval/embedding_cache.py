@@ -0,0 +1,243 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from open_webui.config import (
+    ENABLE_RAG_CHUNK_EMBEDDING_STORE,
+    ENABLE_RAG_EMBEDDING_CACHE,
+    ENABLE_RAG_EMBEDDING_CACHE_REDIS,
+    RAG_CHUNK_EMBEDDING_STORE_TTL,
+    RAG_EMBEDDING_CACHE_MAX_ENTRIES,
+    RAG_EMBEDDING_CACHE_TTL,
+)
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.chunk_embeddings import ChunkEmbeddings
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+REDIS_KEY_PREFIX = "open-webui:embedding-cache"
+
+# Seconds between prunes of the stored chunk embeddings that were not reused
+PRUNE_INTERVAL = 60 * 60
+
+
+class EmbeddingCache:
+    """
+    Cache of embeddings keyed by (engine, model, prefix, text hash).
+
+    Entries are kept in a bounded in-process LRU with a TTL, which is safe to use from
+    the worker threads that run retrieval. With a Redis URL, entries are also shared
+    between all instances: a local miss falls back to Redis before embedding the text.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: int,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+
+        self.redis = None
+        if redis_url:
+            self.redis = get_redis_connection(
+                redis_url, redis_sentinels, decode_responses=True
+            )
+
+    @staticmethod
+    def make_key(engine: str, model: str, prefix: Optional[str], text: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        key_data = json.dumps([engine, model, prefix, text_hash])
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+    def _set_local(self, key: str, embedding: list[float]):
+        self.entries[key] = (time.time() + self.ttl, embedding)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_many(self, keys: list[str]) -> list[Optional[list[float]]]:
+        results = [None] * len(keys)
+        now = time.time()
+
+        with self.lock:
+            for idx, key in enumerate(keys):
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    del self.entries[key]
+                    continue
+                self.entries.move_to_end(key)
+                results[idx] = entry[1]
+                self.stats["memory_hits"] += 1
+
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        if missing and self.redis is not None:
+            try:
+                values = self.redis.mget(
+                    [f"{REDIS_KEY_PREFIX}:{keys[idx]}" for idx in missing]
+                )
+                with self.lock:
+                    for idx, value in zip(missing, values):
+                        if value is not None:
+                            results[idx] = json.loads(value)
+                            self._set_local(keys[idx], results[idx])
+                            self.stats["redis_hits"] += 1
+            except Exception as e:
+                # The cache is an optimization only, never fail an embedding because of it
+                log.warning(f"Error reading embeddings from Redis: {e}")
+
+        with self.lock:
+            self.stats["misses"] += sum(1 for result in results if result is None)
+        return results
+
+    def set_many(self, keys: list[str], embeddings: list[list[float]]):
+        with self.lock:
+            for key, embedding in zip(keys, embeddings):
+                self._set_local(key, embedding)
+
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                for key, embedding in zip(keys, embeddings):
+                    pipe.set(
+                        f"{REDIS_KEY_PREFIX}:{key}", json.dumps(embedding), ex=self.ttl
+                    )
+                pipe.execute()
+            except Exception as e:
+                log.warning(f"Error writing embeddings to Redis: {e}")
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            stats = {**self.stats, "size": len(self.entries)}
+
+        hits = stats["memory_hits"] + stats["redis_hits"]
+        lookups = hits + stats["misses"]
+        return {
+            "enabled": True,
+            "redis": self.redis is not None,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            **stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    if not ENABLE_RAG_EMBEDDING_CACHE:
+        return None
+
+    if ENABLE_RAG_EMBEDDING_CACHE_REDIS and REDIS_URL:
+        return EmbeddingCache(
+            RAG_EMBEDDING_CACHE_MAX_ENTRIES,
+            RAG_EMBEDDING_CACHE_TTL,
+            REDIS_URL,
+            get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+        )
+    return EmbeddingCache(RAG_EMBEDDING_CACHE_MAX_ENTRIES, RAG_EMBEDDING_CACHE_TTL)
+
+
+EMBEDDING_CACHE = get_embedding_cache()
+
+
+class ChunkEmbeddingStore:
+    """
+    Persistent store of the embeddings of document chunks, keyed like EmbeddingCache.
+
+    Used when saving documents to the vector DB: chunks that were embedded before with
+    the same engine, model and prefix (in any file or collection) get their stored
+    vector instead of being embedded again, e.g. when an edited file is re-uploaded or
+    a knowledge base is reindexed. Entries are kept in the chunk_embedding table, so
+    they are shared between instances and survive restarts.
+
+    An entry is deleted when the last file and collection referencing it are deleted,
+    when it was not reused for `ttl` seconds, and when the embedding model changes.
+    """
+
+    make_key = staticmethod(EmbeddingCache.make_key)
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+        self.pruned_at = 0.0
+
+    def get_many(self, keys: list[str]) -> list[Optional[list[float]]]:
+        try:
+            embeddings = ChunkEmbeddings.get_embeddings_by_ids(list(set(keys)))
+        except Exception as e:
+            log.warning(f"Error reading stored chunk embeddings: {e}")
+            embeddings = {}
+
+        results = [embeddings.get(key) for key in keys]
+        with self.lock:
+            self.stats["hits"] += sum(1 for result in results if result is not None)
+            self.stats["misses"] += sum(1 for result in results if result is None)
+        return results
+
+    def set_many(self, keys: list[str], embeddings: list[list[float]]):
+        try:
+            ChunkEmbeddings.insert_embeddings(dict(zip(keys, embeddings)))
+        except Exception as e:
+            log.warning(f"Error storing chunk embeddings: {e}")
+        self.prune()
+
+    def add_references(self, collection_name: str, file_id: str, keys: list[str]):
+        """Record that the chunks of a file were saved to a collection"""
+        try:
+            ChunkEmbeddings.insert_references(collection_name, file_id, keys)
+        except Exception as e:
+            log.warning(f"Error storing chunk embedding references: {e}")
+
+    def prune(self):
+        """Delete the embeddings that were not reused within the TTL, at most once per
+        PRUNE_INTERVAL"""
+        if not self.ttl:
+            return
+
+        with self.lock:
+            if time.time() - self.pruned_at < PRUNE_INTERVAL:
+                return
+            self.pruned_at = time.time()
+
+        try:
+            ChunkEmbeddings.delete_unused_embeddings(int(time.time()) - self.ttl)
+        except Exception as e:
+            log.warning(f"Error pruning chunk embeddings: {e}")
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            stats = {**self.stats}
+
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "enabled": True,
+            "ttl": self.ttl,
+            **stats,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+CHUNK_EMBEDDING_STORE = (
+    ChunkEmbeddingStore(RAG_CHUNK_EMBEDDING_STORE_TTL)
+    if ENABLE_RAG_CHUNK_EMBEDDING_STORE
+    else None
+)
@@ -4,16 +4,17 @@ from typing import Optional, Union
 
 import requests
 import hashlib
+import random
 from concurrent.futures import ThreadPoolExecutor
 import time
 
 from huggingface_hub import snapshot_download
 from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
@@ -30,6 +31,9 @@ from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    RAG_EMBEDDING_CONCURRENCY,
+    RAG_EMBEDDING_MAX_RETRIES,
+    RAG_EMBEDDING_TIMEOUT,
 )
 
 log = logging.getLogger(__name__)
@@ -67,6 +71,7 @@ class VectorSearchRetriever(BaseRetriever):
         for idx in range(len(ids)):
             results.append(
                 Document(
+                    id=ids[idx],
                     metadata=metadatas[idx],
                     page_content=documents[idx],
                 )
@@ -74,6 +79,24 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class BM25IndexRetriever(BaseRetriever):
+    collection_name: Any
+    top_k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        return [
+            Document(id=id, metadata=metadata, page_content=text)
+            for id, text, metadata, _ in BM25_INDEX.search(
+                self.collection_name, query, self.top_k
+            )
+        ]
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -110,7 +133,6 @@ def get_doc(collection_name: str, user: UserModel = None):
 
 def query_doc_with_hybrid_search(
     collection_name: str,
-    collection_result: GetResult,
     query: str,
     embedding_function,
     k: int,
@@ -121,11 +143,10 @@ def query_doc_with_hybrid_search(
 ) -> dict:
     try:
         log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=collection_result.documents[0],
-            metadatas=collection_result.metadatas[0],
+        bm25_retriever = BM25IndexRetriever(
+            collection_name=collection_name,
+            top_k=k,
         )
-        bm25_retriever.k = k
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
@@ -148,6 +169,7 @@ def query_doc_with_hybrid_search(
             )
 
         compressor = RerankCompressor(
+            collection_name=collection_name,
             embedding_function=embedding_function,
             top_n=k_reranker,
             reranking_function=reranking_function,
@@ -330,20 +352,20 @@ def query_collection_with_hybrid_search(
 ) -> dict:
     results = []
     error = False
-    # Fetch collection data once per collection sequentially
-    # Avoid fetching the same data multiple times later
-    collection_results = {}
+    # Make sure every collection has a BM25 index, building it once from the vector DB
+    # for collections that have none yet. Queries then only read the postings of their terms
+    collection_available = {}
     for collection_name in collection_names:
         try:
             log.debug(
-                f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
+                f"query_collection_with_hybrid_search:BM25_INDEX.ensure_index:collection {collection_name}"
             )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=collection_name
+            collection_available[collection_name] = BM25_INDEX.ensure_index(
+                collection_name
             )
         except Exception as e:
-            log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
+            log.exception(f"Failed to index collection {collection_name}: {e}")
+            collection_available[collection_name] = False
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
@@ -353,7 +375,6 @@ def query_collection_with_hybrid_search(
         try:
             result = query_doc_with_hybrid_search(
                 collection_name=collection_name,
-                collection_result=collection_results[collection_name],
                 query=query,
                 embedding_function=embedding_function,
                 k=k,
@@ -368,12 +389,9 @@ def query_collection_with_hybrid_search(
             return None, e
 
     # Prepare tasks for all collections and queries
-    # Avoid running any tasks for collections that failed to fetch data (have assigned None)
+    # Avoid running any tasks for collections that do not exist or failed to index
     tasks = [
-        (cn, q)
-        for cn in collection_names
-        if collection_results[cn] is not None
-        for q in queries
+        (cn, q) for cn in collection_names if collection_available[cn] for q in queries
     ]
 
     with ThreadPoolExecutor() as executor:
@@ -394,6 +412,39 @@ def query_collection_with_hybrid_search(
     return merge_and_sort_query_results(results, k=k)
 
 
+def get_cached_embedding_function(
+    func, embedding_engine, embedding_model, embedding_cache
+):
+    """Wrap an embedding function so texts already embedded are served from the cache"""
+
+    def cached_embedding_function(query, prefix=None, user=None):
+        texts = query if isinstance(query, list) else [query]
+        keys = [
+            embedding_cache.make_key(embedding_engine, embedding_model, prefix, text)
+            for text in texts
+        ]
+        embeddings = embedding_cache.get_many(keys)
+
+        missing = [idx for idx, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            new_embeddings = func(
+                [texts[idx] for idx in missing], prefix=prefix, user=user
+            )
+            if new_embeddings is None:
+                return None
+
+            for idx, embedding in zip(missing, new_embeddings):
+                embeddings[idx] = embedding
+            embedding_cache.set_many(
+                [keys[idx] for idx in missing if embeddings[idx] is not None],
+                [embeddings[idx] for idx in missing if embeddings[idx] is not None],
+            )
+
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+    return cached_embedding_function
+
+
 def get_embedding_function(
     embedding_engine,
     embedding_model,
@@ -402,13 +453,14 @@ def get_embedding_function(
     key,
     embedding_batch_size,
     azure_api_version=None,
+    embedding_cache=None,
 ):
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
+        func = lambda query, prefix=None, user=None: embedding_function.encode(
             query, **({"prompt": prefix} if prefix else {})
         ).tolist()
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
-        func = lambda query, prefix=None, user=None: generate_embeddings(
+        generate = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
             model=embedding_model,
             text=query,
@@ -419,27 +471,63 @@ def get_embedding_function(
             azure_api_version=azure_api_version,
         )
 
+        def embed_batch(batch, prefix, user, func):
+            # Failures of the engine itself (see is_transient_embedding_error) are raised,
+            # None means the engine rejected the input
+            embeddings = func(batch, prefix=prefix, user=user)
+            if embeddings is None and len(batch) > 1:
+                # A single text the engine rejects fails the whole batch, retry them one by one
+                log.warning(
+                    f"Embedding a batch of {len(batch)} texts failed, retrying them separately"
+                )
+                embeddings = []
+                for text in batch:
+                    embedding = func([text], prefix=prefix, user=user)
+                    embeddings.append(embedding[0] if embedding else None)
+            return embeddings if embeddings is not None else [None] * len(batch)
+
         def generate_multiple(query, prefix, user, func):
             if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    embeddings.extend(
-                        func(
-                            query[i : i + embedding_batch_size],
-                            prefix=prefix,
-                            user=user,
+                batches = [
+                    query[i : i + embedding_batch_size]
+                    for i in range(0, len(query), embedding_batch_size)
+                ]
+                if len(batches) <= 1 or RAG_EMBEDDING_CONCURRENCY <= 1:
+                    results = [
+                        embed_batch(batch, prefix, user, func) for batch in batches
+                    ]
+                else:
+                    with ThreadPoolExecutor(
+                        max_workers=min(RAG_EMBEDDING_CONCURRENCY, len(batches))
+                    ) as executor:
+                        # map keeps the results in the order of the batches
+                        results = list(
+                            executor.map(
+                                lambda batch: embed_batch(batch, prefix, user, func),
+                                batches,
+                            )
                         )
-                    )
+
+                embeddings = [embedding for result in results for embedding in result]
+                failed = sum(1 for embedding in embeddings if embedding is None)
+                if failed:
+                    log.error(f"Failed to embed {failed} of {len(query)} texts")
                 return embeddings
             else:
                 return func(query, prefix, user)
 
-        return lambda query, prefix=None, user=None: generate_multiple(
-            query, prefix, user, func
+        func = lambda query, prefix=None, user=None: generate_multiple(
+            query, prefix, user, generate
         )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
+    if embedding_cache is not None:
+        return get_cached_embedding_function(
+            func, embedding_engine, embedding_model, embedding_cache
+        )
+    return func
+
 
 def get_sources_from_files(
     request,
@@ -655,6 +743,75 @@ def get_model_path(model: str, update_model: bool = False):
         return model
 
 
+EMBEDDING_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+EMBEDDING_RETRY_MAX_DELAY = 30  # seconds
+
+_embedding_session: Optional[requests.Session] = None
+
+
+def get_embedding_session() -> requests.Session:
+    """Shared HTTP session, so embedding requests reuse their connections"""
+    global _embedding_session
+    if _embedding_session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=4, pool_maxsize=max(RAG_EMBEDDING_CONCURRENCY, 10)
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _embedding_session = session
+    return _embedding_session
+
+
+def post_embedding_request(url: str, headers: dict, json_data: dict):
+    """POST to an embedding engine, retrying with exponential backoff on rate limiting,
+    server errors and connection errors. Raises once the retries are exhausted."""
+    for attempt in range(RAG_EMBEDDING_MAX_RETRIES + 1):
+        try:
+            r = get_embedding_session().post(
+                url, headers=headers, json=json_data, timeout=RAG_EMBEDDING_TIMEOUT
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= RAG_EMBEDDING_MAX_RETRIES:
+                raise
+            reason = str(e)
+            delay = None
+        else:
+            if (
+                r.status_code not in EMBEDDING_RETRY_STATUS_CODES
+                or attempt >= RAG_EMBEDDING_MAX_RETRIES
+            ):
+                r.raise_for_status()
+                return r
+            reason = f"status {r.status_code}"
+            try:
+                delay = float(r.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                delay = None
+
+        if delay is None:
+            delay = min(2**attempt, EMBEDDING_RETRY_MAX_DELAY) + random.uniform(0, 1)
+        log.warning(
+            f"Embedding request failed ({reason}), retrying in {delay:.1f}s "
+            f"({attempt + 1}/{RAG_EMBEDDING_MAX_RETRIES})"
+        )
+        time.sleep(min(delay, EMBEDDING_RETRY_MAX_DELAY))
+
+
+def is_transient_embedding_error(e: Exception) -> bool:
+    """Whether an embedding request failed because of the engine rather than the texts:
+    connection errors, timeouts, rate limiting and server errors that remained after the
+    retries. These are raised, as retrying the texts one by one cannot fix them."""
+    if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return (
+            e.response.status_code in EMBEDDING_RETRY_STATUS_CODES
+            or e.response.status_code >= 500
+        )
+    return False
+
+
 def generate_openai_batch_embeddings(
     model: str,
     texts: list[str],
@@ -671,7 +828,7 @@ def generate_openai_batch_embeddings(
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        r = requests.post(
+        r = post_embedding_request(
             f"{url}/embeddings",
             headers={
                 "Content-Type": "application/json",
@@ -687,15 +844,16 @@ def generate_openai_batch_embeddings(
                     else {}
                 ),
             },
-            json=json_data,
+            json_data=json_data,
         )
-        r.raise_for_status()
         data = r.json()
         if "data" in data:
             return [elem["embedding"] for elem in data["data"]]
         else:
             raise "Something went wrong :/"
     except Exception as e:
+        if is_transient_embedding_error(e):
+            raise
         log.exception(f"Error generating openai batch embeddings: {e}")
         return None
 
@@ -719,37 +877,32 @@ def generate_azure_openai_batch_embeddings(
 
         url = f"{url}/openai/deployments/{model}/embeddings?api-version={version}"
 
-        for _ in range(5):
-            r = requests.post(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": key,
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                json=json_data,
-            )
-            if r.status_code == 429:
-                retry = float(r.headers.get("Retry-After", "1"))
-                time.sleep(retry)
-                continue
-            r.raise_for_status()
-            data = r.json()
-            if "data" in data:
-                return [elem["embedding"] for elem in data["data"]]
-            else:
-                raise Exception("Something went wrong :/")
-        return None
+        r = post_embedding_request(
+            url,
+            headers={
+                "Content-Type": "application/json",
+                "api-key": key,
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": user.name,
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            json_data=json_data,
+        )
+        data = r.json()
+        if "data" in data:
+            return [elem["embedding"] for elem in data["data"]]
+        else:
+            raise Exception("Something went wrong :/")
     except Exception as e:
+        if is_transient_embedding_error(e):
+            raise
         log.exception(f"Error generating azure openai batch embeddings: {e}")
         return None
 
@@ -770,7 +923,7 @@ def generate_ollama_batch_embeddings(
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        r = requests.post(
+        r = post_embedding_request(
             f"{url}/api/embed",
             headers={
                 "Content-Type": "application/json",
@@ -786,9 +939,8 @@ def generate_ollama_batch_embeddings(
                     else {}
                 ),
             },
-            json=json_data,
+            json_data=json_data,
         )
-        r.raise_for_status()
         data = r.json()
 
         if "embeddings" in data:
@@ -796,6 +948,8 @@ def generate_ollama_batch_embeddings(
         else:
             raise "Something went wrong :/"
     except Exception as e:
+        if is_transient_embedding_error(e):
+            raise
         log.exception(f"Error generating ollama batch embeddings: {e}")
         return None
 
@@ -828,12 +982,12 @@ def generate_embeddings(
                 "user": user,
             }
         )
-        return embeddings[0] if isinstance(text, str) else embeddings
+        return embeddings[0] if isinstance(text, str) and embeddings else embeddings
     elif engine == "openai":
         embeddings = generate_openai_batch_embeddings(
             model, text if isinstance(text, list) else [text], url, key, prefix, user
         )
-        return embeddings[0] if isinstance(text, str) else embeddings
+        return embeddings[0] if isinstance(text, str) and embeddings else embeddings
     elif engine == "azure_openai":
         azure_api_version = kwargs.get("azure_api_version", "")
         embeddings = generate_azure_openai_batch_embeddings(
@@ -845,17 +999,36 @@ def generate_embeddings(
             prefix,
             user,
         )
-        return embeddings[0] if isinstance(text, str) else embeddings
+        return embeddings[0] if isinstance(text, str) and embeddings else embeddings
 
 
 import operator
 from typing import Optional, Sequence
 
+import numpy as np
+
 from langchain_core.callbacks import Callbacks
 from langchain_core.documents import BaseDocumentCompressor, Document
 
 
+def cosine_similarity(query_embedding: list[float], embeddings: list[list[float]]):
+    """Cosine similarity of one query embedding with each of the embeddings"""
+    # Stored vectors may be zero-padded to a fixed length (pgvector), padding with
+    # zeros does not change dot products or norms
+    dimension = max(len(query_embedding), *(len(e) for e in embeddings))
+    matrix = np.zeros((len(embeddings), dimension), dtype=np.float32)
+    for i, embedding in enumerate(embeddings):
+        matrix[i, : len(embedding)] = embedding
+    query = np.zeros(dimension, dtype=np.float32)
+    query[: len(query_embedding)] = query_embedding
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    norms[norms == 0] = 1.0
+    return (matrix @ query) / norms
+
+
 class RerankCompressor(BaseDocumentCompressor):
+    collection_name: Optional[str] = None
     embedding_function: Any
     top_n: int
     reranking_function: Any
@@ -865,6 +1038,38 @@ class RerankCompressor(BaseDocumentCompressor):
         extra = "forbid"
         arbitrary_types_allowed = True
 
+    def get_document_embeddings(
+        self, documents: Sequence[Document]
+    ) -> list[list[float]]:
+        # The candidates come from the vector DB, so their vectors are already stored.
+        # Only documents without a stored vector are embedded again.
+        stored_vectors = {}
+        if self.collection_name:
+            ids = [doc.id for doc in documents if doc.id]
+            if ids:
+                stored_vectors = VECTOR_DB_CLIENT.get_vectors(self.collection_name, ids)
+
+        missing = [doc for doc in documents if doc.id not in stored_vectors]
+        if missing:
+            log.debug(
+                f"RerankCompressor: embedding {len(missing)} of {len(documents)} documents"
+            )
+            embeddings = self.embedding_function(
+                [doc.page_content for doc in missing], RAG_EMBEDDING_CONTENT_PREFIX
+            )
+            missing_vectors = {
+                id(doc): embedding for doc, embedding in zip(missing, embeddings)
+            }
+
+        return [
+            (
+                stored_vectors[doc.id]
+                if doc.id in stored_vectors
+                else missing_vectors[id(doc)]
+            )
+            for doc in documents
+        ]
+
     def compress_documents(
         self,
         documents: Sequence[Document],
@@ -878,13 +1083,9 @@ class RerankCompressor(BaseDocumentCompressor):
                 [(query, doc.page_content) for doc in documents]
             )
         else:
-            from sentence_transformers import util
-
             query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
-            )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
+            document_embeddings = self.get_document_embeddings(documents)
+            scores = cosine_similarity(query_embedding, document_embeddings)
 
         docs_with_scores = list(
             zip(documents, scores.tolist() if not isinstance(scores, list) else scores)
@@ -0,0 +1,127 @@
+"""Benchmark for the pgvector write path.
+
+Compares the ORM based insert (bulk_save_objects) and upsert (a SELECT per item) that
+were used before with the current COPY insert and batched INSERT ... ON CONFLICT
+upsert, on synthetic chunks. Needs the Postgres database of PGVECTOR_DB_URL; the
+chunks are written to throwaway collections which are deleted afterwards.
+
+Usage (from the backend directory):
+    python -m open_webui.retrieval.vector.dbs.benchmark_pgvector
+"""
+
+import random
+import time
+import uuid
+from typing import List
+
+from open_webui.retrieval.vector.dbs.pgvector import (
+    VECTOR_LENGTH,
+    DocumentChunk,
+    PgvectorClient,
+)
+from open_webui.retrieval.vector.main import VectorItem
+
+INSERT_COUNTS = [1_000, 10_000, 50_000]
+# The legacy upsert does a round trip per item, keep it affordable
+UPSERT_COUNTS = [1_000, 5_000]
+
+
+def make_items(count: int, seed: int = 42) -> List[VectorItem]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "text": f"chunk {idx} " + "lorem ipsum dolor sit amet " * 20,
+            "vector": [rng.random() for _ in range(VECTOR_LENGTH)],
+            "metadata": {"file_id": "benchmark", "name": "benchmark.txt", "start": idx},
+        }
+        for idx in range(count)
+    ]
+
+
+def legacy_insert(client: PgvectorClient, collection_name: str, items):
+    client.session.bulk_save_objects(
+        [
+            DocumentChunk(
+                id=item["id"],
+                vector=client.adjust_vector_length(item["vector"]),
+                collection_name=collection_name,
+                text=item["text"],
+                vmetadata=item["metadata"],
+            )
+            for item in items
+        ]
+    )
+    client.session.commit()
+
+
+def legacy_upsert(client: PgvectorClient, collection_name: str, items):
+    for item in items:
+        vector = client.adjust_vector_length(item["vector"])
+        existing = (
+            client.session.query(DocumentChunk)
+            .filter(DocumentChunk.id == item["id"])
+            .first()
+        )
+        if existing:
+            existing.vector = vector
+            existing.text = item["text"]
+            existing.vmetadata = item["metadata"]
+            existing.collection_name = collection_name
+        else:
+            client.session.add(
+                DocumentChunk(
+                    id=item["id"],
+                    vector=vector,
+                    collection_name=collection_name,
+                    text=item["text"],
+                    vmetadata=item["metadata"],
+                )
+            )
+    client.session.commit()
+
+
+def timed(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    client = PgvectorClient()
+    collection_name = f"benchmark-{uuid.uuid4().hex}"
+
+    try:
+        print(f"{'insert':>8} {'legacy (s)':>12} {'copy (s)':>12} {'speedup':>8}")
+        for count in INSERT_COUNTS:
+            items = make_items(count)
+            legacy_time = timed(legacy_insert, client, collection_name, items)
+            client.delete_collection(collection_name)
+
+            items = make_items(count, seed=43)
+            new_time = timed(client.insert, collection_name, items)
+            client.delete_collection(collection_name)
+            print(
+                f"{count:>8} {legacy_time:>12.3f} {new_time:>12.3f} {legacy_time / new_time:>7.1f}x"
+            )
+
+        # Half of the upserted items exist already, half are new
+        print(f"{'upsert':>8} {'legacy (s)':>12} {'batched (s)':>12} {'speedup':>8}")
+        for count in UPSERT_COUNTS:
+            items = make_items(count)
+            client.insert(collection_name, items[: count // 2])
+            legacy_time = timed(legacy_upsert, client, collection_name, items)
+            client.delete_collection(collection_name)
+
+            client.insert(collection_name, items[: count // 2])
+            new_time = timed(client.upsert, collection_name, items)
+            client.delete_collection(collection_name)
+            print(
+                f"{count:>8} {legacy_time:>12.3f} {new_time:>12.3f} {legacy_time / new_time:>7.1f}x"
+            )
+    finally:
+        client.delete_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -29,6 +29,8 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
 class ChromaClient(VectorDBBase):
+    supports_replace_collection = True
+
     def __init__(self):
         settings_dict = {
             "allow_reset": True,
@@ -135,6 +137,58 @@ class ChromaClient(VectorDBBase):
             )
         return None
 
+    def count(self, collection_name: str) -> Optional[int]:
+        # Count the items in the collection without fetching them.
+        try:
+            return self.client.get_collection(name=collection_name).count()
+        except Exception:
+            return None
+
+    def get_ids(self, collection_name: str) -> Optional[list[str]]:
+        # Get the ids of all items in the collection, without their contents.
+        try:
+            collection = self.client.get_collection(name=collection_name)
+            return collection.get(include=[])["ids"]
+        except Exception:
+            return None
+
+    def get_vectors(self, collection_name: str, ids: list[str]) -> dict:
+        # Get the stored embeddings of the given items.
+        try:
+            collection = self.client.get_collection(name=collection_name)
+            result = collection.get(ids=ids, include=["embeddings"])
+            return {
+                id: list(embedding)
+                for id, embedding in zip(result["ids"], result["embeddings"])
+            }
+        except Exception:
+            return {}
+
+    def replace_collection(self, collection_name: str, source_collection_name: str):
+        # Rename the collection aside and the source collection to take its place, then
+        # drop the old collection. It is only missing between the two renames, and put
+        # back if the source collection cannot be renamed.
+        collection = self.client.get_collection(name=source_collection_name)
+
+        previous = None
+        previous_name = f"{collection_name}-replaced"
+        if self.has_collection(previous_name):
+            # Left behind by an interrupted replace
+            self.client.delete_collection(name=previous_name)
+        if self.has_collection(collection_name):
+            previous = self.client.get_collection(name=collection_name)
+            previous.modify(name=previous_name)
+
+        try:
+            collection.modify(name=collection_name)
+        except Exception:
+            if previous is not None:
+                previous.modify(name=collection_name)
+            raise
+
+        if previous is not None:
+            self.client.delete_collection(name=previous_name)
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection = self.client.get_or_create_collection(
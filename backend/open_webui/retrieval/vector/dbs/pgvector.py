@@ -1,9 +1,14 @@
 from typing import Optional, List, Dict, Any
+import io
+import json
 import logging
+import struct
+import time
 from sqlalchemy import (
     cast,
     column,
     create_engine,
+    delete,
     Column,
     Integer,
     MetaData,
@@ -13,11 +18,12 @@ from sqlalchemy import (
     Table,
     values,
 )
+from sqlalchemy.engine import make_url
 from sqlalchemy.sql import true
 from sqlalchemy.pool import NullPool
 
 from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.dialects.postgresql import JSONB, array, insert as pg_insert
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
@@ -28,7 +34,21 @@ from open_webui.retrieval.vector.main import (
     SearchResult,
     GetResult,
 )
-from open_webui.config import PGVECTOR_DB_URL, PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH
+from open_webui.config import (
+    PGVECTOR_COMMIT_BATCH_SIZE,
+    PGVECTOR_DB_URL,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_HNSW_ITERATIVE_SCAN,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_INDEX_METHOD,
+    PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH,
+    PGVECTOR_INSERT_BATCH_SIZE,
+    PGVECTOR_IVFFLAT_LISTS,
+    PGVECTOR_IVFFLAT_PROBES,
+    PGVECTOR_PARTITIONS,
+    PGVECTOR_UPSERT_BATCH_SIZE,
+)
 
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -39,6 +59,56 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
+VECTOR_INDEX_NAME = "idx_document_chunk_vector"
+# Advisory lock held while the vector index is built, by startup and rebuilds
+VECTOR_INDEX_LOCK_ID = 7372110341
+# pgvector cannot index vector columns with more dimensions
+MAX_INDEX_DIMENSIONS = 2000
+
+COPY_STATEMENT = (
+    "COPY document_chunk (id, vector, collection_name, text, vmetadata) "
+    "FROM STDIN WITH (FORMAT binary)"
+)
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+
+
+def encode_copy_rows(rows: List[dict]) -> bytes:
+    """Encode rows in the binary COPY format, see
+    https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4"""
+
+    def field(data: Optional[bytes]) -> bytes:
+        if data is None:
+            return struct.pack(">i", -1)
+        return struct.pack(">i", len(data)) + data
+
+    def text_field(value: Optional[str]) -> bytes:
+        return field(value.encode("utf-8") if value is not None else None)
+
+    buffer = io.BytesIO()
+    buffer.write(COPY_HEADER)
+    for row in rows:
+        vector = row["vector"]
+        buffer.write(struct.pack(">h", 5))
+        buffer.write(text_field(row["id"]))
+        # pgvector's binary format: dimensions, unused, float4 values
+        buffer.write(
+            field(struct.pack(f">HH{len(vector)}f", len(vector), 0, *vector))
+            if vector is not None
+            else field(None)
+        )
+        buffer.write(text_field(row["collection_name"]))
+        buffer.write(text_field(row["text"]))
+        # jsonb's binary format: version 1 followed by the JSON text
+        buffer.write(
+            field(b"\x01" + json.dumps(row["vmetadata"]).encode("utf-8"))
+            if row["vmetadata"] is not None
+            else field(None)
+        )
+    buffer.write(COPY_TRAILER)
+    return buffer.getvalue()
+
+
 class DocumentChunk(Base):
     __tablename__ = "document_chunk"
 
@@ -50,6 +120,8 @@ class DocumentChunk(Base):
 
 
 class PgvectorClient(VectorDBBase):
+    supports_replace_collection = True
+
     def __init__(self) -> None:
 
         # if no pgvector uri, use the existing database connection
@@ -73,19 +145,36 @@ class PgvectorClient(VectorDBBase):
             # Check vector length consistency
             self.check_vector_length()
 
+            if PGVECTOR_PARTITIONS > 0:
+                self.create_partitioned_table()
+
             # Create the tables if they do not exist
             # Base.metadata.create_all requires a bind (engine or connection)
             # Get the connection from the session
             connection = self.session.connection()
             Base.metadata.create_all(bind=connection)
 
-            # Create an index on the vector column if it doesn't exist
-            self.session.execute(
-                text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
-                    "ON document_chunk USING ivfflat (vector vector_cosine_ops) WITH (lists = 100);"
-                )
+            self.partitioned = (
+                self.session.execute(
+                    text(
+                        "SELECT relkind FROM pg_class WHERE relname = 'document_chunk' "
+                        "AND relnamespace = to_regnamespace(current_schema())::oid"
+                    )
+                ).scalar()
+                == "p"
             )
+            self.extension_version = self.session.execute(
+                text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            ).scalar()
+
+            # Searches are tuned for the current index and the configured one, which
+            # replaces it once rebuilt
+            self.index_methods = {
+                self.check_vector_index(),
+                self.get_configured_index()[0],
+            } - {None}
+            self.search_settings = self.get_search_settings()
+
             self.session.execute(
                 text(
                     "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
@@ -94,11 +183,321 @@ class PgvectorClient(VectorDBBase):
             )
             self.session.commit()
             log.info("Initialization complete.")
+
+            self.async_engine = self._create_async_engine()
         except Exception as e:
             self.session.rollback()
             log.exception(f"Error during initialization: {e}")
             raise
 
+    def create_partitioned_table(self) -> None:
+        """Create document_chunk hash partitioned by collection name, so a search only
+        scans (the index of) the partition of its collection"""
+        exists = self.session.execute(
+            text("SELECT to_regclass('document_chunk') IS NOT NULL")
+        ).scalar()
+        if exists:
+            return
+
+        self.session.execute(
+            text(
+                "CREATE TABLE document_chunk ("
+                "id TEXT NOT NULL, "
+                f"vector vector({VECTOR_LENGTH}), "
+                "collection_name TEXT NOT NULL, "
+                "text TEXT, "
+                "vmetadata JSONB, "
+                "PRIMARY KEY (id, collection_name)"
+                ") PARTITION BY HASH (collection_name);"
+            )
+        )
+        for remainder in range(PGVECTOR_PARTITIONS):
+            self.session.execute(
+                text(
+                    f"CREATE TABLE document_chunk_p{remainder} PARTITION OF document_chunk "
+                    f"FOR VALUES WITH (MODULUS {PGVECTOR_PARTITIONS}, REMAINDER {remainder});"
+                )
+            )
+        log.info(f"Created document_chunk with {PGVECTOR_PARTITIONS} partitions.")
+
+    def get_configured_index(self) -> tuple[Optional[str], dict]:
+        """The index method and options configured by PGVECTOR_INDEX_METHOD, the method
+        is None without an index"""
+        method = PGVECTOR_INDEX_METHOD
+        if method == "hnsw":
+            options = {
+                "m": PGVECTOR_HNSW_M,
+                "ef_construction": PGVECTOR_HNSW_EF_CONSTRUCTION,
+            }
+        elif method == "ivfflat":
+            options = {"lists": PGVECTOR_IVFFLAT_LISTS}
+        else:
+            return None, {}
+
+        if VECTOR_LENGTH > MAX_INDEX_DIMENSIONS:
+            log.warning(
+                f"Vectors of {VECTOR_LENGTH} dimensions cannot be indexed, searches scan the collection."
+            )
+            return None, {}
+        return method, options
+
+    def get_vector_index_definition(self) -> Optional[str]:
+        return self.session.execute(
+            text(
+                "SELECT indexdef FROM pg_indexes WHERE tablename = 'document_chunk' "
+                "AND indexname = :name"
+            ),
+            {"name": VECTOR_INDEX_NAME},
+        ).scalar()
+
+    @staticmethod
+    def _get_index_method(index_definition: Optional[str]) -> Optional[str]:
+        for method in ("hnsw", "ivfflat"):
+            if index_definition and f"USING {method} " in index_definition:
+                return method
+        return None
+
+    @staticmethod
+    def _index_matches(
+        index_definition: Optional[str], method: Optional[str], options: dict
+    ) -> bool:
+        if index_definition is None or method is None:
+            return index_definition is None and method is None
+        return f"USING {method} " in index_definition and all(
+            f"{key}='{value}'" in index_definition for key, value in options.items()
+        )
+
+    def _get_index_using(self, method: str, options: dict) -> str:
+        with_options = ", ".join(f"{key} = {value}" for key, value in options.items())
+        return f"USING {method} (vector vector_cosine_ops) WITH ({with_options})"
+
+    def check_vector_index(self) -> Optional[str]:
+        """
+        Compare the index on the vector column with PGVECTOR_INDEX_METHOD on startup.
+        An empty table gets the configured index right away. Otherwise a different
+        index is only reported: building one takes long on a large table and blocks
+        writes without CONCURRENTLY, so it is left to rebuild_vector_index (an admin
+        action) instead of every worker that starts. Returns the method of the index.
+        """
+        method, options = self.get_configured_index()
+        index_definition = self.get_vector_index_definition()
+        if self._index_matches(index_definition, method, options):
+            return method
+
+        if (
+            index_definition is None
+            and method
+            and not self.session.execute(
+                text("SELECT EXISTS (SELECT 1 FROM document_chunk)")
+            ).scalar()
+            # Another worker creates it, or a rebuild is running
+            and self.session.execute(
+                text("SELECT pg_try_advisory_xact_lock(:id)"),
+                {"id": VECTOR_INDEX_LOCK_ID},
+            ).scalar()
+        ):
+            self.session.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS {VECTOR_INDEX_NAME} ON document_chunk "
+                    f"{self._get_index_using(method, options)};"
+                )
+            )
+            log.info(f"Created {method} index on document_chunk {options}.")
+            return method
+
+        log.warning(
+            f"The vector index ({index_definition or 'none'}) does not match "
+            f"PGVECTOR_INDEX_METHOD={PGVECTOR_INDEX_METHOD} {options}. Rebuild it with "
+            "POST /api/v1/retrieval/vector/index/rebuild."
+        )
+        return self._get_index_method(index_definition)
+
+    def _is_index_rebuilding(self) -> bool:
+        # pg_locks splits a bigint advisory lock key in classid and objid
+        return self.session.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' "
+                "AND granted AND classid = :classid AND objid = :objid AND objsubid = 1)"
+            ),
+            {
+                "classid": VECTOR_INDEX_LOCK_ID >> 32,
+                "objid": VECTOR_INDEX_LOCK_ID & 0xFFFFFFFF,
+            },
+        ).scalar()
+
+    def get_vector_index_status(self) -> dict:
+        try:
+            method, options = self.get_configured_index()
+            index_definition = self.get_vector_index_definition()
+            status = {
+                "method": self._get_index_method(index_definition),
+                "definition": index_definition,
+                "configured_method": method,
+                "configured_options": options,
+                "matches": self._index_matches(index_definition, method, options),
+                "rebuilding": self._is_index_rebuilding(),
+            }
+            self.session.commit()
+            return status
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error getting the vector index status: {e}")
+            raise
+
+    def rebuild_vector_index(self) -> bool:
+        """
+        Build the index configured by PGVECTOR_INDEX_METHOD next to the current index
+        with CREATE INDEX CONCURRENTLY, so searches and writes continue meanwhile, and
+        swap it in. Runs under an advisory lock, returns False if a rebuild is already
+        running (on any instance).
+        """
+        method, options = self.get_configured_index()
+        engine = self.session.get_bind()
+
+        # CONCURRENTLY cannot run in a transaction
+        with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            if not connection.execute(
+                text("SELECT pg_try_advisory_lock(:id)"), {"id": VECTOR_INDEX_LOCK_ID}
+            ).scalar():
+                return False
+
+            try:
+                build_name = f"{VECTOR_INDEX_NAME}_{int(time.time())}"
+                try:
+                    if method:
+                        self._build_vector_index(
+                            connection, build_name, method, options
+                        )
+
+                    # Searches wait for the swap only, not for the build
+                    with engine.begin() as transaction:
+                        transaction.execute(
+                            text(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME};")
+                        )
+                        if method:
+                            transaction.execute(
+                                text(
+                                    f"ALTER INDEX {build_name} RENAME TO {VECTOR_INDEX_NAME};"
+                                )
+                            )
+                except Exception:
+                    # A failed concurrent build leaves an invalid index behind
+                    connection.execute(text(f"DROP INDEX IF EXISTS {build_name};"))
+                    raise
+            finally:
+                connection.execute(
+                    text("SELECT pg_advisory_unlock(:id)"), {"id": VECTOR_INDEX_LOCK_ID}
+                )
+
+        self.index_methods = {method} - {None}
+        self.search_settings = self.get_search_settings()
+        log.info(f"Rebuilt the vector index: {method or 'none'} {options}")
+        return True
+
+    def _build_vector_index(
+        self, connection, build_name: str, method: str, options: dict
+    ) -> None:
+        using = self._get_index_using(method, options)
+        log.info(
+            f"Building {method} index on document_chunk {options}, this can take a while for large tables."
+        )
+        if not self.partitioned:
+            connection.execute(
+                text(
+                    f"CREATE INDEX CONCURRENTLY {build_name} ON document_chunk {using};"
+                )
+            )
+            return
+
+        # A partitioned table cannot be indexed concurrently, its partitions can: the
+        # index of the table is valid once those of all partitions are attached
+        connection.execute(
+            text(f"CREATE INDEX {build_name} ON ONLY document_chunk {using};")
+        )
+        partitions = (
+            connection.execute(
+                text(
+                    "SELECT inhrelid::regclass::text FROM pg_inherits "
+                    "WHERE inhparent = 'document_chunk'::regclass ORDER BY 1"
+                )
+            )
+            .scalars()
+            .all()
+        )
+        for number, partition in enumerate(partitions):
+            partition_index = f"{build_name}_p{number}"
+            connection.execute(
+                text(
+                    f"CREATE INDEX CONCURRENTLY {partition_index} ON {partition} {using};"
+                )
+            )
+            connection.execute(
+                text(f"ALTER INDEX {build_name} ATTACH PARTITION {partition_index};")
+            )
+
+    def get_search_settings(self) -> List[str]:
+        """SET LOCAL statements run before a search, for the indexes in use. Settings of
+        a method without an index are ignored by PostgreSQL."""
+        settings = []
+        if "hnsw" in self.index_methods:
+            version = tuple(
+                int(part) for part in (self.extension_version or "0").split(".")[:2]
+            )
+            if version >= (0, 8) and PGVECTOR_HNSW_ITERATIVE_SCAN in (
+                "relaxed_order",
+                "strict_order",
+            ):
+                settings.append(
+                    f"SET LOCAL hnsw.iterative_scan = {PGVECTOR_HNSW_ITERATIVE_SCAN}"
+                )
+        if "ivfflat" in self.index_methods:
+            settings.append(f"SET LOCAL ivfflat.probes = {PGVECTOR_IVFFLAT_PROBES}")
+        return settings
+
+    def _search_setting_statements(self, limit: Optional[int]) -> List[str]:
+        statements = list(self.search_settings)
+        if "hnsw" in self.index_methods:
+            # The index returns at most ef_search rows per query vector (up to 1000)
+            ef_search = min(max(PGVECTOR_HNSW_EF_SEARCH, limit or 0), 1000)
+            statements.append(f"SET LOCAL hnsw.ef_search = {ef_search}")
+        return statements
+
+    def _create_async_engine(self):
+        """
+        Engine for the async methods, using asyncpg. Without asyncpg installed the
+        async methods fall back to running the sync methods in a worker thread.
+        """
+        try:
+            import asyncpg  # noqa: F401
+            from sqlalchemy.ext.asyncio import create_async_engine
+        except ImportError:
+            log.info("asyncpg is not installed, pgvector async methods use threads")
+            return None
+
+        from open_webui.internal.db import engine as db_engine
+
+        url = make_url(PGVECTOR_DB_URL) if PGVECTOR_DB_URL else db_engine.url
+        query = dict(url.query)
+        connect_args = {}
+        # asyncpg takes "ssl" instead of libpq's "sslmode"
+        if "sslmode" in query:
+            connect_args["ssl"] = query.pop("sslmode")
+
+        try:
+            async_engine = create_async_engine(
+                url.set(drivername="postgresql+asyncpg", query=query),
+                pool_pre_ping=True,
+                connect_args=connect_args,
+            )
+        except Exception as e:
+            log.warning(f"Could not create async engine, using threads: {e}")
+            return None
+
+        # Vectors are exchanged in their text format, as with psycopg2
+        return async_engine
+
     def check_vector_length(self) -> None:
         """
         Check if the VECTOR_LENGTH matches the existing vector column dimension in the database.
@@ -145,63 +544,203 @@ class PgvectorClient(VectorDBBase):
             vector = vector[:VECTOR_LENGTH]
         return vector
 
+    def _write_batches(self, rows: List[dict], batch_size: int, write) -> None:
+        """Write rows in batches, committing every PGVECTOR_COMMIT_BATCH_SIZE rows
+        (or once at the end). Rolls back the uncommitted batches on failure."""
+        try:
+            uncommitted = 0
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i : i + batch_size]
+                write(batch)
+                uncommitted += len(batch)
+                if (
+                    PGVECTOR_COMMIT_BATCH_SIZE
+                    and uncommitted >= PGVECTOR_COMMIT_BATCH_SIZE
+                ):
+                    self.session.commit()
+                    uncommitted = 0
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def _copy_rows(self, rows: List[dict]) -> None:
+        # COPY runs on the connection of the session, within its transaction
+        cursor = self.session.connection().connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):
+                cursor.copy_expert(COPY_STATEMENT, io.BytesIO(encode_copy_rows(rows)))
+                return
+        finally:
+            cursor.close()
+
+        # Drivers other than psycopg2
+        self.session.execute(pg_insert(DocumentChunk), rows)
+
     def insert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
-            new_items = []
-            for item in items:
-                vector = self.adjust_vector_length(item["vector"])
-                new_chunk = DocumentChunk(
-                    id=item["id"],
-                    vector=vector,
-                    collection_name=collection_name,
-                    text=item["text"],
-                    vmetadata=item["metadata"],
+            self._write_batches(
+                self._to_rows(collection_name, items),
+                PGVECTOR_INSERT_BATCH_SIZE,
+                self._copy_rows,
+            )
+            log.info(
+                f"Inserted {len(items)} items into collection '{collection_name}'."
+            )
+        except Exception as e:
+            log.exception(f"Error during insert: {e}")
+            raise
+
+    def _to_rows(self, collection_name: str, items: List[VectorItem]) -> List[dict]:
+        return [
+            {
+                "id": item["id"],
+                "vector": self.adjust_vector_length(item["vector"]),
+                "collection_name": collection_name,
+                "text": item["text"],
+                "vmetadata": item["metadata"],
+            }
+            for item in items
+        ]
+
+    def _upsert_statement(self):
+        stmt = pg_insert(DocumentChunk)
+        return stmt.on_conflict_do_update(
+            # The primary key of a partitioned table includes the partition key
+            index_elements=(
+                [DocumentChunk.id, DocumentChunk.collection_name]
+                if self.partitioned
+                else [DocumentChunk.id]
+            ),
+            set_={
+                "vector": stmt.excluded.vector,
+                "collection_name": stmt.excluded.collection_name,
+                "text": stmt.excluded.text,
+                "vmetadata": stmt.excluded.vmetadata,
+            },
+        )
+
+    def _to_upsert_rows(
+        self, collection_name: str, items: List[VectorItem]
+    ) -> List[dict]:
+        # ON CONFLICT cannot update the same row twice in one statement, keep the
+        # last item of each id
+        rows = {row["id"]: row for row in self._to_rows(collection_name, items)}
+        return list(rows.values())
+
+    async def ainsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        if self.async_engine is None:
+            return await super().ainsert(collection_name, items)
+
+        try:
+            async with self.async_engine.begin() as conn:
+                await conn.execute(
+                    pg_insert(DocumentChunk), self._to_rows(collection_name, items)
                 )
-                new_items.append(new_chunk)
-            self.session.bulk_save_objects(new_items)
-            self.session.commit()
             log.info(
-                f"Inserted {len(new_items)} items into collection '{collection_name}'."
+                f"Inserted {len(items)} items into collection '{collection_name}'."
             )
         except Exception as e:
-            self.session.rollback()
             log.exception(f"Error during insert: {e}")
             raise
 
+    async def aupsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        if self.async_engine is None:
+            return await super().aupsert(collection_name, items)
+
+        try:
+            stmt = self._upsert_statement()
+            rows = self._to_upsert_rows(collection_name, items)
+            async with self.async_engine.begin() as conn:
+                for i in range(0, len(rows), PGVECTOR_UPSERT_BATCH_SIZE):
+                    await conn.execute(stmt, rows[i : i + PGVECTOR_UPSERT_BATCH_SIZE])
+            log.info(
+                f"Upserted {len(items)} items into collection '{collection_name}'."
+            )
+        except Exception as e:
+            log.exception(f"Error during upsert: {e}")
+            raise
+
     def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
-            for item in items:
-                vector = self.adjust_vector_length(item["vector"])
-                existing = (
-                    self.session.query(DocumentChunk)
-                    .filter(DocumentChunk.id == item["id"])
-                    .first()
-                )
-                if existing:
-                    existing.vector = vector
-                    existing.text = item["text"]
-                    existing.vmetadata = item["metadata"]
-                    existing.collection_name = (
-                        collection_name  # Update collection_name if necessary
-                    )
-                else:
-                    new_chunk = DocumentChunk(
-                        id=item["id"],
-                        vector=vector,
-                        collection_name=collection_name,
-                        text=item["text"],
-                        vmetadata=item["metadata"],
-                    )
-                    self.session.add(new_chunk)
-            self.session.commit()
+            stmt = self._upsert_statement()
+            self._write_batches(
+                self._to_upsert_rows(collection_name, items),
+                PGVECTOR_UPSERT_BATCH_SIZE,
+                lambda batch: self.session.execute(stmt, batch),
+            )
             log.info(
                 f"Upserted {len(items)} items into collection '{collection_name}'."
             )
         except Exception as e:
-            self.session.rollback()
             log.exception(f"Error during upsert: {e}")
             raise
 
+    def _search_statement(
+        self, collection_name: str, vectors: List[List[float]], limit: Optional[int]
+    ):
+        def vector_expr(vector):
+            return cast(array(vector), Vector(VECTOR_LENGTH))
+
+        # Create the values for query vectors
+        qid_col = column("qid", Integer)
+        q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
+        query_vectors = (
+            values(qid_col, q_vector_col)
+            .data([(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)])
+            .alias("query_vectors")
+        )
+
+        # Build the lateral subquery for each query vector
+        subq = (
+            select(
+                DocumentChunk.id,
+                DocumentChunk.text,
+                DocumentChunk.vmetadata,
+                (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
+                    "distance"
+                ),
+            )
+            .where(DocumentChunk.collection_name == collection_name)
+            .order_by((DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)))
+        )
+        if limit is not None:
+            subq = subq.limit(limit)
+        subq = subq.lateral("result")
+
+        # Build the main query by joining query_vectors and the lateral subquery
+        return (
+            select(
+                query_vectors.c.qid,
+                subq.c.id,
+                subq.c.text,
+                subq.c.vmetadata,
+                subq.c.distance,
+            )
+            .select_from(query_vectors)
+            .join(subq, true())
+            .order_by(query_vectors.c.qid, subq.c.distance)
+        )
+
+    def _to_search_result(self, results, num_queries: int) -> SearchResult:
+        ids = [[] for _ in range(num_queries)]
+        distances = [[] for _ in range(num_queries)]
+        documents = [[] for _ in range(num_queries)]
+        metadatas = [[] for _ in range(num_queries)]
+
+        for row in results:
+            qid = int(row.qid)
+            ids[qid].append(row.id)
+            # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
+            # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
+            distances[qid].append((2.0 - row.distance) / 2.0)
+            documents[qid].append(row.text)
+            metadatas[qid].append(row.vmetadata)
+
+        return SearchResult(
+            ids=ids, distances=distances, documents=documents, metadatas=metadatas
+        )
+
     def search(
         self,
         collection_name: str,
@@ -214,115 +753,92 @@ class PgvectorClient(VectorDBBase):
 
             # Adjust query vectors to VECTOR_LENGTH
             vectors = [self.adjust_vector_length(vector) for vector in vectors]
-            num_queries = len(vectors)
-
-            def vector_expr(vector):
-                return cast(array(vector), Vector(VECTOR_LENGTH))
-
-            # Create the values for query vectors
-            qid_col = column("qid", Integer)
-            q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
-            query_vectors = (
-                values(qid_col, q_vector_col)
-                .data(
-                    [(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)]
-                )
-                .alias("query_vectors")
-            )
-
-            # Build the lateral subquery for each query vector
-            subq = (
-                select(
-                    DocumentChunk.id,
-                    DocumentChunk.text,
-                    DocumentChunk.vmetadata,
-                    (
-                        DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)
-                    ).label("distance"),
-                )
-                .where(DocumentChunk.collection_name == collection_name)
-                .order_by(
-                    (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
-                )
-            )
-            if limit is not None:
-                subq = subq.limit(limit)
-            subq = subq.lateral("result")
-
-            # Build the main query by joining query_vectors and the lateral subquery
-            stmt = (
-                select(
-                    query_vectors.c.qid,
-                    subq.c.id,
-                    subq.c.text,
-                    subq.c.vmetadata,
-                    subq.c.distance,
-                )
-                .select_from(query_vectors)
-                .join(subq, true())
-                .order_by(query_vectors.c.qid, subq.c.distance)
-            )
 
-            result_proxy = self.session.execute(stmt)
-            results = result_proxy.all()
+            for statement in self._search_setting_statements(limit):
+                self.session.execute(text(statement))
 
-            ids = [[] for _ in range(num_queries)]
-            distances = [[] for _ in range(num_queries)]
-            documents = [[] for _ in range(num_queries)]
-            metadatas = [[] for _ in range(num_queries)]
+            stmt = self._search_statement(collection_name, vectors, limit)
+            results = self.session.execute(stmt).all()
+            return self._to_search_result(results, len(vectors))
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during search: {e}")
+            return None
 
-            if not results:
-                return SearchResult(
-                    ids=ids,
-                    distances=distances,
-                    documents=documents,
-                    metadatas=metadatas,
-                )
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: List[List[float]],
+        limit: Optional[int] = None,
+    ) -> Optional[SearchResult]:
+        if self.async_engine is None:
+            return await super().asearch(collection_name, vectors, limit)
 
-            for row in results:
-                qid = int(row.qid)
-                ids[qid].append(row.id)
-                # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
-                # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
-                distances[qid].append((2.0 - row.distance) / 2.0)
-                documents[qid].append(row.text)
-                metadatas[qid].append(row.vmetadata)
+        try:
+            if not vectors:
+                return None
 
-            return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
-            )
+            vectors = [self.adjust_vector_length(vector) for vector in vectors]
+
+            stmt = self._search_statement(collection_name, vectors, limit)
+            async with self.async_engine.begin() as conn:
+                for statement in self._search_setting_statements(limit):
+                    await conn.execute(text(statement))
+                results = (await conn.execute(stmt)).all()
+            return self._to_search_result(results, len(vectors))
         except Exception as e:
             log.exception(f"Error during search: {e}")
             return None
 
-    def query(
-        self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
-    ) -> Optional[GetResult]:
-        try:
-            query = self.session.query(DocumentChunk).filter(
-                DocumentChunk.collection_name == collection_name
-            )
+    def _query_statement(
+        self, collection_name: str, filter: Dict[str, Any], limit: Optional[int]
+    ):
+        stmt = select(
+            DocumentChunk.id, DocumentChunk.text, DocumentChunk.vmetadata
+        ).where(DocumentChunk.collection_name == collection_name)
 
-            for key, value in filter.items():
-                query = query.filter(DocumentChunk.vmetadata[key].astext == str(value))
+        for key, value in filter.items():
+            stmt = stmt.where(DocumentChunk.vmetadata[key].astext == str(value))
 
-            if limit is not None:
-                query = query.limit(limit)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return stmt
 
-            results = query.all()
+    def _to_get_result(self, results) -> Optional[GetResult]:
+        if not results:
+            return None
 
-            if not results:
-                return None
+        ids = [[result.id for result in results]]
+        documents = [[result.text for result in results]]
+        metadatas = [[result.vmetadata for result in results]]
 
-            ids = [[result.id for result in results]]
-            documents = [[result.text for result in results]]
-            metadatas = [[result.vmetadata for result in results]]
+        return GetResult(
+            ids=ids,
+            documents=documents,
+            metadatas=metadatas,
+        )
 
-            return GetResult(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas,
-            )
+    def query(
+        self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        try:
+            stmt = self._query_statement(collection_name, filter, limit)
+            return self._to_get_result(self.session.execute(stmt).all())
+        except Exception as e:
+            log.exception(f"Error during query: {e}")
+            return None
+
+    async def aquery(
+        self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if self.async_engine is None:
+            return await super().aquery(collection_name, filter, limit)
+
+        try:
+            stmt = self._query_statement(collection_name, filter, limit)
+            async with self.async_engine.connect() as conn:
+                results = (await conn.execute(stmt)).all()
+            return self._to_get_result(results)
         except Exception as e:
             log.exception(f"Error during query: {e}")
             return None
@@ -351,6 +867,48 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during get: {e}")
             return None
 
+    def count(self, collection_name: str) -> Optional[int]:
+        try:
+            return (
+                self.session.query(DocumentChunk)
+                .filter(DocumentChunk.collection_name == collection_name)
+                .count()
+            )
+        except Exception as e:
+            log.exception(f"Error during count: {e}")
+            return None
+
+    def get_ids(self, collection_name: str) -> Optional[List[str]]:
+        try:
+            results = (
+                self.session.query(DocumentChunk.id)
+                .filter(DocumentChunk.collection_name == collection_name)
+                .all()
+            )
+            return [result.id for result in results]
+        except Exception as e:
+            log.exception(f"Error during get_ids: {e}")
+            return None
+
+    def get_vectors(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, List[float]]:
+        try:
+            results = (
+                self.session.query(DocumentChunk.id, DocumentChunk.vector)
+                .filter(DocumentChunk.collection_name == collection_name)
+                .filter(DocumentChunk.id.in_(ids))
+                .all()
+            )
+            return {
+                result.id: list(result.vector)
+                for result in results
+                if result.vector is not None
+            }
+        except Exception as e:
+            log.exception(f"Error during get_vectors: {e}")
+            return {}
+
     def delete(
         self,
         collection_name: str,
@@ -376,6 +934,60 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during delete: {e}")
             raise
 
+    def replace_collection(
+        self, collection_name: str, source_collection_name: str
+    ) -> None:
+        # Both statements run in one transaction, so searches see either collection
+        try:
+            self.session.query(DocumentChunk).filter(
+                DocumentChunk.collection_name == collection_name
+            ).delete(synchronize_session=False)
+            moved = (
+                self.session.query(DocumentChunk)
+                .filter(DocumentChunk.collection_name == source_collection_name)
+                .update(
+                    {DocumentChunk.collection_name: collection_name},
+                    synchronize_session=False,
+                )
+            )
+            self.session.commit()
+            log.info(
+                f"Replaced collection '{collection_name}' with {moved} items from '{source_collection_name}'."
+            )
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during replace_collection: {e}")
+            raise
+
+    async def adelete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if self.async_engine is None:
+            return await super().adelete(collection_name, ids, filter)
+
+        try:
+            stmt = delete(DocumentChunk).where(
+                DocumentChunk.collection_name == collection_name
+            )
+            if ids:
+                stmt = stmt.where(DocumentChunk.id.in_(ids))
+            if filter:
+                for key, value in filter.items():
+                    stmt = stmt.where(DocumentChunk.vmetadata[key].astext == str(value))
+            async with self.async_engine.begin() as conn:
+                deleted = (await conn.execute(stmt)).rowcount
+            log.info(f"Deleted {deleted} items from collection '{collection_name}'.")
+        except Exception as e:
+            log.exception(f"Error during delete: {e}")
+            raise
+
+    async def adelete_collection(self, collection_name: str) -> None:
+        await self.adelete(collection_name)
+        log.info(f"Collection '{collection_name}' deleted.")
+
     def reset(self) -> None:
         try:
             deleted = self.session.query(DocumentChunk).delete()
@@ -2,7 +2,7 @@ from typing import Optional
 import logging
 from urllib.parse import urlparse
 
-from qdrant_client import QdrantClient as Qclient
+from qdrant_client import AsyncQdrantClient, QdrantClient as Qclient
 from qdrant_client.http.models import PointStruct
 from qdrant_client.models import models
 
@@ -28,6 +28,8 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
 class QdrantClient(VectorDBBase):
+    supports_replace_collection = True
+
     def __init__(self):
         self.collection_prefix = "open-webui"
         self.QDRANT_URI = QDRANT_URI
@@ -38,6 +40,7 @@ class QdrantClient(VectorDBBase):
 
         if not self.QDRANT_URI:
             self.client = None
+            self.aclient = None
             return
 
         # Unified handling for either scheme
@@ -45,16 +48,20 @@ class QdrantClient(VectorDBBase):
         host = parsed.hostname or self.QDRANT_URI
         http_port = parsed.port or 6333  # default REST port
 
+        # The async client serves the async methods, without blocking the event loop
         if self.PREFER_GRPC:
-            self.client = Qclient(
-                host=host,
-                port=http_port,
-                grpc_port=self.GRPC_PORT,
-                prefer_grpc=self.PREFER_GRPC,
-                api_key=self.QDRANT_API_KEY,
-            )
+            client_args = {
+                "host": host,
+                "port": http_port,
+                "grpc_port": self.GRPC_PORT,
+                "prefer_grpc": self.PREFER_GRPC,
+                "api_key": self.QDRANT_API_KEY,
+            }
         else:
-            self.client = Qclient(url=self.QDRANT_URI, api_key=self.QDRANT_API_KEY)
+            client_args = {"url": self.QDRANT_URI, "api_key": self.QDRANT_API_KEY}
+
+        self.client = Qclient(**client_args)
+        self.aclient = AsyncQdrantClient(**client_args)
 
     def _result_to_get_result(self, points) -> GetResult:
         ids = []
@@ -104,15 +111,82 @@ class QdrantClient(VectorDBBase):
             for item in items
         ]
 
+    def _create_query_filter(self, filter: dict) -> models.Filter:
+        field_conditions = []
+        for key, value in filter.items():
+            field_conditions.append(
+                models.FieldCondition(
+                    key=f"metadata.{key}", match=models.MatchValue(value=value)
+                )
+            )
+        return models.Filter(should=field_conditions)
+
+    def _create_delete_selector(
+        self, ids: Optional[list[str]], filter: Optional[dict]
+    ) -> models.FilterSelector:
+        field_conditions = []
+
+        if ids:
+            for id_value in ids:
+                field_conditions.append(
+                    models.FieldCondition(
+                        key="metadata.id",
+                        match=models.MatchValue(value=id_value),
+                    ),
+                ),
+        elif filter:
+            for key, value in filter.items():
+                field_conditions.append(
+                    models.FieldCondition(
+                        key=f"metadata.{key}",
+                        match=models.MatchValue(value=value),
+                    ),
+                ),
+
+        return models.FilterSelector(filter=models.Filter(must=field_conditions))
+
+    def _get_aliased_collection(self, name: str) -> Optional[str]:
+        # A collection that was replaced is an alias of the collection swapped in
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == name:
+                return alias.collection_name
+        return None
+
+    async def _aget_aliased_collection(self, name: str) -> Optional[str]:
+        for alias in (await self.aclient.get_aliases()).aliases:
+            if alias.alias_name == name:
+                return alias.collection_name
+        return None
+
+    def _delete_alias_operation(self, name: str):
+        return models.DeleteAliasOperation(
+            delete_alias=models.DeleteAlias(alias_name=name)
+        )
+
     def has_collection(self, collection_name: str) -> bool:
-        return self.client.collection_exists(
-            f"{self.collection_prefix}_{collection_name}"
+        name = f"{self.collection_prefix}_{collection_name}"
+        return (
+            self.client.collection_exists(name)
+            or self._get_aliased_collection(name) is not None
+        )
+
+    async def _ahas_collection(self, collection_name: str) -> bool:
+        name = f"{self.collection_prefix}_{collection_name}"
+        return (
+            await self.aclient.collection_exists(name)
+            or await self._aget_aliased_collection(name) is not None
         )
 
     def delete_collection(self, collection_name: str):
-        return self.client.delete_collection(
-            collection_name=f"{self.collection_prefix}_{collection_name}"
+        name = f"{self.collection_prefix}_{collection_name}"
+        aliased_collection = self._get_aliased_collection(name)
+        if aliased_collection is None:
+            return self.client.delete_collection(collection_name=name)
+
+        self.client.update_collection_aliases(
+            change_aliases_operations=[self._delete_alias_operation(name)]
         )
+        return self.client.delete_collection(collection_name=aliased_collection)
 
     def search(
         self, collection_name: str, vectors: list[list[float | int]], limit: int
@@ -143,17 +217,9 @@ class QdrantClient(VectorDBBase):
             if limit is None:
                 limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
 
-            field_conditions = []
-            for key, value in filter.items():
-                field_conditions.append(
-                    models.FieldCondition(
-                        key=f"metadata.{key}", match=models.MatchValue(value=value)
-                    )
-                )
-
             points = self.client.query_points(
                 collection_name=f"{self.collection_prefix}_{collection_name}",
-                query_filter=models.Filter(should=field_conditions),
+                query_filter=self._create_query_filter(filter),
                 limit=limit,
             )
             return self._result_to_get_result(points.points)
@@ -169,6 +235,77 @@ class QdrantClient(VectorDBBase):
         )
         return self._result_to_get_result(points.points)
 
+    def count(self, collection_name: str) -> Optional[int]:
+        # Count the points in the collection without fetching them.
+        try:
+            return self.client.count(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                exact=True,
+            ).count
+        except Exception as e:
+            log.exception(f"Error counting points of '{collection_name}': {e}")
+            return None
+
+    def get_ids(self, collection_name: str) -> Optional[list[str]]:
+        # Get the ids of all points in the collection, without payloads or vectors.
+        try:
+            points, _ = self.client.scroll(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                limit=NO_LIMIT,
+                with_payload=False,
+                with_vectors=False,
+            )
+            return [str(point.id) for point in points]
+        except Exception as e:
+            log.exception(f"Error getting ids of '{collection_name}': {e}")
+            return None
+
+    def get_vectors(self, collection_name: str, ids: list[str]) -> dict:
+        # Get the stored vectors of the given points.
+        try:
+            points = self.client.retrieve(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                ids=ids,
+                with_payload=False,
+                with_vectors=True,
+            )
+            return {str(point.id): point.vector for point in points if point.vector}
+        except Exception as e:
+            log.exception(f"Error getting vectors from '{collection_name}': {e}")
+            return {}
+
+    def replace_collection(self, collection_name: str, source_collection_name: str):
+        # Point the collection name at the source collection with an alias, switched in
+        # a single request, so searches never see a missing or partial collection. The
+        # source collection lives on under its own name, callers must not reuse it.
+        source = f"{self.collection_prefix}_{source_collection_name}"
+        target = f"{self.collection_prefix}_{collection_name}"
+
+        if not self.client.collection_exists(source):
+            raise ValueError(f"Collection {source} does not exist")
+
+        previous = self._get_aliased_collection(target)
+        operations = []
+        if previous is not None:
+            operations.append(self._delete_alias_operation(target))
+        elif self.client.collection_exists(target):
+            # Replaced for the first time: an alias cannot have the name of a
+            # collection, so the collection is missing until the alias is created
+            self.client.delete_collection(collection_name=target)
+
+        operations.append(
+            models.CreateAliasOperation(
+                create_alias=models.CreateAlias(
+                    collection_name=source, alias_name=target
+                )
+            )
+        )
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+
+        if previous is not None and previous != source:
+            self.client.delete_collection(collection_name=previous)
+        log.info(f"collection {target} now points to {source}")
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         self._create_collection_if_not_exists(collection_name, len(items[0]["vector"]))
@@ -188,31 +325,101 @@ class QdrantClient(VectorDBBase):
         filter: Optional[dict] = None,
     ):
         # Delete the items from the collection based on the ids.
-        field_conditions = []
+        return self.client.delete(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            points_selector=self._create_delete_selector(ids, filter),
+        )
 
-        if ids:
-            for id_value in ids:
-                field_conditions.append(
-                    models.FieldCondition(
-                        key="metadata.id",
-                        match=models.MatchValue(value=id_value),
-                    ),
-                ),
-        elif filter:
-            for key, value in filter.items():
-                field_conditions.append(
-                    models.FieldCondition(
-                        key=f"metadata.{key}",
-                        match=models.MatchValue(value=value),
-                    ),
+    async def _acreate_collection_if_not_exists(self, collection_name, dimension):
+        collection_name_with_prefix = f"{self.collection_prefix}_{collection_name}"
+        if not await self._ahas_collection(collection_name):
+            await self.aclient.create_collection(
+                collection_name=collection_name_with_prefix,
+                vectors_config=models.VectorParams(
+                    size=dimension,
+                    distance=models.Distance.COSINE,
+                    on_disk=self.QDRANT_ON_DISK,
                 ),
+            )
+            log.info(f"collection {collection_name_with_prefix} successfully created!")
 
-        return self.client.delete(
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        if limit is None:
+            limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+        query_response = await self.aclient.query_points(
             collection_name=f"{self.collection_prefix}_{collection_name}",
-            points_selector=models.FilterSelector(
-                filter=models.Filter(must=field_conditions)
-            ),
+            query=vectors[0],
+            limit=limit,
+        )
+        get_result = self._result_to_get_result(query_response.points)
+        return SearchResult(
+            ids=get_result.ids,
+            documents=get_result.documents,
+            metadatas=get_result.metadatas,
+            # qdrant distance is [-1, 1], normalize to [0, 1]
+            distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
+        )
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ):
+        collection_name_with_prefix = f"{self.collection_prefix}_{collection_name}"
+        if not await self._ahas_collection(collection_name):
+            return None
+        try:
+            if limit is None:
+                limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+            points = await self.aclient.query_points(
+                collection_name=collection_name_with_prefix,
+                query_filter=self._create_query_filter(filter),
+                limit=limit,
+            )
+            return self._result_to_get_result(points.points)
+        except Exception as e:
+            log.exception(f"Error querying a collection '{collection_name}': {e}")
+            return None
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        await self._acreate_collection_if_not_exists(
+            collection_name, len(items[0]["vector"])
+        )
+        await self.aclient.upsert(
+            f"{self.collection_prefix}_{collection_name}", self._create_points(items)
+        )
+
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        await self._acreate_collection_if_not_exists(
+            collection_name, len(items[0]["vector"])
+        )
+        return await self.aclient.upsert(
+            f"{self.collection_prefix}_{collection_name}", self._create_points(items)
+        )
+
+    async def adelete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        return await self.aclient.delete(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            points_selector=self._create_delete_selector(ids, filter),
+        )
+
+    async def adelete_collection(self, collection_name: str):
+        name = f"{self.collection_prefix}_{collection_name}"
+        aliased_collection = await self._aget_aliased_collection(name)
+        if aliased_collection is None:
+            return await self.aclient.delete_collection(collection_name=name)
+
+        await self.aclient.update_collection_aliases(
+            change_aliases_operations=[self._delete_alias_operation(name)]
         )
+        return await self.aclient.delete_collection(collection_name=aliased_collection)
 
     def reset(self):
         # Resets the database. This will delete all collections and item entries.
@@ -1,3 +1,4 @@
+import asyncio
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Union
@@ -29,8 +30,16 @@ class VectorDBBase(ABC):
 
     Any custom vector database integration must inherit from this class and
     implement all abstract methods.
+
+    The async variants (asearch, aquery, ainsert, aupsert, adelete, ...) are for
+    callers on the event loop. By default they run the sync methods in a worker
+    thread; backends with an async client override them with native implementations.
     """
 
+    # Whether the backend implements replace_collection, so a collection can be rebuilt
+    # next to the live one and swapped in
+    supports_replace_collection: bool = False
+
     @abstractmethod
     def has_collection(self, collection_name: str) -> bool:
         """Check if the collection exists in the vector DB."""
@@ -70,6 +79,45 @@ class VectorDBBase(ABC):
         """Retrieve all vectors from a collection."""
         pass
 
+    def count(self, collection_name: str) -> Optional[int]:
+        """Count the items in a collection, e.g. to check that a derived index (BM25) is
+        complete without fetching every item.
+
+        Backends that do not support this return None.
+        """
+        return None
+
+    def get_ids(self, collection_name: str) -> Optional[List[str]]:
+        """Retrieve the IDs of all items in a collection, without their documents or
+        vectors, e.g. to check that a derived index (BM25) has the same items.
+
+        Backends that do not support this return None.
+        """
+        return None
+
+    def get_vectors(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, List[float]]:
+        """Retrieve the stored vectors of items by ID.
+
+        Backends that do not support this return an empty dict, callers then have
+        to embed the documents again.
+        """
+        return {}
+
+    def replace_collection(
+        self, collection_name: str, source_collection_name: str
+    ) -> None:
+        """Replace the items of a collection with those of the source collection,
+        which is removed (or becomes the collection). Used to swap in a collection that
+        was rebuilt next to it; searches must keep finding either collection meanwhile.
+
+        Only available on backends with `supports_replace_collection`.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support replace_collection"
+        )
+
     @abstractmethod
     def delete(
         self,
@@ -84,3 +132,48 @@ class VectorDBBase(ABC):
     def reset(self) -> None:
         """Reset the vector database by removing all collections or those matching a condition."""
         pass
+
+    async def adelete_collection(self, collection_name: str) -> None:
+        """Delete a collection from the vector DB without blocking the event loop."""
+        return await asyncio.to_thread(
+            self.delete_collection, collection_name=collection_name
+        )
+
+    async def ainsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        """Insert a list of vector items into a collection without blocking the event loop."""
+        return await asyncio.to_thread(
+            self.insert, collection_name=collection_name, items=items
+        )
+
+    async def aupsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        """Insert or update vector items without blocking the event loop."""
+        return await asyncio.to_thread(
+            self.upsert, collection_name=collection_name, items=items
+        )
+
+    async def asearch(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        """Search for similar vectors without blocking the event loop."""
+        return await asyncio.to_thread(
+            self.search, collection_name=collection_name, vectors=vectors, limit=limit
+        )
+
+    async def aquery(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        """Query vectors by metadata filter without blocking the event loop."""
+        return await asyncio.to_thread(
+            self.query, collection_name=collection_name, filter=filter, limit=limit
+        )
+
+    async def adelete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        """Delete vectors by ID or filter without blocking the event loop."""
+        return await asyncio.to_thread(
+            self.delete, collection_name=collection_name, ids=ids, filter=filter
+        )
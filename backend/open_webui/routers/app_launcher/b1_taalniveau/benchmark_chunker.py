@@ -0,0 +1,165 @@
+"""Micro-benchmark for the B1/B2 simplifier chunker.
+
+Compares the per-word tokenizing implementation that was used before with the
+current single-pass chunker on synthetic documents of 1k, 10k and 25k words.
+
+Usage (from the backend directory):
+    python -m open_webui.routers.app_launcher.b1_taalniveau.benchmark_chunker
+"""
+
+import random
+import time
+from typing import List
+
+import tiktoken
+
+from open_webui.routers.app_launcher.b1_taalniveau.chunker import split_into_chunks
+
+WORDS = (
+    "de het een provincie gemeente besluit subsidie aanvraag verordening beleid "
+    "uitvoering maatregelen inwoners betreffende relevant prioriteit verstrekken "
+    "faciliteren implementatie desalniettemin ondernemers Gedeputeerde Staten "
+    "Artikel 3:16 regeling termijn bezwaar beroep toelichting paragraaf"
+).split()
+WORD_COUNTS = [1_000, 10_000, 25_000]
+MAX_CHUNK_TOKENS = 1200
+REPEATS = 3
+
+
+def legacy_split_into_chunks(text: str, max_tokens) -> List[str]:
+    """Split text into chunks of approximately max_tokens"""
+
+    encoding = tiktoken.get_encoding("cl100k_base")
+    paragraphs = text.split("\n")
+    chunks = []
+    current_chunk_parts = []
+    current_length = 0
+
+    for paragraph in paragraphs:
+        if not paragraph.strip():
+            if current_chunk_parts:
+                chunks.append("\n".join(current_chunk_parts))
+                current_chunk_parts = []
+                current_length = 0
+            # Decide whether to keep empty lines as chunks or skip them
+            # Keeping them preserves paragraph structure more accurately
+            chunks.append("")
+            continue
+
+        words = paragraph.split()
+        paragraph_parts = []
+        para_current_length = 0
+
+        for word in words:
+            # Estimate token count; consider caching encoding.encode for performance if needed
+            # Using len(encoding.encode(word)) per word can be slow for very long texts
+            try:
+                word_tokens = len(encoding.encode(word))
+            except Exception:  # Handle potential errors during encoding if needed
+                word_tokens = len(word) // 3  # Rough estimate as fallback
+
+            # Check if adding the next word exceeds max_tokens for the current chunk or paragraph part
+            if (
+                current_length + para_current_length + word_tokens > max_tokens
+                and current_chunk_parts
+            ) or (para_current_length + word_tokens > max_tokens and paragraph_parts):
+                # Finish current chunk if it exists
+                if current_chunk_parts:
+                    chunks.append("\n".join(current_chunk_parts))
+                    current_chunk_parts = []
+                    current_length = 0
+                # Finish current paragraph part if it became a chunk on its own
+                if paragraph_parts:
+                    chunks.append(" ".join(paragraph_parts))
+                    paragraph_parts = [
+                        word
+                    ]  # Start new paragraph part with current word
+                    para_current_length = word_tokens
+                else:  # Word itself is too long or first word of a new chunk
+                    chunks.append(word)
+                    para_current_length = (
+                        0  # Reset para length as this word forms a chunk
+                    )
+            else:
+                paragraph_parts.append(word)
+                para_current_length += word_tokens
+
+        # Add the remaining part of the paragraph to the current chunk
+        if paragraph_parts:
+            paragraph_text = " ".join(paragraph_parts)
+            # Recalculate tokens for the whole paragraph part for accuracy
+            try:
+                paragraph_tokens = len(encoding.encode(paragraph_text))
+            except Exception:
+                paragraph_tokens = len(paragraph_text) // 3  # Fallback estimate
+
+            # Check if adding this paragraph exceeds the limit for the current chunk
+            if current_length + paragraph_tokens > max_tokens and current_chunk_parts:
+                chunks.append("\n".join(current_chunk_parts))
+                current_chunk_parts = [
+                    paragraph_text
+                ]  # Start new chunk with this paragraph
+                current_length = paragraph_tokens
+            else:
+                current_chunk_parts.append(paragraph_text)
+                current_length += paragraph_tokens
+
+    # Add the last remaining chunk
+    if current_chunk_parts:
+        chunks.append("\n".join(current_chunk_parts))
+
+    # Filter out potential None values, though the logic aims to avoid them
+    return [chunk for chunk in chunks if chunk is not None]
+
+
+def make_document(word_count: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    paragraphs = []
+    remaining = word_count
+    while remaining > 0:
+        sentences = []
+        for _ in range(rng.randint(2, 8)):
+            length = min(remaining, rng.randint(6, 25))
+            remaining -= length
+            sentences.append(
+                " ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+            )
+            if remaining <= 0:
+                break
+        paragraphs.append(" ".join(sentences))
+        if rng.random() < 0.3:
+            paragraphs.append("")
+    return "\n".join(paragraphs)
+
+
+def best_of(function, *args) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    # Warm up the encoding caches so neither implementation pays for loading the BPE table
+    split_into_chunks("warm up", MAX_CHUNK_TOKENS)
+    tiktoken.get_encoding("cl100k_base")
+
+    print(
+        f"{'words':>8} {'legacy (s)':>12} {'chunker (s)':>12} {'speedup':>8} {'chunks':>14}"
+    )
+    for word_count in WORD_COUNTS:
+        text = make_document(word_count)
+        legacy_time = best_of(legacy_split_into_chunks, text, MAX_CHUNK_TOKENS)
+        new_time = best_of(split_into_chunks, text, MAX_CHUNK_TOKENS)
+        legacy_chunks = len(legacy_split_into_chunks(text, MAX_CHUNK_TOKENS))
+        new_chunks = len(split_into_chunks(text, MAX_CHUNK_TOKENS))
+        print(
+            f"{word_count:>8} {legacy_time:>12.4f} {new_time:>12.4f} "
+            f"{legacy_time / new_time:>7.1f}x {legacy_chunks:>6} / {new_chunks:<6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+from collections import OrderedDict
+import asyncio
+from typing import List, Optional
+import hashlib
+import json
+import logging
+import os
+import time
+
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+CACHE_ENABLED = os.getenv("versimpelaar_CACHE_ENABLED", "True").lower() == "true"
+CACHE_TTL = int(os.getenv("versimpelaar_CACHE_TTL", 7 * 24 * 60 * 60))  # seconds
+CACHE_MAX_ENTRIES = int(os.getenv("versimpelaar_CACHE_MAX_ENTRIES", 10000))
+
+REDIS_KEY_PREFIX = "open-webui:versimpelaar:cache"
+
+
+def make_cache_key(
+    chunk: str,
+    model: str,
+    language_level: str,
+    preserved_words: List[str],
+    prompt_version: str,
+) -> str:
+    """Content-addressed key for the simplified result of a single chunk"""
+    chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+    key_data = json.dumps(
+        [chunk_hash, model, language_level, sorted(preserved_words), prompt_version],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with TTL, used when no Redis is configured."""
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] < time.time():
+            del self.entries[key]
+            entry = None
+
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def set(self, key: str, value: dict):
+        self.entries[key] = (time.time() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "size": len(self.entries)}
+
+
+class RedisCacheBackend:
+    """Redis cache shared by all workers. Entries expire after the TTL; a sorted set of
+    last-access times is used to evict the least recently used entries beyond max_entries.
+
+    The client is synchronous: SimplificationCache calls it from a worker thread."""
+
+    def __init__(
+        self, redis_url: str, redis_sentinels: list, ttl: int, max_entries: int
+    ):
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.index_key = f"{REDIS_KEY_PREFIX}:lru"
+        self.stats_key = f"{REDIS_KEY_PREFIX}:stats"
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self.redis.get(f"{REDIS_KEY_PREFIX}:{key}")
+
+        pipe = self.redis.pipeline()
+        if value is None:
+            pipe.hincrby(self.stats_key, "misses", 1)
+        else:
+            pipe.hincrby(self.stats_key, "hits", 1)
+            pipe.zadd(self.index_key, {key: time.time()})
+            pipe.expire(f"{REDIS_KEY_PREFIX}:{key}", self.ttl)
+        pipe.execute()
+
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: dict):
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.set(f"{REDIS_KEY_PREFIX}:{key}", json.dumps(value), ex=self.ttl)
+        pipe.zadd(self.index_key, {key: now})
+        # Entries not accessed within the TTL have already expired
+        pipe.zremrangebyscore(self.index_key, 0, now - self.ttl)
+        pipe.zcard(self.index_key)
+        size = pipe.execute()[-1]
+
+        if size > self.max_entries:
+            evicted = self.redis.zpopmin(self.index_key, size - self.max_entries)
+            if evicted:
+                self.redis.delete(*[f"{REDIS_KEY_PREFIX}:{k}" for k, _ in evicted])
+
+    def get_stats(self) -> dict:
+        stats = self.redis.hgetall(self.stats_key)
+        return {
+            "hits": int(stats.get("hits", 0)),
+            "misses": int(stats.get("misses", 0)),
+            "size": self.redis.zcard(self.index_key),
+        }
+
+
+class SimplificationCache:
+    def __init__(self):
+        self.backend = None
+        if CACHE_ENABLED:
+            if REDIS_URL:
+                self.backend = RedisCacheBackend(
+                    REDIS_URL,
+                    get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+                    CACHE_TTL,
+                    CACHE_MAX_ENTRIES,
+                )
+            else:
+                self.backend = MemoryCacheBackend(CACHE_TTL, CACHE_MAX_ENTRIES)
+
+    async def _call(self, method, *args):
+        # Redis round trips must not block the event loop that streams the other chunks
+        if isinstance(self.backend, RedisCacheBackend):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def get(self, key: str) -> Optional[dict]:
+        if self.backend is None:
+            return None
+        try:
+            return await self._call(self.backend.get, key)
+        except Exception as e:
+            # The cache is an optimization only: never fail a simplification because of it
+            log.warning(f"Error reading from simplification cache: {e}")
+            return None
+
+    async def set(self, key: str, value: dict):
+        if self.backend is None:
+            return
+        try:
+            await self._call(self.backend.set, key, value)
+        except Exception as e:
+            log.warning(f"Error writing to simplification cache: {e}")
+
+    async def get_stats(self) -> dict:
+        if self.backend is None:
+            return {"enabled": False}
+
+        backend = "redis" if isinstance(self.backend, RedisCacheBackend) else "memory"
+        try:
+            stats = await self._call(self.backend.get_stats)
+        except Exception as e:
+            log.warning(f"Error reading simplification cache stats: {e}")
+            return {"enabled": True, "backend": backend, "error": str(e)}
+
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "enabled": True,
+            "backend": backend,
+            **stats,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+SIMPLIFICATION_CACHE = SimplificationCache()
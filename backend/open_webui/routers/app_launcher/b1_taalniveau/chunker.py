@@ -0,0 +1,120 @@
+from bisect import bisect_right
+from typing import List, Optional
+import re
+
+import tiktoken
+
+ENCODING_NAME = "cl100k_base"
+
+# Loading the encoding parses the full BPE table, so it is done once per process
+_encoding: Optional[tiktoken.Encoding] = None
+
+# Preferred cut positions inside a paragraph that is too long for a single chunk
+SENTENCE_END_REGEX = re.compile(r'[.!?;:]["\')\]]*\s+')
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+def get_encoding() -> tiktoken.Encoding:
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding(ENCODING_NAME)
+    return _encoding
+
+
+def find_cut(paragraph: str, start: int, limit: int) -> int:
+    """Find the last sentence (or else word) boundary in paragraph[start:limit]
+
+    Whitespace right at limit still counts, as tokens usually start with the space in
+    front of a word: cutting there leaves the token at limit whole for the next part.
+    """
+    endpos = min(limit + 1, len(paragraph))
+    cut = None
+    for match in SENTENCE_END_REGEX.finditer(paragraph, start, endpos):
+        cut = match.end()
+    if cut is None:
+        for match in WHITESPACE_REGEX.finditer(paragraph, start, endpos):
+            cut = match.end()
+    if cut is None or cut <= start:
+        # A single "word" longer than max_tokens: cut on the token boundary itself
+        cut = limit
+    return cut
+
+
+def split_long_paragraph(
+    paragraph: str, tokens: List[int], max_tokens: int
+) -> List[str]:
+    """Split a paragraph of more than max_tokens tokens on sentence boundaries, using token offsets"""
+    encoding = get_encoding()
+    _, offsets = encoding.decode_with_offsets(tokens)
+
+    parts = []
+    start_char = 0
+    start_token = 0
+    while len(tokens) - start_token > max_tokens:
+        # Character position of the first token that no longer fits
+        limit = offsets[start_token + max_tokens]
+        cut = find_cut(paragraph, start_char, limit)
+
+        part = paragraph[start_char:cut].strip()
+        if part:
+            parts.append(part)
+        start_char = cut
+        # Continue at the token containing the cut, which may start with the whitespace
+        # before it: skipping that token would undercount the next part
+        start_token = max(bisect_right(offsets, cut) - 1, start_token + 1)
+
+    remainder = paragraph[start_char:].strip()
+    if remainder:
+        parts.append(remainder)
+    return parts
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of at most max_tokens, cutting on paragraph and sentence boundaries.
+
+    The text is tokenized once (all paragraphs in a single batch call), so the cost is linear
+    in the length of the text. This is CPU bound: call it from a worker thread in async code.
+    """
+    encoding = get_encoding()
+    paragraphs = text.split("\n")
+
+    non_empty_paragraphs = [paragraph for paragraph in paragraphs if paragraph.strip()]
+    encoded_paragraphs = iter(encoding.encode_ordinary_batch(non_empty_paragraphs))
+
+    chunks = []
+    current_chunk_parts = []
+    current_length = 0
+
+    def flush():
+        nonlocal current_chunk_parts, current_length
+        if current_chunk_parts:
+            chunks.append("\n".join(current_chunk_parts))
+            current_chunk_parts = []
+            current_length = 0
+
+    for paragraph in paragraphs:
+        if not paragraph.strip():
+            flush()
+            # Keeping empty lines as chunks preserves the paragraph structure of the output
+            chunks.append("")
+            continue
+
+        tokens = next(encoded_paragraphs)
+        paragraph_text = paragraph.strip()
+        paragraph_tokens = len(tokens)
+
+        if paragraph_tokens > max_tokens:
+            flush()
+            parts = split_long_paragraph(paragraph, tokens, max_tokens)
+            # All parts but the last are full chunks; the last may share a chunk with what follows
+            chunks.extend(parts[:-1])
+            paragraph_text = parts[-1]
+            paragraph_tokens = len(encoding.encode_ordinary(paragraph_text))
+
+        if current_length + paragraph_tokens > max_tokens:
+            flush()
+        current_chunk_parts.append(paragraph_text)
+        current_length += paragraph_tokens
+
+    flush()
+    return chunks
@@ -0,0 +1,229 @@
+from typing import List, Optional
+import asyncio
+import json
+import os
+import time
+
+from redis.exceptions import WatchError
+
+from open_webui.env import REDIS_URL, REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+JOB_TTL = int(os.getenv("versimpelaar_JOB_TTL", 24 * 60 * 60))  # seconds
+JOB_POLL_INTERVAL = 0.5  # seconds between checks for new results while streaming a job
+JOB_HEARTBEAT_INTERVAL = 15  # seconds between heartbeats of a running job
+# A running job without a heartbeat for this long lost its worker (e.g. a restart) and is failed
+JOB_STALE_TIMEOUT = int(os.getenv("versimpelaar_JOB_STALE_TIMEOUT", 120))  # seconds
+
+REDIS_KEY_PREFIX = "open-webui:versimpelaar:job"
+
+
+class JobStatus:
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class MemoryJobStore:
+    """Keeps jobs in the memory of this worker, used when no Redis is configured."""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.jobs: dict[str, dict] = {}
+
+    def _purge_expired(self):
+        now = time.time()
+        for job_id in [
+            job_id for job_id, job in self.jobs.items() if job["expires_at"] < now
+        ]:
+            del self.jobs[job_id]
+
+    def create(self, job: dict):
+        self._purge_expired()
+        self.jobs[job["id"]] = {
+            "job": job,
+            "results": [],
+            "expires_at": time.time() + self.ttl,
+        }
+
+    def get(self, job_id: str) -> Optional[dict]:
+        entry = self.jobs.get(job_id)
+        if entry is None or entry["expires_at"] < time.time():
+            return None
+        return {**entry["job"], "completed_chunks": len(entry["results"])}
+
+    def update(
+        self, job_id: str, expected_status: Optional[str] = None, **fields
+    ) -> bool:
+        entry = self.jobs.get(job_id)
+        if entry is None or (
+            expected_status is not None and entry["job"]["status"] != expected_status
+        ):
+            return False
+        entry["job"].update(fields)
+        return True
+
+    def append_result(self, job_id: str, result: dict):
+        entry = self.jobs.get(job_id)
+        if entry is not None:
+            entry["results"].append(result)
+
+    def get_results(self, job_id: str, offset: int = 0) -> List[dict]:
+        entry = self.jobs.get(job_id)
+        return entry["results"][offset:] if entry is not None else []
+
+
+class RedisJobStore:
+    """Keeps jobs in Redis, so any worker can report on and stream a job. Results are stored
+    in an append-only list in completion order; a client resumes by passing how many it has.
+
+    A job is a hash of JSON encoded fields, so an update only writes its own fields and
+    concurrent updates (heartbeat, cancel, completion) do not overwrite each other."""
+
+    def __init__(self, redis_url: str, redis_sentinels: list, ttl: int):
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+        self.ttl = ttl
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{REDIS_KEY_PREFIX}:{job_id}:state"
+
+    def _results_key(self, job_id: str) -> str:
+        return f"{REDIS_KEY_PREFIX}:{job_id}:results"
+
+    def create(self, job: dict):
+        pipe = self.redis.pipeline()
+        pipe.hset(
+            self._job_key(job["id"]), mapping={k: json.dumps(v) for k, v in job.items()}
+        )
+        pipe.expire(self._job_key(job["id"]), self.ttl)
+        pipe.execute()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        pipe = self.redis.pipeline()
+        pipe.hgetall(self._job_key(job_id))
+        pipe.llen(self._results_key(job_id))
+        job, completed_chunks = pipe.execute()
+        if not job:
+            return None
+        return {
+            **{k: json.loads(v) for k, v in job.items()},
+            "completed_chunks": completed_chunks,
+        }
+
+    def update(
+        self, job_id: str, expected_status: Optional[str] = None, **fields
+    ) -> bool:
+        """Update fields of an existing job. With expected_status only if the job still has that
+        status, checked and written in one transaction, e.g. so a completed job is not failed.
+        """
+        key = self._job_key(job_id)
+        mapping = {k: json.dumps(v) for k, v in fields.items()}
+
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    status = pipe.hget(key, "status")
+                    if status is None or (
+                        expected_status is not None
+                        and json.loads(status) != expected_status
+                    ):
+                        pipe.unwatch()
+                        return False
+
+                    pipe.multi()
+                    pipe.hset(key, mapping=mapping)
+                    pipe.execute()
+                    return True
+                except WatchError:
+                    # Updated in the meantime: check the status again
+                    continue
+
+    def append_result(self, job_id: str, result: dict):
+        pipe = self.redis.pipeline()
+        pipe.rpush(self._results_key(job_id), json.dumps(result))
+        pipe.expire(self._results_key(job_id), self.ttl)
+        pipe.execute()
+
+    def get_results(self, job_id: str, offset: int = 0) -> List[dict]:
+        return [
+            json.loads(r)
+            for r in self.redis.lrange(self._results_key(job_id), offset, -1)
+        ]
+
+
+class JobStore:
+    """Async access to the jobs. The Redis client is synchronous, so its calls run in a worker
+    thread instead of blocking the event loop that serves the streams.
+
+    Running jobs record a heartbeat in `updated_at`. Reading a running job whose heartbeat is
+    older than JOB_STALE_TIMEOUT marks it failed: the worker that ran it is gone, and streams
+    of it would otherwise wait for results forever."""
+
+    def __init__(self, store):
+        self.store = store
+
+    async def _call(self, method, *args, **kwargs):
+        if isinstance(self.store, RedisJobStore):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    async def create(self, job: dict):
+        await self._call(self.store.create, {**job, "updated_at": int(time.time())})
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = await self._call(self.store.get, job_id)
+        if (
+            job is not None
+            and job["status"] == JobStatus.RUNNING
+            and job.get("updated_at", 0) < time.time() - JOB_STALE_TIMEOUT
+        ):
+            error = "The job stopped responding"
+            if await self.update(
+                job_id,
+                expected_status=JobStatus.RUNNING,
+                status=JobStatus.FAILED,
+                error=error,
+            ):
+                job = {**job, "status": JobStatus.FAILED, "error": error}
+            else:
+                # Finished (or failed by another worker) in the meantime
+                job = await self._call(self.store.get, job_id)
+        return job
+
+    async def update(
+        self, job_id: str, expected_status: Optional[str] = None, **fields
+    ) -> bool:
+        return await self._call(
+            self.store.update,
+            job_id,
+            expected_status,
+            **fields,
+            updated_at=int(time.time()),
+        )
+
+    async def heartbeat(self, job_id: str) -> bool:
+        """Mark a running job as alive. False when it is no longer running, e.g. cancelled."""
+        return await self.update(job_id, expected_status=JobStatus.RUNNING)
+
+    async def append_result(self, job_id: str, result: dict):
+        await self._call(self.store.append_result, job_id, result)
+
+    async def get_results(self, job_id: str, offset: int = 0) -> List[dict]:
+        return await self._call(self.store.get_results, job_id, offset)
+
+
+def get_job_store():
+    if REDIS_URL:
+        return RedisJobStore(
+            REDIS_URL,
+            get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+            JOB_TTL,
+        )
+    return MemoryJobStore(JOB_TTL)
+
+
+JOBS = JobStore(get_job_store())
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Request, Depends
+from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from typing import List, Any 
 from pydantic import BaseModel
 import asyncio
+import difflib
+import hashlib
 import json
 import os
+import random
+import time
+from uuid import uuid4
 from open_webui.utils.chat import generate_chat_completion
-from open_webui.utils.auth import get_current_user
-import tiktoken
+from open_webui.utils.auth import get_current_user, get_admin_user
+from open_webui.routers.app_launcher.b1_taalniveau.chunker import split_into_chunks
+from open_webui.routers.app_launcher.b1_taalniveau.cache import SIMPLIFICATION_CACHE, make_cache_key
+from open_webui.routers.app_launcher.b1_taalniveau.jobs import JOBS, JOB_HEARTBEAT_INTERVAL, JOB_POLL_INTERVAL, JobStatus
+from open_webui.tasks import create_task, list_task_ids_by_chat_id, stop_task
 import re
 
 router = APIRouter()
@@ -143,91 +151,184 @@ def build_selection_prompt(language_level, preserved_words_text):
     {selection_example.get('output', '')}
     """
     return "\n".join(line.strip() for line in prompt.splitlines() if line.strip())  # Verwijdert overtollige whitespaces
+
+def get_prompt_version(language_level: str) -> str:
+    """Fingerprint of the prompts for a language level, so cached results are invalidated when the prompts change"""
+    prompts = build_generation_prompt(language_level, "") + build_selection_prompt(language_level, "")
+    return hashlib.sha256(prompts.encode("utf-8")).hexdigest()[:16]
 # --- END: Language Level Specific Prompt Data ---
 
-def split_into_chunks(text: str, max_tokens) -> List[str]:
-    """Split text into chunks of approximately max_tokens"""
-    
-    encoding = tiktoken.get_encoding("cl100k_base")
-    paragraphs = text.split('\n')
-    chunks = []
-    current_chunk_parts = []
-    current_length = 0
-
-    for paragraph in paragraphs:
-        if not paragraph.strip():
-            if current_chunk_parts:
-                chunks.append("\n".join(current_chunk_parts))
-                current_chunk_parts = []
-                current_length = 0
-            # Decide whether to keep empty lines as chunks or skip them
-            # Keeping them preserves paragraph structure more accurately
-            chunks.append("")
-            continue
-
-        words = paragraph.split()
-        paragraph_parts = []
-        para_current_length = 0
-
-        for word in words:
-            # Estimate token count; consider caching encoding.encode for performance if needed
-            # Using len(encoding.encode(word)) per word can be slow for very long texts
-            try:
-                word_tokens = len(encoding.encode(word))
-            except Exception: # Handle potential errors during encoding if needed
-                word_tokens = len(word) // 3 # Rough estimate as fallback
-
-            # Check if adding the next word exceeds max_tokens for the current chunk or paragraph part
-            if (current_length + para_current_length + word_tokens > max_tokens and current_chunk_parts) or \
-               (para_current_length + word_tokens > max_tokens and paragraph_parts):
-                # Finish current chunk if it exists
-                if current_chunk_parts:
-                    chunks.append("\n".join(current_chunk_parts))
-                    current_chunk_parts = []
-                    current_length = 0
-                # Finish current paragraph part if it became a chunk on its own
-                if paragraph_parts:
-                    chunks.append(" ".join(paragraph_parts))
-                    paragraph_parts = [word] # Start new paragraph part with current word
-                    para_current_length = word_tokens
-                else: # Word itself is too long or first word of a new chunk
-                     chunks.append(word)
-                     para_current_length = 0 # Reset para length as this word forms a chunk
-            else:
-                paragraph_parts.append(word)
-                para_current_length += word_tokens
-
-        # Add the remaining part of the paragraph to the current chunk
-        if paragraph_parts:
-            paragraph_text = " ".join(paragraph_parts)
-            # Recalculate tokens for the whole paragraph part for accuracy
-            try:
-                paragraph_tokens = len(encoding.encode(paragraph_text))
-            except Exception:
-                paragraph_tokens = len(paragraph_text) // 3 # Fallback estimate
+# --- START: Concurrency and rate budgeting for LLM calls ---
+# All generation and selection calls of the simplifier go through a limiter per model,
+# so a long document cannot flood the backend with hundreds of simultaneous requests.
+MAX_CONCURRENT_REQUESTS = int(os.getenv('versimpelaar_MAX_CONCURRENT_REQUESTS', 8))
+TOKENS_PER_MINUTE = int(os.getenv('versimpelaar_TOKENS_PER_MINUTE', 0))  # 0 = no token budget
+MAX_RETRIES = int(os.getenv('versimpelaar_MAX_RETRIES', 5))
+RETRY_BASE_DELAY = float(os.getenv('versimpelaar_RETRY_BASE_DELAY', 1.0))
+RETRY_MAX_DELAY = float(os.getenv('versimpelaar_RETRY_MAX_DELAY', 60.0))
 
-            # Check if adding this paragraph exceeds the limit for the current chunk
-            if current_length + paragraph_tokens > max_tokens and current_chunk_parts:
-                 chunks.append("\n".join(current_chunk_parts))
-                 current_chunk_parts = [paragraph_text] # Start new chunk with this paragraph
-                 current_length = paragraph_tokens
-            else:
-                 current_chunk_parts.append(paragraph_text)
-                 current_length += paragraph_tokens
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
 
-    # Add the last remaining chunk
-    if current_chunk_parts:
-        chunks.append("\n".join(current_chunk_parts))
 
-    # Filter out potential None values, though the logic aims to avoid them
-    return [chunk for chunk in chunks if chunk is not None]
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate, used for budgeting only"""
+    return len(text) // 3 + 1
 
 
-async def generate_version(request: Request, chunk: str, model: str, preserved_words: List[str], language_level: str, user: Any, index: int, temperature: float) -> dict:
-    """Generate a single version of simplified text for a specific temperature and return with index and temperature"""
-    if not chunk or chunk.isspace():
-        return {"index": index, "temperature": temperature, "text": chunk, "error": None}
+class ModelRateLimiter:
+    """Limits concurrent calls and token throughput (token bucket) for a single model."""
+
+    def __init__(self, max_concurrent: int, tokens_per_minute: int):
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        self.tokens_per_minute = tokens_per_minute
+        self.available_tokens = float(tokens_per_minute)
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.available_tokens = min(
+            float(self.tokens_per_minute),
+            self.available_tokens + elapsed * self.tokens_per_minute / 60.0,
+        )
+
+    async def acquire_tokens(self, tokens: int):
+        """Wait until the token budget allows a call of the given (estimated) size"""
+        if self.tokens_per_minute <= 0:
+            return
+
+        # A single call larger than the whole budget only waits for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.available_tokens >= tokens:
+                    self.available_tokens -= tokens
+                    return
+                missing = tokens - self.available_tokens
+                await asyncio.sleep(missing * 60.0 / self.tokens_per_minute)
+
+    def pause(self, seconds: float):
+        """Drain the token budget so other calls also back off after a rate limit response"""
+        if self.tokens_per_minute > 0:
+            self._refill()
+            self.available_tokens = min(
+                self.available_tokens,
+                -seconds * self.tokens_per_minute / 60.0,
+            )
+
+
+rate_limiters: dict[str, ModelRateLimiter] = {}
+
+
+def get_rate_limiter(model: str) -> ModelRateLimiter:
+    if model not in rate_limiters:
+        rate_limiters[model] = ModelRateLimiter(MAX_CONCURRENT_REQUESTS, TOKENS_PER_MINUTE)
+    return rate_limiters[model]
+
+
+def get_retry_delay(e: Exception, attempt: int) -> float:
+    """Use the Retry-After header of the backend when present, exponential backoff with jitter otherwise"""
+    retry_after = (getattr(e, "headers", None) or {}).get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    delay = RETRY_BASE_DELAY * (2 ** attempt)
+    return min(delay, RETRY_MAX_DELAY) * random.uniform(0.5, 1.0)
+
+
+async def rate_limited_chat_completion(request: Request, form_data: dict, user: Any) -> dict:
+    """Call generate_chat_completion within the model's limits, retrying on rate limits and server errors"""
+    limiter = get_rate_limiter(form_data["model"])
+    # Prompt plus an answer of roughly the same size as the user content for each requested choice
+    estimated_tokens = sum(estimate_tokens(m.get("content", "")) for m in form_data["messages"])
+    estimated_tokens += estimate_tokens(form_data["messages"][-1].get("content", "")) * form_data.get("n", 1)
+
+    attempt = 0
+    while True:
+        await limiter.acquire_tokens(estimated_tokens)
+        try:
+            async with limiter.semaphore:
+                return await generate_chat_completion(request=request, form_data=form_data, user=user)
+        except HTTPException as e:
+            if e.status_code not in RETRYABLE_STATUS_CODES or attempt >= MAX_RETRIES:
+                raise
+            delay = get_retry_delay(e, attempt)
+            if e.status_code == 429:
+                limiter.pause(delay)
+            attempt += 1
+            print(f"Model {form_data['model']} returned {e.status_code}, retrying in {delay:.1f}s (attempt {attempt}/{MAX_RETRIES})")
+            await asyncio.sleep(delay)
+# --- END: Concurrency and rate budgeting for LLM calls ---
+
+
+# --- START: Adaptive variant count ---
+# Short chunks and chunks that already read at the target level get a single generation without
+# a selection pass, and the selection pass is skipped when all variants are (nearly) the same.
+ADAPTIVE_VARIANTS = os.getenv('versimpelaar_ADAPTIVE_VARIANTS', 'True').lower() == 'true'
+VARIANT_COUNTS = json.loads(os.getenv('versimpelaar_VARIANT_COUNTS', '{"B1": 3, "B2": 3}'))
+DEFAULT_VARIANT_COUNT = 3
+GENERATION_TEMPERATURE = 1.0
+SINGLE_VARIANT_MAX_WORDS = int(os.getenv('versimpelaar_SINGLE_VARIANT_MAX_WORDS', 20))
+VARIANT_SIMILARITY_THRESHOLD = float(os.getenv('versimpelaar_VARIANT_SIMILARITY_THRESHOLD', 0.9))
+# Request all variants of a chunk in one completion call (`n` > 1) when the backend supports it
+BATCHED_VARIANTS = os.getenv('versimpelaar_BATCHED_VARIANTS', 'True').lower() == 'true'
+
+# A text counts as "already at level" when its sentences are short and it has few long words
+READABILITY_THRESHOLDS = {
+    "B1": {"max_words_per_sentence": 12, "max_long_word_ratio": 0.05},
+    "B2": {"max_words_per_sentence": 18, "max_long_word_ratio": 0.10},
+}
+LONG_WORD_LENGTH = 13
+
+
+def get_variant_count(language_level: str) -> int:
+    return max(1, int(VARIANT_COUNTS.get(language_level, DEFAULT_VARIANT_COUNT)))
+
+
+def is_simple_chunk(chunk: str, language_level: str) -> bool:
+    """Cheap check whether a chunk is short, or already reads at the requested level"""
+    words = chunk.split()
+    if len(words) <= SINGLE_VARIANT_MAX_WORDS:
+        return True
+
+    thresholds = READABILITY_THRESHOLDS.get(language_level)
+    if not thresholds:
+        return False
+
+    sentences = [s for s in re.split(r'[.!?]+(?:\s|$)|\n', chunk) if s.strip()]
+    words_per_sentence = len(words) / max(1, len(sentences))
+    long_word_ratio = sum(1 for w in words if len(w.strip('.,;:!?()"\'')) >= LONG_WORD_LENGTH) / len(words)
+    return (
+        words_per_sentence <= thresholds["max_words_per_sentence"]
+        and long_word_ratio <= thresholds["max_long_word_ratio"]
+    )
+
+
+def extract_delimited_text(llm_output: str) -> str:
+    """Return the text between <<< and >>>, or the whole output if the delimiters are missing"""
+    match = re.search(r'<<<([\s\S]*?)>>>', llm_output)
+    return (match.group(1) if match else llm_output).strip()
 
+
+def are_near_identical(texts: List[str]) -> bool:
+    """True when every variant is at least VARIANT_SIMILARITY_THRESHOLD similar (word level) to the first"""
+    first = texts[0].split()
+    for text in texts[1:]:
+        matcher = difflib.SequenceMatcher(None, first, text.split(), autojunk=False)
+        # quick_ratio is an upper bound of ratio and much cheaper: use it to bail out early
+        if matcher.quick_ratio() < VARIANT_SIMILARITY_THRESHOLD or matcher.ratio() < VARIANT_SIMILARITY_THRESHOLD:
+            return False
+    return True
+# --- END: Adaptive variant count ---
+
+
+async def request_versions(request: Request, chunk: str, model: str, preserved_words: List[str], language_level: str, user: Any, index: int, temperature: float, n: int = 1) -> List[dict]:
+    """Request n versions of simplified text in a single completion call, each returned with index and temperature"""
     preserved_words_text = "; ".join(f"'{word}'" for word in preserved_words) if preserved_words else "Geen"
     
     generation_system_prompt = build_generation_prompt(language_level, preserved_words_text)
@@ -247,28 +348,87 @@ async def generate_version(request: Request, chunk: str, model: str, preserved_w
             }
         ]
     }
+    if n > 1:
+        form_data["n"] = n
 
     try:
         # Assuming generate_chat_completion handles potential API errors gracefully
         # and accepts the 'temperature' key in form_data
-        response = await generate_chat_completion(request=request, form_data=form_data, user=user)
-        llm_output = response['choices'][0]['message']['content']
-
-        # --- REMOVED EXTRACTION LOGIC ---
-        # The llm_output now contains the full response, potentially including <<< >>>
-        simplified_text = llm_output.strip()
-        # Optional: Still clean potential markdown code blocks if the model adds them unexpectedly
-        simplified_text = re.sub(r'^```[a-zA-Z]*\n?', '', simplified_text)
-        simplified_text = re.sub(r'\n?```$', '', simplified_text)
-        # --- END REMOVED EXTRACTION LOGIC ---
-
-
-        return {"index": index, "temperature": temperature, "text": simplified_text, "error": None} # Return the full (cleaned) output
+        response = await rate_limited_chat_completion(request=request, form_data=form_data, user=user)
+
+        versions = []
+        for choice in response['choices'][:n]:
+            # The llm_output contains the full response, potentially including <<< >>>
+            simplified_text = choice['message']['content'].strip()
+            # Optional: Still clean potential markdown code blocks if the model adds them unexpectedly
+            simplified_text = re.sub(r'^```[a-zA-Z]*\n?', '', simplified_text)
+            simplified_text = re.sub(r'\n?```$', '', simplified_text)
+            versions.append({"index": index, "temperature": temperature, "text": simplified_text, "error": None}) # Return the full (cleaned) output
+        return versions
     except Exception as e:
         # Log the error for debugging purposes
         print(f"Error processing chunk {index} with model {model} at temperature {temperature}: {e}")
         # Return the original chunk in case of an error to avoid data loss, include temperature and error info
-        return {"index": index, "temperature": temperature, "text": chunk, "error": str(e)}
+        error = {"index": index, "temperature": temperature, "text": chunk, "error": str(e)}
+        if isinstance(e, HTTPException):
+            error["status_code"] = e.status_code
+        return [error]
+
+
+async def generate_version(request: Request, chunk: str, model: str, preserved_words: List[str], language_level: str, user: Any, index: int, temperature: float) -> dict:
+    """Generate a single version of simplified text for a specific temperature and return with index and temperature"""
+    if not chunk or chunk.isspace():
+        return {"index": index, "temperature": temperature, "text": chunk, "error": None}
+
+    versions = await request_versions(request, chunk, model, preserved_words, language_level, user, index, temperature)
+    if not versions:
+        return {"index": index, "temperature": temperature, "text": chunk, "error": "No choices returned by the model."}
+    return versions[0]
+
+
+# Models that answered a request with n > 1 with fewer choices, or rejected it; they get parallel
+# calls from then on
+models_without_multiple_choices: set[str] = set()
+
+
+def supports_multiple_choices(request: Request, model_id: str) -> bool:
+    """Whether a single completion call can return several choices (the OpenAI-compatible `n` parameter)"""
+    if not BATCHED_VARIANTS or model_id in models_without_multiple_choices:
+        return False
+    if getattr(request.state, "direct", False):
+        return False
+
+    model = request.app.state.MODELS.get(model_id)
+    # Ollama, pipes and arena models do not handle `n`
+    return bool(model) and model.get("owned_by") == "openai" and not model.get("pipe")
+
+
+async def generate_versions(request: Request, chunk: str, model: str, preserved_words: List[str], language_level: str, user: Any, index: int, temperature: float, count: int) -> List[dict]:
+    """Generate count versions of a chunk: in a single call when the backend supports it, in parallel calls otherwise"""
+    versions = []
+    if count > 1 and supports_multiple_choices(request, model):
+        versions = await request_versions(request, chunk, model, preserved_words, language_level, user, index, temperature, n=count)
+        successful_versions = [v for v in versions if v.get("error") is None]
+        if 0 < len(successful_versions) < count:
+            print(f"Model {model} returned {len(successful_versions)} of {count} requested choices, falling back to parallel calls")
+            models_without_multiple_choices.add(model)
+        elif not successful_versions and any(
+            400 <= v.get("status_code", 0) < 500 and v["status_code"] != 429 for v in versions
+        ):
+            # The backend rejected the request itself, most likely the `n` parameter; rate limits
+            # (429) are retried and say nothing about `n`
+            print(f"Model {model} rejected a request for {count} choices, falling back to parallel calls")
+            models_without_multiple_choices.add(model)
+        versions = successful_versions
+
+    missing = count - len(versions)
+    if missing > 0:
+        versions += await asyncio.gather(*[
+            generate_version(request, chunk, model, preserved_words, language_level, user, index, temperature)
+            for _ in range(missing)
+        ])
+    return versions
+
 
 async def select_best_version(request: Request, original_chunk: str, generated_versions: List[dict], model: str, language_level: str, preserved_words: List[str], user: Any, index: int) -> dict: # Added preserved_words
     """Selects the best version from generated texts using an LLM based on a specific prompt."""
@@ -312,7 +472,7 @@ async def select_best_version(request: Request, original_chunk: str, generated_v
     }
 
     try:
-        response = await generate_chat_completion(request=request, form_data=form_data, user=user)
+        response = await rate_limited_chat_completion(request=request, form_data=form_data, user=user)
         llm_output = response['choices'][0]['message']['content']
 
         # Extract text between <<< and >>> for the FINAL output from the selection step
@@ -335,6 +495,49 @@ async def select_best_version(request: Request, original_chunk: str, generated_v
         return {"index": index, "text": original_chunk, "selection_error": str(e)}
 
 
+async def simplify_chunk(request: Request, chunk: str, model: str, preserved_words: List[str], language_level: str, user: Any, index: int) -> dict:
+    """Generate the versions of a single chunk and select the best one, reusing a cached result for identical input."""
+    if not chunk or chunk.isspace():
+        # Empty lines only keep the paragraph structure, there is nothing to simplify
+        return {"index": index, "text": chunk}
+
+    cache_key = make_cache_key(chunk, model, language_level, preserved_words, get_prompt_version(language_level))
+    cached_result = await SIMPLIFICATION_CACHE.get(cache_key)
+    if cached_result is not None:
+        return {"index": index, "text": cached_result["text"], "cached": True}
+
+    variant_count = get_variant_count(language_level)
+    if ADAPTIVE_VARIANTS and variant_count > 1 and is_simple_chunk(chunk, language_level):
+        variant_count = 1
+
+    versions = await generate_versions(request, chunk, model, preserved_words, language_level, user, index, GENERATION_TEMPERATURE, variant_count)
+
+    successful_texts = [
+        extract_delimited_text(v["text"]) for v in versions
+        if v.get("error") is None and v.get("text", "").strip()
+    ]
+    if successful_texts and len(successful_texts) == len(versions) and (
+        variant_count == 1 or (ADAPTIVE_VARIANTS and are_near_identical(successful_texts))
+    ):
+        # Nothing to choose between: skip the selection call
+        final_result = {"index": index, "text": successful_texts[0]}
+    else:
+        final_result = await select_best_version(request, chunk, versions, model, language_level, preserved_words, user, index)
+
+    # --- DOUBLE CHECK and REMOVE DELIMITERS ---
+    if 'text' in final_result and isinstance(final_result['text'], str):
+        # Remove <<< and >>> just in case they slipped through selection/parsing
+        final_result['text'] = final_result['text'].replace('<<<', '').replace('>>>', '').strip()
+    # --- END DOUBLE CHECK ---
+
+    # Only cache clean results; a fallback to the original text should be retried next time
+    has_errors = any(v.get("error") for v in versions) or "selection_error" in final_result or "selection_warning" in final_result
+    if not has_errors:
+        await SIMPLIFICATION_CACHE.set(cache_key, {"text": final_result["text"]})
+
+    return final_result
+
+
 class SimplifyTextRequest(BaseModel):
     text: str
     model: str
@@ -349,9 +552,28 @@ async def get_versimpelaar_config():
         "max_chunk_tokens": int(os.getenv('versimpelaar_MAX_CHUNK_TOKENS', 1200)),
     }
 
+async def prepare_chunks(data: SimplifyTextRequest, config: dict) -> List[str]:
+    """Add detected law articles to the preserved words and split the text into chunks"""
+    # Regex to find common law article mentions (e.g., Artikel 1, art. 2.3, Artikel 3:16)
+    # This regex aims for "Artikel X", "Artikel X.Y", "Artikel X:Y", "Artikel Xa", "artikel X lid Y" (captures "artikel X")
+    law_article_regex = r'\b(?:[Aa]rtikel|[Aa]rt\.)\s*\d+(?:[.:]\w+)*\b'
+    
+    found_articles = re.findall(law_article_regex, data.text)
+    
+    # Combine with user-provided preserved words, ensuring uniqueness
+    current_preserved_words = set(data.preserved_words)
+    for article in found_articles:
+        current_preserved_words.add(article)
+    
+    data.preserved_words = list(current_preserved_words)
+
+    # Tokenizing a long document is CPU bound, keep it off the event loop
+    return await asyncio.to_thread(split_into_chunks, data.text, config['max_chunk_tokens'])
+
+
 @router.post("/translate")
 async def simplify_text_endpoint(request: Request, data: SimplifyTextRequest, user = Depends(get_current_user)):
-    """Endpoint to simplify text to B1/B2 level. Generates 3 versions per chunk, then selects the best."""
+    """Endpoint to simplify text to B1/B2 level. Generates several versions per chunk (3 by default), then selects the best."""
 
     print(f"Using model: {data.model}")
 
@@ -367,24 +589,8 @@ async def simplify_text_endpoint(request: Request, data: SimplifyTextRequest, us
             media_type="application/x-ndjson"
         )
 
-    # --- START: Automatically detect and add law articles to preserved_words ---
-    # Regex to find common law article mentions (e.g., Artikel 1, art. 2.3, Artikel 3:16)
-    # This regex aims for "Artikel X", "Artikel X.Y", "Artikel X:Y", "Artikel Xa", "artikel X lid Y" (captures "artikel X")
-    law_article_regex = r'\b(?:[Aa]rtikel|[Aa]rt\.)\s*\d+(?:[.:]\w+)*\b'
-    
-    found_articles = re.findall(law_article_regex, data.text)
-    
-    # Combine with user-provided preserved words, ensuring uniqueness
-    current_preserved_words = set(data.preserved_words)
-    for article in found_articles:
-        current_preserved_words.add(article)
-    
-    data.preserved_words = list(current_preserved_words)
-    # --- END: Automatically detect and add law articles to preserved_words ---
-
-    chunks = split_into_chunks(data.text, config['max_chunk_tokens'])
+    chunks = await prepare_chunks(data, config)
     num_chunks = len(chunks)
-    temperatures = [1.0, 1.0, 1.0]
 
     if num_chunks == 0:
         async def empty_stream():
@@ -396,58 +602,173 @@ async def simplify_text_endpoint(request: Request, data: SimplifyTextRequest, us
         # Send total chunk count first (client expects one final result per chunk)
         yield json.dumps({"total_chunks": num_chunks}) + "\n"
 
-        generation_tasks = []
-        for i, chunk in enumerate(chunks):
-            for temp in temperatures:
-                generation_tasks.append(
-                    generate_version(request, chunk, data.model, data.preserved_words, data.language_level, user, i, temp)
-                )
+        # Each chunk runs its own generate -> select pipeline, so a chunk's result is streamed
+        # (tagged with its index) as soon as it is ready, while other chunks are still generating.
+        tasks = [
+            asyncio.create_task(
+                simplify_chunk(request, chunk, data.model, data.preserved_words, data.language_level, user, i)
+            )
+            for i, chunk in enumerate(chunks)
+        ]
 
-        # Use dictionaries to store results and track completion
-        chunk_results = {i: [] for i in range(num_chunks)}
-        tasks_outstanding = {i: len(temperatures) for i in range(num_chunks)}
-        selection_tasks = [] # Store tasks for the selection step
+        try:
+            for future in asyncio.as_completed(tasks):
+                try:
+                    final_result = await future
+                    yield json.dumps(final_result) + "\n"
+                except Exception as e:
+                    print(f"Error awaiting or processing chunk result: {e}")
+                    # Yield error result for this chunk
+                    error_result = {"index": -1, "error": f"Processing failed after selection: {e}"}
+                    yield json.dumps(error_result) + "\n"
+        finally:
+            # The client disconnected or the stream was closed early: stop paying for remaining calls
+            for task in tasks:
+                task.cancel()
+
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(user = Depends(get_admin_user)):
+    """Hit/miss statistics of the simplification result cache"""
+    return await SIMPLIFICATION_CACHE.get_stats()
+
+
+# --- START: Job based simplification ---
+# A job keeps running in the background when the client disconnects. Results are stored as they
+# complete, so a client can resume the stream after a reload without paying for the document again.
+async def send_job_heartbeats(job_id: str):
+    """Keep the heartbeat of a running job fresh, also while a single chunk takes long"""
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+        try:
+            if not await JOBS.heartbeat(job_id):
+                return
+        except Exception as e:
+            print(f"Error sending heartbeat of simplification job {job_id}: {e}")
+
+
+async def run_simplification_job(request: Request, job_id: str, chunks: List[str], data: SimplifyTextRequest, user: Any):
+    heartbeat_task = asyncio.create_task(send_job_heartbeats(job_id))
+    tasks = [
+        asyncio.create_task(
+            simplify_chunk(request, chunk, data.model, data.preserved_words, data.language_level, user, i)
+        )
+        for i, chunk in enumerate(chunks)
+    ]
 
-        # Process generation results as they complete
-        for future in asyncio.as_completed(generation_tasks):
+    try:
+        for future in asyncio.as_completed(tasks):
             try:
-                gen_result = await future
-                idx = gen_result['index']
-                chunk_results[idx].append(gen_result)
-                tasks_outstanding[idx] -= 1
-
-                # If all versions for a chunk are generated, create selection task
-                if tasks_outstanding[idx] == 0:
-                    original_chunk = chunks[idx]
-                    versions = chunk_results[idx]
-                    # Schedule the selection task
-                    selection_tasks.append(
-                        select_best_version(request, original_chunk, versions, data.model, data.language_level, data.preserved_words, user, idx) # Added preserved_words
-                    )
-                    # Optional: Clean up memory if chunks are very large
-                    # del chunk_results[idx] # Be careful if original_chunk is needed elsewhere
-
+                result = await future
             except Exception as e:
-                # Handle errors during the await future itself (less likely if generate_version catches errors)
-                print(f"Error awaiting generation task result: {e}")
-                # Continue processing other tasks
-                pass
+                print(f"Error awaiting or processing chunk result for job {job_id}: {e}")
+                result = {"index": -1, "error": f"Processing failed after selection: {e}"}
+            await JOBS.append_result(job_id, result)
+
+            # Also a heartbeat; fails when the job was cancelled from another worker
+            if not await JOBS.heartbeat(job_id):
+                return
+
+        await JOBS.update(job_id, expected_status=JobStatus.RUNNING, status=JobStatus.COMPLETED)
+    except asyncio.CancelledError:
+        await JOBS.update(job_id, expected_status=JobStatus.RUNNING, status=JobStatus.CANCELLED)
+        raise
+    except Exception as e:
+        print(f"Error running simplification job {job_id}: {e}")
+        await JOBS.update(job_id, expected_status=JobStatus.RUNNING, status=JobStatus.FAILED, error=str(e))
+    finally:
+        heartbeat_task.cancel()
+        for task in tasks:
+            task.cancel()
 
-        # Process selection results as they complete and yield them
-        for future in asyncio.as_completed(selection_tasks):
-            try:
-                final_result = await future
-                # --- DOUBLE CHECK and REMOVE DELIMITERS ---
-                if 'text' in final_result and isinstance(final_result['text'], str):
-                    # Remove <<< and >>> just in case they slipped through selection/parsing
-                    final_result['text'] = final_result['text'].replace('<<<', '').replace('>>>', '').strip()
-                # --- END DOUBLE CHECK ---
-                yield json.dumps(final_result) + "\n"
-            except Exception as e:
-                print(f"Error awaiting or processing selection task result: {e}")
-                # Yield error result for this chunk
-                error_result = {"index": -1, "error": f"Processing failed after selection: {e}"}
-                yield json.dumps(error_result) + "\n"
+
+async def get_user_job(job_id: str, user: Any) -> dict:
+    job = await JOBS.get(job_id)
+    if job is None or job["user_id"] != user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs")
+async def create_simplification_job(request: Request, data: SimplifyTextRequest, user = Depends(get_current_user)):
+    """Start simplifying a text in the background and return the job id"""
+    config = await get_versimpelaar_config()
+
+    word_count = len(data.text.split()) if data.text else 0
+    if word_count > config['max_input_words']:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Input text ({word_count} words) exceeds the limit of {config['max_input_words']} words.",
+        )
+
+    chunks = await prepare_chunks(data, config)
+
+    job_id = str(uuid4())
+    await JOBS.create({
+        "id": job_id,
+        "user_id": user.id,
+        "model": data.model,
+        "language_level": data.language_level,
+        "status": JobStatus.RUNNING if chunks else JobStatus.COMPLETED,
+        "total_chunks": len(chunks),
+        "created_at": int(time.time()),
+    })
+    if chunks:
+        create_task(run_simplification_job(request, job_id, chunks, data, user), id=job_id)
+
+    return {"job_id": job_id, "total_chunks": len(chunks)}
 
 
-    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
\ No newline at end of file
+@router.get("/jobs/{job_id}")
+async def get_simplification_job(job_id: str, user = Depends(get_current_user)):
+    return await get_user_job(job_id, user)
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_simplification_job(job_id: str, offset: int = 0, user = Depends(get_current_user)):
+    """Stream the results of a job as NDJSON, starting after the first `offset` results already received"""
+    job = await get_user_job(job_id, user)
+
+    async def stream_results():
+        yield json.dumps({"job_id": job_id, "total_chunks": job["total_chunks"]}) + "\n"
+
+        position = max(0, offset)
+        while True:
+            results = await JOBS.get_results(job_id, position)
+            for result in results:
+                yield json.dumps(result) + "\n"
+            position += len(results)
+
+            # A job whose worker is gone is marked failed here, which ends the stream
+            current_job = await JOBS.get(job_id)
+            if current_job is None:
+                yield json.dumps({"job_id": job_id, "status": JobStatus.FAILED, "error": "Job not found"}) + "\n"
+                break
+            if current_job["status"] != JobStatus.RUNNING and position >= current_job["completed_chunks"]:
+                if current_job["status"] != JobStatus.COMPLETED:
+                    # Tell the client why results are missing instead of silently ending
+                    yield json.dumps({
+                        "job_id": job_id,
+                        "status": current_job["status"],
+                        "error": current_job.get("error"),
+                    }) + "\n"
+                break
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_simplification_job(job_id: str, user = Depends(get_current_user)):
+    await get_user_job(job_id, user)
+    if await JOBS.update(job_id, expected_status=JobStatus.RUNNING, status=JobStatus.CANCELLED):
+        for task_id in list_task_ids_by_chat_id(job_id):
+            try:
+                await stop_task(task_id)
+            except ValueError:
+                pass
+    return {"status": True}
+# --- END: Job based simplification ---
@@ -4,6 +4,7 @@ from typing import Optional
 
 
 from open_webui.socket.main import get_event_emitter
+from open_webui.utils.message_buffer import MESSAGE_WRITE_BUFFER
 from open_webui.models.chats import (
     ChatForm,
     ChatImportForm,
@@ -444,6 +445,8 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
+    # Write pending streamed updates first, so they cannot overwrite this edit later
+    MESSAGE_WRITE_BUFFER.flush(id, message_id)
     chat = Chats.upsert_message_to_chat_by_id_and_message_id(
         id,
         message_id,
@@ -18,9 +18,10 @@ from fastapi import (
     status,
     Query,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, StreamingResponse
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import ENABLE_BACKGROUND_FILE_PROCESSING, SRC_LOG_LEVELS
 
 from open_webui.models.users import Users
 from open_webui.models.files import (
@@ -36,6 +37,11 @@ from open_webui.routers.retrieval import ProcessFileForm, process_file
 from open_webui.routers.audio import transcribe
 from open_webui.storage.provider import Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.ingestion import (
+    INGESTION_QUEUE,
+    is_processing_required,
+    is_transcription_required,
+)
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -83,6 +89,37 @@ def has_access_to_file(
 
 
 @router.post("/", response_model=FileModelResponse)
+async def upload_file_handler(
+    request: Request,
+    file: UploadFile = File(...),
+    metadata: Optional[dict | str] = Form(None),
+    process: bool = Query(True),
+    background: Optional[bool] = Query(None),
+    user=Depends(get_verified_user),
+):
+    """
+    Upload a file. With background processing, the file is returned with status "queued"
+    right away and processed by the ingestion queue; follow it with
+    GET /files/{id}/process/status or the "file-events" socket.io events.
+    """
+    if background is None:
+        background = ENABLE_BACKGROUND_FILE_PROCESSING
+
+    # Without a running queue (ENABLE_BACKGROUND_FILE_PROCESSING is off) the file is
+    # processed right away, also when the client asked for background processing
+    if not (process and background and INGESTION_QUEUE.is_running):
+        return await run_in_threadpool(
+            upload_file, request, file, metadata, process, user=user
+        )
+
+    file_item = await run_in_threadpool(
+        upload_file, request, file, metadata, False, user=user
+    )
+    if is_processing_required(request, file.content_type):
+        file_item = await INGESTION_QUEUE.enqueue(Files.get_file_by_id(file_item.id))
+    return file_item
+
+
 def upload_file(
     request: Request,
     file: UploadFile = File(...),
@@ -155,9 +192,7 @@ def upload_file(
         if process:
             try:
                 if file.content_type:
-                    if file.content_type.startswith("audio/") or file.content_type in {
-                        "video/webm"
-                    }:
+                    if is_transcription_required(file.content_type):
                         file_path = Storage.get_file(file_path)
                         result = transcribe(request, file_path, file_metadata)
 
@@ -166,9 +201,7 @@ def upload_file(
                             ProcessFileForm(file_id=id, content=result.get("text", "")),
                             user=user,
                         )
-                    elif (not file.content_type.startswith(("image/", "video/"))) or (
-                        request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
-                    ):
+                    elif is_processing_required(request, file.content_type):
                         process_file(request, ProcessFileForm(file_id=id), user=user)
                 else:
                     log.info(
@@ -203,6 +236,32 @@ def upload_file(
         )
 
 
+############################
+# Get File Processing Status
+############################
+
+
+@router.get("/{id}/process/status")
+async def get_file_process_status(id: str, user=Depends(get_verified_user)):
+    file = Files.get_file_by_id(id)
+
+    if file and (
+        file.user_id == user.id
+        or user.role == "admin"
+        or has_access_to_file(id, "read", user)
+    ):
+        return {
+            "status": file.status,
+            "error": (file.data or {}).get("error"),
+            "warning": (file.data or {}).get("warning"),
+        }
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+
 ############################
 # List Files
 ############################
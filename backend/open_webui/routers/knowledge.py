@@ -1,6 +1,7 @@
 from typing import List, Optional
 from pydantic import BaseModel
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 import logging
 
 from open_webui.models.knowledge import (
@@ -9,8 +10,15 @@ from open_webui.models.knowledge import (
     KnowledgeResponse,
     KnowledgeUserResponse,
 )
-from open_webui.models.files import Files, FileModel, FileMetadataResponse
+from open_webui.models.chunk_embeddings import ChunkEmbeddings
+from open_webui.models.files import (
+    Files,
+    FileModel,
+    FileMetadataResponse,
+    FileStatus,
+)
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
 from open_webui.routers.retrieval import (
     process_file,
     ProcessFileForm,
@@ -20,8 +28,10 @@ from open_webui.routers.retrieval import (
 from open_webui.storage.provider import Storage
 
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.utils.auth import get_verified_user
+from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.ingestion import INGESTION_QUEUE
+from open_webui.utils.reindex import KNOWLEDGE_REINDEXER
 
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -174,72 +184,15 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
             detail=ERROR_MESSAGES.UNAUTHORIZED,
         )
 
-    knowledge_bases = Knowledges.get_knowledge_bases()
-
-    log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
-
-    deleted_knowledge_bases = []
-
-    for knowledge_base in knowledge_bases:
-        # -- Robust error handling for missing or invalid data
-        if not knowledge_base.data or not isinstance(knowledge_base.data, dict):
-            log.warning(
-                f"Knowledge base {knowledge_base.id} has no data or invalid data ({knowledge_base.data!r}). Deleting."
-            )
-            try:
-                Knowledges.delete_knowledge_by_id(id=knowledge_base.id)
-                deleted_knowledge_bases.append(knowledge_base.id)
-            except Exception as e:
-                log.error(
-                    f"Failed to delete invalid knowledge base {knowledge_base.id}: {e}"
-                )
-            continue
-
-        try:
-            file_ids = knowledge_base.data.get("file_ids", [])
-            files = Files.get_files_by_ids(file_ids)
-            try:
-                if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
-                    VECTOR_DB_CLIENT.delete_collection(
-                        collection_name=knowledge_base.id
-                    )
-            except Exception as e:
-                log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
-                continue  # Skip, don't raise
-
-            failed_files = []
-            for file in files:
-                try:
-                    process_file(
-                        request,
-                        ProcessFileForm(
-                            file_id=file.id, collection_name=knowledge_base.id
-                        ),
-                        user=user,
-                    )
-                except Exception as e:
-                    log.error(
-                        f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
-                    )
-                    failed_files.append({"file_id": file.id, "error": str(e)})
-                    continue
-
-        except Exception as e:
-            log.error(f"Error processing knowledge base {knowledge_base.id}: {str(e)}")
-            # Don't raise, just continue
-            continue
+    # Runs in the background, follow it with GET /knowledge/reindex/status
+    if not KNOWLEDGE_REINDEXER.start(request.app, user):
+        log.info("Knowledge reindex is already running")
+    return True
 
-        if failed_files:
-            log.warning(
-                f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
-            )
-            for failed in failed_files:
-                log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
 
-    log.info(
-        f"Reindexing completed. Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
-    )
-    return True
+@router.get("/reindex/status")
+async def get_reindex_status(user=Depends(get_admin_user)):
+    return KNOWLEDGE_REINDEXER.get_status()
 
 
 ############################
@@ -386,13 +339,10 @@ def add_file_to_knowledge_by_id(
         file_ids = data.get("file_ids", [])
 
         if form_data.file_id not in file_ids:
-            file_ids.append(form_data.file_id)
-            data["file_ids"] = file_ids
-
-            knowledge = Knowledges.update_knowledge_data_by_id(id=id, data=data)
+            knowledge = Knowledges.add_file_id_to_knowledge_by_id(id, form_data.file_id)
 
             if knowledge:
-                files = Files.get_file_metadatas_by_ids(file_ids)
+                files = Files.get_file_metadatas_by_ids(knowledge.data["file_ids"])
 
                 return KnowledgeFilesResponse(
                     **knowledge.model_dump(),
@@ -451,6 +401,10 @@ def update_file_from_knowledge_by_id(
     VECTOR_DB_CLIENT.delete(
         collection_name=knowledge.id, filter={"file_id": form_data.file_id}
     )
+    BM25_INDEX.delete(knowledge.id, filter={"file_id": form_data.file_id})
+    ChunkEmbeddings.delete_references(
+        collection_name=knowledge.id, file_id=form_data.file_id
+    )
 
     # Add content to the vector database
     try:
@@ -522,6 +476,7 @@ def remove_file_from_knowledge_by_id(
         VECTOR_DB_CLIENT.delete(
             collection_name=knowledge.id, filter={"file_id": form_data.file_id}
         )
+        BM25_INDEX.delete(knowledge.id, filter={"file_id": form_data.file_id})
     except Exception as e:
         log.debug("This was most likely caused by bypassing embedding processing")
         log.debug(e)
@@ -532,6 +487,7 @@ def remove_file_from_knowledge_by_id(
         file_collection = f"file-{form_data.file_id}"
         if VECTOR_DB_CLIENT.has_collection(collection_name=file_collection):
             VECTOR_DB_CLIENT.delete_collection(collection_name=file_collection)
+        BM25_INDEX.delete_collection(file_collection)
     except Exception as e:
         log.debug("This was most likely caused by bypassing embedding processing")
         log.debug(e)
@@ -545,13 +501,12 @@ def remove_file_from_knowledge_by_id(
         file_ids = data.get("file_ids", [])
 
         if form_data.file_id in file_ids:
-            file_ids.remove(form_data.file_id)
-            data["file_ids"] = file_ids
-
-            knowledge = Knowledges.update_knowledge_data_by_id(id=id, data=data)
+            knowledge = Knowledges.remove_file_id_from_knowledge_by_id(
+                id, form_data.file_id
+            )
 
             if knowledge:
-                files = Files.get_file_metadatas_by_ids(file_ids)
+                files = Files.get_file_metadatas_by_ids(knowledge.data["file_ids"])
 
                 return KnowledgeFilesResponse(
                     **knowledge.model_dump(),
@@ -630,6 +585,8 @@ async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
     # Clean up vector DB
     try:
         VECTOR_DB_CLIENT.delete_collection(collection_name=id)
+        BM25_INDEX.delete_collection(id)
+        ChunkEmbeddings.delete_references(collection_name=id)
     except Exception as e:
         log.debug(e)
         pass
@@ -663,6 +620,8 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 
     try:
         VECTOR_DB_CLIENT.delete_collection(collection_name=id)
+        BM25_INDEX.delete_collection(id)
+        ChunkEmbeddings.delete_references(collection_name=id)
     except Exception as e:
         log.debug(e)
         pass
@@ -678,7 +637,7 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 
 
 @router.post("/{id}/files/batch/add", response_model=Optional[KnowledgeFilesResponse])
-def add_files_to_knowledge_batch(
+async def add_files_to_knowledge_batch(
     request: Request,
     id: str,
     form_data: list[KnowledgeFileIdForm],
@@ -716,9 +675,44 @@ def add_files_to_knowledge_batch(
             )
         files.append(file)
 
+    if INGESTION_QUEUE.is_running:
+        # Add the files to the knowledge base in the background, a file is only added
+        # to the knowledge base once it has been processed into its collection
+        busy_file_ids = []
+        for file in files:
+            if file.status == FileStatus.PROCESSING:
+                busy_file_ids.append(file.id)
+                continue
+
+            await INGESTION_QUEUE.enqueue(
+                file,
+                {"process": file.status == FileStatus.QUEUED, "knowledge_id": id},
+            )
+
+        data = knowledge.data or {}
+        existing_file_ids = data.get("file_ids", [])
+        if busy_file_ids:
+            return KnowledgeFilesResponse(
+                **knowledge.model_dump(),
+                files=Files.get_file_metadatas_by_ids(existing_file_ids),
+                warnings={
+                    "message": "Some files are still being processed",
+                    "errors": [
+                        f"{file_id}: File is already being processed"
+                        for file_id in busy_file_ids
+                    ],
+                },
+            )
+
+        return KnowledgeFilesResponse(
+            **knowledge.model_dump(),
+            files=Files.get_file_metadatas_by_ids(existing_file_ids),
+        )
+
     # Process files
     try:
-        result = process_files_batch(
+        result = await run_in_threadpool(
+            process_files_batch,
             request=request,
             form_data=BatchProcessFilesForm(files=files, collection_name=id),
             user=user,
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import logging
 from typing import Optional
@@ -51,14 +52,14 @@ async def add_memory(
 ):
     memory = Memories.insert_new_memory(user.id, form_data.content)
 
-    VECTOR_DB_CLIENT.upsert(
+    await VECTOR_DB_CLIENT.aupsert(
         collection_name=f"user-memory-{user.id}",
         items=[
             {
                 "id": memory.id,
                 "text": memory.content,
-                "vector": request.app.state.EMBEDDING_FUNCTION(
-                    memory.content, user=user
+                "vector": await run_in_threadpool(
+                    request.app.state.EMBEDDING_FUNCTION, memory.content, user=user
                 ),
                 "metadata": {"created_at": memory.created_at},
             }
@@ -82,9 +83,13 @@ class QueryMemoryForm(BaseModel):
 async def query_memory(
     request: Request, form_data: QueryMemoryForm, user=Depends(get_verified_user)
 ):
-    results = VECTOR_DB_CLIENT.search(
+    results = await VECTOR_DB_CLIENT.asearch(
         collection_name=f"user-memory-{user.id}",
-        vectors=[request.app.state.EMBEDDING_FUNCTION(form_data.content, user=user)],
+        vectors=[
+            await run_in_threadpool(
+                request.app.state.EMBEDDING_FUNCTION, form_data.content, user=user
+            )
+        ],
         limit=form_data.k,
     )
 
@@ -98,26 +103,39 @@ async def query_memory(
 async def reset_memory_from_vector_db(
     request: Request, user=Depends(get_verified_user)
 ):
-    VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
+    await VECTOR_DB_CLIENT.adelete_collection(f"user-memory-{user.id}")
 
     memories = Memories.get_memories_by_user_id(user.id)
-    VECTOR_DB_CLIENT.upsert(
-        collection_name=f"user-memory-{user.id}",
-        items=[
+    if memories:
+        vectors = await run_in_threadpool(
+            request.app.state.EMBEDDING_FUNCTION,
+            [memory.content for memory in memories],
+            user=user,
+        )
+        items = [
             {
                 "id": memory.id,
                 "text": memory.content,
-                "vector": request.app.state.EMBEDDING_FUNCTION(
-                    memory.content, user=user
-                ),
+                "vector": vectors[idx],
                 "metadata": {
                     "created_at": memory.created_at,
                     "updated_at": memory.updated_at,
                 },
             }
-            for memory in memories
-        ],
-    )
+            for idx, memory in enumerate(memories)
+            # Memories the embedding engine failed on are skipped, not the whole reset
+            if vectors[idx] is not None
+        ]
+        if len(items) < len(memories):
+            log.warning(
+                f"Skipped {len(memories) - len(items)} of {len(memories)} memories "
+                f"of user {user.id} that could not be embedded"
+            )
+
+        if items:
+            await VECTOR_DB_CLIENT.aupsert(
+                collection_name=f"user-memory-{user.id}", items=items
+            )
 
     return True
 
@@ -133,7 +151,7 @@ async def delete_memory_by_user_id(user=Depends(get_verified_user)):
 
     if result:
         try:
-            VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
+            await VECTOR_DB_CLIENT.adelete_collection(f"user-memory-{user.id}")
         except Exception as e:
             log.error(e)
         return True
@@ -160,14 +178,14 @@ async def update_memory_by_id(
         raise HTTPException(status_code=404, detail="Memory not found")
 
     if form_data.content is not None:
-        VECTOR_DB_CLIENT.upsert(
+        await VECTOR_DB_CLIENT.aupsert(
             collection_name=f"user-memory-{user.id}",
             items=[
                 {
                     "id": memory.id,
                     "text": memory.content,
-                    "vector": request.app.state.EMBEDDING_FUNCTION(
-                        memory.content, user=user
+                    "vector": await run_in_threadpool(
+                        request.app.state.EMBEDDING_FUNCTION, memory.content, user=user
                     ),
                     "metadata": {
                         "created_at": memory.created_at,
@@ -190,7 +208,7 @@ async def delete_memory_by_id(memory_id: str, user=Depends(get_verified_user)):
     result = Memories.delete_memory_by_id_and_user_id(memory_id, user.id)
 
     if result:
-        VECTOR_DB_CLIENT.delete(
+        await VECTOR_DB_CLIENT.adelete(
             collection_name=f"user-memory-{user.id}", ids=[memory_id]
         )
         return True
@@ -31,12 +31,18 @@ import tiktoken
 from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
 from langchain_core.documents import Document
 
+from open_webui.models.chunk_embeddings import ChunkEmbeddings
 from open_webui.models.files import FileModel, Files
 from open_webui.models.knowledge import Knowledges
 from open_webui.storage.provider import Storage
 
 
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
+from open_webui.retrieval.embedding_cache import (
+    CHUNK_EMBEDDING_STORE,
+    EMBEDDING_CACHE,
+)
 
 # Document loaders
 from open_webui.retrieval.loaders.main import Loader
@@ -247,6 +253,65 @@ async def get_embedding_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/embedding/cache")
+async def get_embedding_cache_stats(user=Depends(get_admin_user)):
+    if EMBEDDING_CACHE is None:
+        return {"enabled": False}
+    return EMBEDDING_CACHE.get_stats()
+
+
+@router.get("/embedding/store")
+async def get_chunk_embedding_store_stats(user=Depends(get_admin_user)):
+    if CHUNK_EMBEDDING_STORE is None:
+        return {"enabled": False}
+    return CHUNK_EMBEDDING_STORE.get_stats()
+
+
+# Running rebuild of the vector index, started from this instance
+VECTOR_INDEX_REBUILD: Optional[asyncio.Task] = None
+
+
+@router.get("/vector/index")
+async def get_vector_index_status(user=Depends(get_admin_user)):
+    if not hasattr(VECTOR_DB_CLIENT, "rebuild_vector_index"):
+        return {"supported": False}
+    return {
+        "supported": True,
+        **await asyncio.to_thread(VECTOR_DB_CLIENT.get_vector_index_status),
+    }
+
+
+@router.post("/vector/index/rebuild")
+async def rebuild_vector_index(user=Depends(get_admin_user)):
+    global VECTOR_INDEX_REBUILD
+
+    if not hasattr(VECTOR_DB_CLIENT, "rebuild_vector_index"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(
+                "The vector database has no index to rebuild"
+            ),
+        )
+
+    if VECTOR_INDEX_REBUILD is not None and not VECTOR_INDEX_REBUILD.done():
+        return {"status": False}
+    index_status = await asyncio.to_thread(VECTOR_DB_CLIENT.get_vector_index_status)
+    if index_status["rebuilding"]:
+        # By another instance
+        return {"status": False}
+
+    async def rebuild():
+        try:
+            if not await asyncio.to_thread(VECTOR_DB_CLIENT.rebuild_vector_index):
+                log.info("The vector index is already being rebuilt")
+        except Exception as e:
+            log.exception(f"Error rebuilding the vector index: {e}")
+
+    # Building the index of a large table takes long, follow it with GET /vector/index
+    VECTOR_INDEX_REBUILD = asyncio.create_task(rebuild())
+    return {"status": True}
+
+
 class OpenAIConfigForm(BaseModel):
     url: str
     key: str
@@ -280,6 +345,11 @@ async def update_embedding_config(
         f"Updating embedding model: {request.app.state.config.RAG_EMBEDDING_MODEL} to {form_data.embedding_model}"
     )
     try:
+        embedding_model_changed = (
+            request.app.state.config.RAG_EMBEDDING_ENGINE,
+            request.app.state.config.RAG_EMBEDDING_MODEL,
+        ) != (form_data.embedding_engine, form_data.embedding_model)
+
         request.app.state.config.RAG_EMBEDDING_ENGINE = form_data.embedding_engine
         request.app.state.config.RAG_EMBEDDING_MODEL = form_data.embedding_model
 
@@ -352,8 +422,16 @@ async def update_embedding_config(
                 if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
                 else None
             ),
+            embedding_cache=EMBEDDING_CACHE,
         )
 
+        if embedding_model_changed:
+            # The stored chunk embeddings are of the previous model, never reused again
+            try:
+                ChunkEmbeddings.delete_all_embeddings()
+            except Exception as e:
+                log.warning(f"Error deleting the stored chunk embeddings: {e}")
+
         return {
             "status": True,
             "embedding_engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
@@ -1127,6 +1205,8 @@ def save_docs_to_vector_db(
     if len(docs) == 0:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
 
+    file_id = metadata.get("file_id") if metadata else None
+
     texts = [doc.page_content for doc in docs]
     metadatas = [
         {
@@ -1159,6 +1239,8 @@ def save_docs_to_vector_db(
 
             if overwrite:
                 VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+                BM25_INDEX.delete_collection(collection_name)
+                ChunkEmbeddings.delete_references(collection_name=collection_name)
                 log.info(f"deleting existing collection {collection_name}")
             elif add is False:
                 log.info(
@@ -1195,6 +1277,8 @@ def save_docs_to_vector_db(
                 if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
                 else None
             ),
+            # Only chunks that were not embedded before are sent to the engine
+            embedding_cache=CHUNK_EMBEDDING_STORE,
         )
 
         embeddings = embedding_function(
@@ -1211,12 +1295,43 @@ def save_docs_to_vector_db(
                 "metadata": metadatas[idx],
             }
             for idx, text in enumerate(texts)
+            # Chunks the embedding engine failed on are skipped, not the whole document
+            if embeddings[idx] is not None
         ]
 
+        if not items:
+            raise ValueError(ERROR_MESSAGES.DEFAULT("Failed to generate embeddings"))
+
+        warning = None
+        if len(items) < len(texts):
+            warning = f"Skipped {len(texts) - len(items)} of {len(texts)} chunks that could not be embedded"
+            log.warning(f"{warning} ({collection_name})")
+        if file_id:
+            # Partially ingested files are searchable, but their status tells what is missing
+            Files.update_file_data_by_id(file_id, {"warning": warning})
+
         VECTOR_DB_CLIENT.insert(
             collection_name=collection_name,
             items=items,
         )
+        BM25_INDEX.add(collection_name, items)
+
+        if CHUNK_EMBEDDING_STORE is not None and file_id:
+            # Keeps the stored embeddings of the chunks while they are in the collection
+            CHUNK_EMBEDDING_STORE.add_references(
+                collection_name,
+                file_id,
+                [
+                    CHUNK_EMBEDDING_STORE.make_key(
+                        request.app.state.config.RAG_EMBEDDING_ENGINE,
+                        request.app.state.config.RAG_EMBEDDING_MODEL,
+                        RAG_EMBEDDING_CONTENT_PREFIX,
+                        text.replace("\n", " "),
+                    )
+                    for idx, text in enumerate(texts)
+                    if embeddings[idx] is not None
+                ],
+            )
 
         return True
     except Exception as e:
@@ -1251,6 +1366,8 @@ def process_file(
             try:
                 # /files/{file_id}/data/content/update
                 VECTOR_DB_CLIENT.delete_collection(collection_name=f"file-{file.id}")
+                BM25_INDEX.delete_collection(f"file-{file.id}")
+                ChunkEmbeddings.delete_references(collection_name=f"file-{file.id}")
             except:
                 # Audio file upload pipeline
                 pass
@@ -1923,13 +2040,9 @@ def query_doc_handler(
 ):
     try:
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH:
-            collection_results = {}
-            collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=form_data.collection_name
-            )
+            BM25_INDEX.ensure_index(form_data.collection_name)
             return query_doc_with_hybrid_search(
                 collection_name=form_data.collection_name,
-                collection_result=collection_results[form_data.collection_name],
                 query=form_data.query,
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
                     query, prefix=prefix, user=user
@@ -2047,6 +2160,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
                 collection_name=form_data.collection_name,
                 metadata={"hash": hash},
             )
+            BM25_INDEX.delete(form_data.collection_name, filter={"hash": hash})
             return {"status": True}
         else:
             return {"status": False}
@@ -2058,6 +2172,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    BM25_INDEX.reset()
     Knowledges.delete_all_knowledge()
 
 
@@ -23,6 +23,7 @@ from open_webui.env import (
 )
 from open_webui.utils.auth import decode_token
 from open_webui.socket.utils import RedisDict, RedisLock
+from open_webui.utils.message_buffer import MESSAGE_WRITE_BUFFER
 
 from open_webui.env import (
     GLOBAL_LOG_LEVEL,
@@ -181,7 +182,7 @@ async def connect(sid, environ, auth):
         data = decode_token(auth["token"])
 
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = Users.get_cached_user_by_id(data["id"])
 
         if user:
             SESSION_POOL[sid] = user.model_dump()
@@ -206,7 +207,7 @@ async def user_join(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = Users.get_cached_user_by_id(data["id"])
     if not user:
         return
 
@@ -238,7 +239,7 @@ async def join_channel(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = Users.get_cached_user_by_id(data["id"])
     if not user:
         return
 
@@ -301,6 +302,16 @@ async def disconnect(sid):
         # print(f"Unknown session ID {sid} disconnected")
 
 
+async def emit_to_user(user_id: str, event: str, data: dict):
+    """Send an event to all connected sessions of a user"""
+    await asyncio.gather(
+        *[
+            sio.emit(event, data, to=session_id)
+            for session_id in set(USER_POOL.get(user_id, []))
+        ]
+    )
+
+
 def get_event_emitter(request_info, update_db=True):
     async def __event_emitter__(event_data):
         user_id = request_info["user_id"]
@@ -340,7 +351,7 @@ def get_event_emitter(request_info, update_db=True):
                 )
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
+                message = MESSAGE_WRITE_BUFFER.get_message(
                     request_info["chat_id"],
                     request_info["message_id"],
                 )
@@ -349,7 +360,7 @@ def get_event_emitter(request_info, update_db=True):
                     content = message.get("content", "")
                     content += event_data.get("data", {}).get("content", "")
 
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    MESSAGE_WRITE_BUFFER.upsert(
                         request_info["chat_id"],
                         request_info["message_id"],
                         {
@@ -360,7 +371,7 @@ def get_event_emitter(request_info, update_db=True):
             if "type" in event_data and event_data["type"] == "replace":
                 content = event_data.get("data", {}).get("content", "")
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                MESSAGE_WRITE_BUFFER.upsert(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
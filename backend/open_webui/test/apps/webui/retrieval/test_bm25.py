@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.retrieval import bm25
+from open_webui.retrieval.bm25 import BM25Index
+
+
+class FakeVectorDB:
+    def __init__(self, supports_ids=True):
+        self.supports_ids = supports_ids
+        self.items = {}
+        self.get_calls = 0
+
+    def get(self, collection_name):
+        self.get_calls += 1
+        ids = list(self.items)
+        return SimpleNamespace(
+            ids=[ids],
+            documents=[[self.items[id] for id in ids]],
+            metadatas=[[{} for _ in ids]],
+        )
+
+    def get_ids(self, collection_name):
+        return list(self.items) if self.supports_ids else None
+
+    def count(self, collection_name):
+        return len(self.items)
+
+
+@pytest.fixture
+def vector_db(monkeypatch):
+    vector_db = FakeVectorDB()
+    monkeypatch.setattr(bm25, "VECTOR_DB_CLIENT", vector_db)
+    # Check the index against the collection on every search
+    monkeypatch.setattr(bm25, "VERIFY_INTERVAL", 0)
+    return vector_db
+
+
+def search_ids(index, query):
+    assert index.ensure_index("collection")
+    return {id for id, *_ in index.search("collection", query, 10)}
+
+
+def test_deleted_and_added_items_are_picked_up(vector_db, tmp_path):
+    index = BM25Index(tmp_path)
+    vector_db.items = {"a": "apple pie", "b": "banana bread"}
+    assert search_ids(index, "apple banana") == {"a", "b"}
+
+    # Changed by another instance: as many items as before, but not the same
+    del vector_db.items["a"]
+    vector_db.items["c"] = "apple crumble"
+
+    assert search_ids(index, "apple banana") == {"b", "c"}
+    assert vector_db.get_calls == 2
+
+
+def test_deleted_items_are_removed_without_rebuild(vector_db, tmp_path):
+    index = BM25Index(tmp_path)
+    vector_db.items = {"a": "apple pie", "b": "apple bread"}
+    assert search_ids(index, "apple") == {"a", "b"}
+
+    del vector_db.items["a"]
+
+    assert search_ids(index, "apple") == {"b"}
+    assert vector_db.get_calls == 1
+
+
+def test_backend_without_ids_is_checked_by_count(vector_db, tmp_path):
+    vector_db.supports_ids = False
+    index = BM25Index(tmp_path)
+    vector_db.items = {"a": "apple pie"}
+    assert search_ids(index, "apple") == {"a"}
+
+    vector_db.items["b"] = "apple bread"
+
+    assert search_ids(index, "apple") == {"a", "b"}
+    assert vector_db.get_calls == 2
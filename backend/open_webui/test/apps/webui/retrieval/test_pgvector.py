@@ -0,0 +1,104 @@
+import io
+import json
+import struct
+
+import pytest
+
+from open_webui.retrieval.vector.dbs.pgvector import COPY_HEADER, encode_copy_rows
+
+
+def decode_copy_rows(data: bytes) -> list[dict]:
+    """Decode the binary COPY format the way PostgreSQL reads it for document_chunk"""
+    buffer = io.BytesIO(data)
+    assert buffer.read(len(COPY_HEADER)) == COPY_HEADER
+
+    def read(format: str):
+        return struct.unpack(format, buffer.read(struct.calcsize(format)))[0]
+
+    def field():
+        length = read(">i")
+        return None if length == -1 else buffer.read(length)
+
+    def text(data):
+        return data.decode("utf-8") if data is not None else None
+
+    rows = []
+    while (field_count := read(">h")) != -1:
+        assert field_count == 5
+        id, vector, collection_name, chunk_text, vmetadata = [
+            field() for _ in range(field_count)
+        ]
+
+        if vector is not None:
+            dimensions, unused = struct.unpack(">HH", vector[:4])
+            assert unused == 0
+            assert len(vector) == 4 + 4 * dimensions
+            vector = list(struct.unpack(f">{dimensions}f", vector[4:]))
+
+        if vmetadata is not None:
+            assert vmetadata[:1] == b"\x01"
+            vmetadata = json.loads(vmetadata[1:].decode("utf-8"))
+
+        rows.append(
+            {
+                "id": text(id),
+                "vector": vector,
+                "collection_name": text(collection_name),
+                "text": text(chunk_text),
+                "vmetadata": vmetadata,
+            }
+        )
+
+    assert buffer.read() == b""
+    return rows
+
+
+def test_rows_round_trip():
+    rows = [
+        {
+            "id": "chunk-1",
+            "vector": [0.5, -1.25, 3.0],
+            "collection_name": "file-1",
+            "text": "Één zin met ümlauts en emoji 🙂",
+            "vmetadata": {"file_id": "file-1", "page": 2, "tags": ["a", "b"]},
+        },
+        {
+            "id": "chunk-2",
+            "vector": None,
+            "collection_name": "file-1",
+            "text": None,
+            "vmetadata": None,
+        },
+        {
+            "id": "chunk-3",
+            "vector": [1.0, 0.0],
+            "collection_name": "file-2",
+            "text": "",
+            "vmetadata": {},
+        },
+    ]
+
+    assert decode_copy_rows(encode_copy_rows(rows)) == rows
+
+
+def test_vectors_are_encoded_as_float4():
+    (row,) = decode_copy_rows(
+        encode_copy_rows(
+            [
+                {
+                    "id": "chunk",
+                    "vector": [0.1, 1 / 3],
+                    "collection_name": "file",
+                    "text": "text",
+                    "vmetadata": {},
+                }
+            ]
+        )
+    )
+
+    assert row["vector"] == pytest.approx([0.1, 1 / 3], rel=1e-6)
+    assert row["vector"] != [0.1, 1 / 3]
+
+
+def test_no_rows():
+    assert decode_copy_rows(encode_copy_rows([])) == []
@@ -0,0 +1,157 @@
+import re
+
+import pytest
+
+from open_webui.routers.app_launcher.b1_taalniveau import chunker
+
+
+class WordEncoding:
+    """Deterministic stand-in for tiktoken: every word, with the whitespace before it,
+    is one token, so token offsets do not coincide with every character position."""
+
+    TOKEN_REGEX = re.compile(r"\s*\S+|\s+")
+
+    def __init__(self):
+        self.pieces: list[str] = []
+
+    def _token(self, piece: str) -> int:
+        self.pieces.append(piece)
+        return len(self.pieces) - 1
+
+    def encode_ordinary(self, text: str) -> list[int]:
+        return [self._token(piece) for piece in self.TOKEN_REGEX.findall(text)]
+
+    def encode_ordinary_batch(self, texts: list[str]) -> list[list[int]]:
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode_with_offsets(self, tokens: list[int]) -> tuple[str, list[int]]:
+        text = ""
+        offsets = []
+        for token in tokens:
+            offsets.append(len(text))
+            text += self.pieces[token]
+        return text, offsets
+
+
+@pytest.fixture
+def encoding(monkeypatch):
+    encoding = WordEncoding()
+    monkeypatch.setattr(chunker, "_encoding", encoding)
+    return encoding
+
+
+def split(encoding, paragraph: str, max_tokens: int) -> list[str]:
+    return chunker.split_long_paragraph(
+        paragraph, encoding.encode_ordinary(paragraph), max_tokens
+    )
+
+
+def test_find_cut_prefers_sentence_end():
+    paragraph = "One two. Three four five"
+    assert chunker.find_cut(paragraph, 0, len(paragraph)) == len("One two. ")
+
+
+def test_find_cut_falls_back_to_whitespace():
+    paragraph = "one two three"
+    assert chunker.find_cut(paragraph, 0, len(paragraph)) == len("one two ")
+
+
+def test_find_cut_without_boundary_cuts_at_limit():
+    assert chunker.find_cut("abcdefgh", 0, 5) == 5
+    # A boundary at the start itself does not make progress
+    assert chunker.find_cut("ab cdefgh", 3, 6) == 6
+
+
+def test_find_cut_ignores_boundaries_outside_range():
+    paragraph = "First. second third. fourth"
+    start = len("First. ")
+    assert chunker.find_cut(paragraph, start, len("First. sec")) == len("First. sec")
+
+
+def test_find_cut_accepts_boundary_at_limit():
+    # The token at limit is " four", its leading space is a valid cut
+    paragraph = "One two three. four"
+    assert chunker.find_cut(paragraph, 0, len("One two three.")) == len(
+        "One two three. "
+    )
+
+
+def test_split_long_paragraph_cuts_on_sentences(encoding):
+    paragraph = "One two three. Four five six. Seven eight nine."
+    assert split(encoding, paragraph, 7) == [
+        "One two three. Four five six.",
+        "Seven eight nine.",
+    ]
+
+
+def test_split_long_paragraph_cuts_on_words(encoding):
+    paragraph = "one two three four five six seven"
+    assert split(encoding, paragraph, 3) == [
+        "one two three",
+        "four five six",
+        "seven",
+    ]
+
+
+def test_split_long_paragraph_parts_fit(encoding):
+    paragraph = " ".join(f"word{i}." if i % 5 == 4 else f"word{i}" for i in range(53))
+    for max_tokens in range(1, 12):
+        parts = split(encoding, paragraph, max_tokens)
+        for part in parts:
+            assert len(encoding.encode_ordinary(part)) <= max_tokens
+        # Nothing is lost or duplicated on the cuts
+        assert " ".join(parts).split() == paragraph.split()
+
+
+def test_split_long_paragraph_single_token_limit_makes_progress(encoding):
+    paragraph = "a b c d"
+    assert split(encoding, paragraph, 1) == ["a", "b", "c", "d"]
+
+
+def test_split_long_paragraph_keeps_short_paragraph(encoding):
+    assert split(encoding, "  Short one.  ", 10) == ["Short one."]
+
+
+def test_split_into_chunks_keeps_empty_lines(encoding):
+    text = "First paragraph.\n\nSecond paragraph."
+    assert chunker.split_into_chunks(text, 10) == [
+        "First paragraph.",
+        "",
+        "Second paragraph.",
+    ]
+
+
+def test_split_into_chunks_joins_short_paragraphs(encoding):
+    text = "one two\nthree four\nfive six"
+    assert chunker.split_into_chunks(text, 4) == ["one two\nthree four", "five six"]
+
+
+def test_split_into_chunks_respects_max_tokens(encoding):
+    text = "\n".join(
+        [
+            "Alpha beta gamma. Delta epsilon zeta. Eta theta iota.",
+            "Kappa lambda.",
+            "",
+            "Mu nu xi omicron pi rho sigma tau upsilon.",
+        ]
+    )
+    chunks = chunker.split_into_chunks(text, 5)
+    for chunk in chunks:
+        assert len(encoding.encode_ordinary(chunk)) <= 5
+    assert "" in chunks
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_split_into_chunks_with_tiktoken(monkeypatch):
+    monkeypatch.setattr(chunker, "_encoding", None)
+    try:
+        encoding = chunker.get_encoding()
+    except Exception:
+        pytest.skip(f"{chunker.ENCODING_NAME} encoding is not available")
+
+    # Multi-byte characters make token offsets differ from byte positions
+    text = "Één zin met ë en ü. " * 40 + "\n\n" + "Korte alinea."
+    chunks = chunker.split_into_chunks(text, 32)
+    for chunk in chunks:
+        assert len(encoding.encode_ordinary(chunk)) <= 32
+    assert " ".join(chunks).split() == text.split()
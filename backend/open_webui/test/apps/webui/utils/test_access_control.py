@@ -0,0 +1,136 @@
+import copy
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils import access_control
+
+DEFAULT_USER_PERMISSIONS = {
+    "workspace": {"models": False, "knowledge": False},
+    "chat": {"delete": True, "edit": True, "share": False},
+    "features": {"web_search": True, "notes": False},
+}
+
+DEFAULT_PERMISSIONS = [
+    {},
+    {"chat": {"delete": False}},
+    {"workspace": {"models": True}, "features": {"web_search": False}},
+]
+
+GROUP_PERMISSIONS = [
+    {"chat": {"share": True}},
+    {"workspace": {"knowledge": True}, "chat": {"delete": False}},
+    {"features": {"notes": True, "web_search": False}},
+    {},
+]
+
+PERMISSION_KEYS = [
+    "workspace",
+    "workspace.models",
+    "workspace.knowledge",
+    "chat.delete",
+    "chat.edit",
+    "chat.share",
+    "features.web_search",
+    "features.notes",
+    "features.unknown",
+    "unknown",
+    "unknown.key",
+]
+
+
+def reference_has_permission(
+    groups: list, permission_key: str, default_permissions: dict
+) -> bool:
+    """has_permission as it was before permissions were compiled to a snapshot"""
+
+    def get_permission(permissions: dict, keys: list[str]) -> bool:
+        for key in keys:
+            if key not in permissions:
+                return False
+            permissions = permissions[key]
+        return bool(permissions)
+
+    permission_hierarchy = permission_key.split(".")
+    for group in groups:
+        if get_permission(group.permissions, permission_hierarchy):
+            return True
+
+    default_permissions = access_control.fill_missing_permissions(
+        default_permissions, DEFAULT_USER_PERMISSIONS
+    )
+    return get_permission(default_permissions, permission_hierarchy)
+
+
+@pytest.fixture
+def groups(monkeypatch):
+    groups = []
+    monkeypatch.setattr(
+        access_control, "DEFAULT_USER_PERMISSIONS", DEFAULT_USER_PERMISSIONS
+    )
+    monkeypatch.setattr(
+        access_control.Groups, "get_groups_by_member_id", lambda user_id: groups
+    )
+    access_control.PERMISSIONS_CACHE.clear()
+    yield groups
+    access_control.PERMISSIONS_CACHE.clear()
+
+
+@pytest.mark.parametrize("default_permissions", DEFAULT_PERMISSIONS)
+@pytest.mark.parametrize("group_count", range(len(GROUP_PERMISSIONS) + 1))
+def test_has_permission_matches_reference(groups, default_permissions, group_count):
+    for group_permissions in itertools.combinations(GROUP_PERMISSIONS, group_count):
+        groups[:] = [
+            SimpleNamespace(permissions=permissions)
+            for permissions in group_permissions
+        ]
+        access_control.PERMISSIONS_CACHE.clear()
+
+        for key in PERMISSION_KEYS:
+            expected = reference_has_permission(
+                groups, key, copy.deepcopy(default_permissions)
+            )
+            assert (
+                access_control.has_permission("user", key, default_permissions)
+                == expected
+            ), (key, group_permissions)
+
+        assert access_control.has_permissions(
+            "user", PERMISSION_KEYS, default_permissions
+        ) == {
+            key: reference_has_permission(
+                groups, key, copy.deepcopy(default_permissions)
+            )
+            for key in PERMISSION_KEYS
+        }
+
+
+def test_has_permission_does_not_modify_defaults(groups):
+    expected_user_permissions = copy.deepcopy(DEFAULT_USER_PERMISSIONS)
+    groups.append(SimpleNamespace(permissions={"features": {"notes": True}}))
+
+    default_permissions = {"chat": {"delete": False}}
+    access_control.has_permission("user", "chat.edit", default_permissions)
+    assert default_permissions == {"chat": {"delete": False}}
+    assert DEFAULT_USER_PERMISSIONS == expected_user_permissions
+
+
+def test_changed_defaults_are_picked_up(groups):
+    assert access_control.has_permission("user", "chat.delete", {})
+    assert not access_control.has_permission(
+        "user", "chat.delete", {"chat": {"delete": False}}
+    )
+    assert access_control.has_permission(
+        "user", "chat.delete", {"chat": {"delete": True}}
+    )
+
+
+def test_permissions_invalidation(groups):
+    assert not access_control.has_permission("user", "features.notes", {})
+
+    groups.append(SimpleNamespace(permissions={"features": {"notes": True}}))
+    # Cached until the memberships of the user are invalidated
+    assert not access_control.has_permission("user", "features.notes", {})
+    access_control.INVALIDATION_BUS.publish("group_member", ["user"])
+    assert access_control.has_permission("user", "features.notes", {})
@@ -0,0 +1,132 @@
+import pytest
+
+from open_webui.utils import cache
+from open_webui.utils.cache import InvalidationBus, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    return clock
+
+
+def test_get_and_set():
+    ttl_cache = TTLCache(10, 60)
+    assert ttl_cache.get("a") is None
+    ttl_cache.set("a", 1)
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get_stats()["hits"] == 1
+    assert ttl_cache.get_stats()["misses"] == 1
+
+
+def test_entries_expire(clock):
+    ttl_cache = TTLCache(10, 60)
+    ttl_cache.set("a", 1)
+    clock.now += 59
+    assert ttl_cache.get("a") == 1
+    clock.now += 2
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.get_stats()["size"] == 0
+
+
+def test_least_recently_used_is_evicted():
+    ttl_cache = TTLCache(2, 60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("c") == 3
+
+
+def test_disabled_cache_stores_nothing():
+    ttl_cache = TTLCache(10, 0)
+    ttl_cache.set("a", 1)
+    assert ttl_cache.get("a") is None
+    assert not ttl_cache.get_stats()["enabled"]
+
+
+def test_set_with_current_generation_stores():
+    ttl_cache = TTLCache(10, 60)
+    generation = ttl_cache.get_generation()
+    ttl_cache.set("a", 1, generation)
+    assert ttl_cache.get("a") == 1
+
+
+@pytest.mark.parametrize("invalidate", ["delete", "clear"])
+def test_set_after_invalidation_is_skipped(invalidate):
+    ttl_cache = TTLCache(10, 60)
+    # A value loaded before an invalidation may be stale and must not be stored
+    generation = ttl_cache.get_generation()
+    if invalidate == "delete":
+        ttl_cache.delete("other")
+    else:
+        ttl_cache.clear()
+    ttl_cache.set("a", 1, generation)
+    assert ttl_cache.get("a") is None
+
+    # A value loaded after the invalidation is stored again
+    ttl_cache.set("a", 2, ttl_cache.get_generation())
+    assert ttl_cache.get("a") == 2
+
+
+def test_delete_and_clear():
+    ttl_cache = TTLCache(10, 60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.delete("a")
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.get("b") == 2
+    ttl_cache.clear()
+    assert ttl_cache.get("b") is None
+
+
+def test_invalidation_bus_dispatches_locally():
+    bus = InvalidationBus("test-channel")
+    received = []
+    bus.subscribe("topic", received.append)
+    bus.subscribe("other", lambda data: received.append(("other", data)))
+
+    bus.publish("topic", ["a"])
+    assert received == [["a"]]
+
+
+def test_invalidation_bus_local_only_handlers():
+    bus = InvalidationBus("test-channel")
+    received = []
+    bus.subscribe("topic", lambda data: received.append(("all", data)))
+    bus.subscribe(
+        "topic", lambda data: received.append(("local", data)), local_only=True
+    )
+
+    bus.publish("topic", "a")
+    assert received == [("all", "a"), ("local", "a")]
+
+    # Received from another instance, or after an interrupted subscription
+    received.clear()
+    bus._dispatch("topic", "b")
+    bus._dispatch_all()
+    assert received == [("all", "b"), ("all", None)]
+
+
+def test_invalidation_bus_handler_errors_are_isolated():
+    bus = InvalidationBus("test-channel")
+    received = []
+
+    def failing_handler(data):
+        raise RuntimeError("boom")
+
+    bus.subscribe("topic", failing_handler)
+    bus.subscribe("topic", received.append)
+    bus.publish("topic", None)
+    assert received == [None]
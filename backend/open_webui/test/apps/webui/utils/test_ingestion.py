@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from test.util.abstract_integration_test import AbstractPostgresTest
+
+# open_webui is imported in the tests: AbstractPostgresTest has to set the database
+# URL first
+
+QUEUED, PROCESSING, DONE, FAILED = "queued", "processing", "done", "failed"
+
+
+class TestFileClaims(AbstractPostgresTest):
+    BASE_PATH = "/api/v1/files"
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        from open_webui.models.files import File, FileForm, Files
+
+        cls.file_table = File
+        cls.file_form = FileForm
+        cls.files = Files
+
+    def teardown_method(self):
+        from open_webui.internal.db import get_db
+
+        with get_db() as db:
+            db.query(self.file_table).delete()
+            db.commit()
+        super().teardown_method()
+
+    def insert_file(self, id: str, status: str):
+        self.files.insert_new_file(
+            "user",
+            self.file_form(
+                id=id, filename=f"{id}.txt", path=f"/tmp/{id}.txt", status=status
+            ),
+        )
+
+    def set_updated_at(self, id: str, updated_at: int):
+        from open_webui.internal.db import get_db
+
+        with get_db() as db:
+            db.query(self.file_table).filter_by(id=id).update(
+                {"updated_at": updated_at}
+            )
+            db.commit()
+
+    def test_queued_file_is_claimed_once(self):
+        self.insert_file("queued", QUEUED)
+        stale_before = int(time.time()) - 60
+
+        assert self.files.get_file_ids_to_process(stale_before, 10) == ["queued"]
+        assert self.files.claim_file_for_processing("queued", stale_before)
+        assert not self.files.claim_file_for_processing("queued", stale_before)
+        assert self.files.get_file_by_id("queued").status == PROCESSING
+        assert self.files.get_file_ids_to_process(stale_before, 10) == []
+
+    def test_abandoned_file_is_claimed_again(self):
+        self.insert_file("abandoned", PROCESSING)
+        now = int(time.time())
+
+        # Still within the heartbeat timeout of its worker
+        assert self.files.get_file_ids_to_process(now - 60, 10) == []
+        assert not self.files.claim_file_for_processing("abandoned", now - 60)
+
+        self.set_updated_at("abandoned", now - 120)
+        assert self.files.get_file_ids_to_process(now - 60, 10) == ["abandoned"]
+        assert self.files.claim_file_for_processing("abandoned", now - 60)
+        # Claiming is a heartbeat
+        assert not self.files.claim_file_for_processing("abandoned", now - 60)
+
+    def test_finished_files_are_not_claimed(self):
+        self.insert_file("done", DONE)
+        self.insert_file("failed", FAILED)
+        self.set_updated_at("done", 0)
+        self.set_updated_at("failed", 0)
+        stale_before = int(time.time())
+
+        assert self.files.get_file_ids_to_process(stale_before, 10) == []
+        assert not self.files.claim_file_for_processing("done", stale_before)
+        assert not self.files.claim_file_for_processing("failed", stale_before)
+
+
+class FakeFiles:
+    def __init__(self):
+        self.statuses = {}
+
+    def claim_file_for_processing(self, id, stale_before):
+        if self.statuses.get(id) != QUEUED:
+            return False
+        self.statuses[id] = PROCESSING
+        return True
+
+    def get_file_by_id(self, id):
+        return SimpleNamespace(
+            id=id, user_id="user", status=self.statuses[id], data={}, meta={}
+        )
+
+    def touch_file_by_id(self, id):
+        pass
+
+    def update_file_status_by_id(self, id, status, error=None):
+        self.statuses[id] = status
+        return self.get_file_by_id(id)
+
+
+@pytest.fixture
+def ingestion():
+    from open_webui.utils import ingestion
+
+    return ingestion
+
+
+@pytest.fixture
+def files(ingestion, monkeypatch):
+    files = FakeFiles()
+    monkeypatch.setattr(ingestion, "Files", files)
+    monkeypatch.setattr(
+        ingestion, "Users", SimpleNamespace(get_user_by_id=lambda id: None)
+    )
+
+    async def emit_to_user(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(ingestion, "emit_to_user", emit_to_user)
+    return files
+
+
+def test_cancelled_worker_finishes_the_file(ingestion, files, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    processed = []
+
+    def process_uploaded_file(request, file, user):
+        started.set()
+        release.wait(5)
+        processed.append(file.id)
+
+    monkeypatch.setattr(ingestion, "process_uploaded_file", process_uploaded_file)
+    files.statuses["file"] = QUEUED
+
+    async def run():
+        queue = ingestion.IngestionQueue(
+            concurrency=1, poll_interval=60, stale_timeout=60
+        )
+        task = asyncio.create_task(queue._process("file"))
+        await asyncio.to_thread(started.wait, 5)
+
+        task.cancel()
+        await asyncio.sleep(0.05)
+        # Not queued again while its thread is still processing it
+        assert files.statuses["file"] == PROCESSING
+
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert processed == ["file"]
+    assert files.statuses["file"] == DONE
+
+
+def test_failed_processing_is_recorded(ingestion, files, monkeypatch):
+    def process_uploaded_file(request, file, user):
+        raise ValueError("no content")
+
+    monkeypatch.setattr(ingestion, "process_uploaded_file", process_uploaded_file)
+    files.statuses["file"] = QUEUED
+
+    queue = ingestion.IngestionQueue(concurrency=1, poll_interval=60, stale_timeout=60)
+    asyncio.run(queue._process("file"))
+
+    assert files.statuses["file"] == FAILED
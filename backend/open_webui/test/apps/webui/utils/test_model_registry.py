@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils import model_registry
+from open_webui.utils.model_registry import ModelRegistry
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+
+OPENAI_MODELS = {"gpt-4o": {"id": "gpt-4o", "urlIdx": 0}}
+OLLAMA_MODELS = {"llama3:latest": {"model": "llama3:latest", "urls": [0]}}
+
+
+async def fake_get_all_models(request, user=None):
+    request.app.state.OPENAI_MODELS = OPENAI_MODELS
+    request.app.state.OLLAMA_MODELS = OLLAMA_MODELS
+    return [{"id": "gpt-4o"}, {"id": "llama3:latest"}]
+
+
+def make_app(enable_ollama_api=True):
+    config = SimpleNamespace(
+        ENABLE_OPENAI_API=True, ENABLE_OLLAMA_API=enable_ollama_api
+    )
+    return SimpleNamespace(
+        state=SimpleNamespace(
+            config=config, MODELS={}, OPENAI_MODELS={}, OLLAMA_MODELS={}
+        )
+    )
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    monkeypatch.setattr(model_registry, "get_all_models", fake_get_all_models)
+    return FakeRedis()
+
+
+def make_registry(redis, app=None):
+    registry = ModelRegistry(60)
+    registry.redis = redis
+    registry.app = app
+    return registry
+
+
+def test_published_snapshot_is_applied_on_another_instance(redis):
+    first_app, second_app = make_app(), make_app()
+    first = make_registry(redis, first_app)
+    second = make_registry(redis, second_app)
+
+    asyncio.run(first.rebuild(first_app))
+
+    assert second.version == first.version == 1
+    assert set(second_app.state.MODELS) == {"gpt-4o", "llama3:latest"}
+    assert second_app.state.OPENAI_MODELS == OPENAI_MODELS
+    # Chat completions of Ollama models look their connection up here
+    assert second_app.state.OLLAMA_MODELS == OLLAMA_MODELS
+
+
+def test_new_instance_starts_from_the_stored_snapshot(redis, monkeypatch):
+    first_app = make_app()
+    asyncio.run(make_registry(redis, first_app).rebuild(first_app))
+
+    async def fail_get_all_models(request, user=None):
+        raise AssertionError("the stored registry should be loaded")
+
+    monkeypatch.setattr(model_registry, "get_all_models", fail_get_all_models)
+
+    app = make_app()
+    registry = make_registry(redis)
+    asyncio.run(registry.ensure_built(app))
+
+    assert registry.version == 1
+    assert app.state.OLLAMA_MODELS == OLLAMA_MODELS
+    request = SimpleNamespace(app=app)
+    models = asyncio.run(registry.get_models(request))
+    assert [model["id"] for model in models] == ["gpt-4o", "llama3:latest"]
+
+
+def test_disabled_ollama_api_stores_no_ollama_models(redis):
+    first_app, second_app = make_app(enable_ollama_api=False), make_app()
+    second_app.state.OLLAMA_MODELS = OLLAMA_MODELS
+    first = make_registry(redis, first_app)
+    make_registry(redis, second_app)
+
+    asyncio.run(first.rebuild(first_app))
+
+    assert second_app.state.OLLAMA_MODELS == {}
@@ -0,0 +1,154 @@
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils import plugin
+from open_webui.utils.cache import InvalidationBus
+from open_webui.utils.plugin import FunctionRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeFunctions:
+    def __init__(self):
+        self.functions = {}
+        self.valves = {}
+        self.loads = 0
+        self.updated_at_lookups = 0
+
+    def save(self, id, content, valves=None):
+        previous = self.functions.get(id)
+        self.functions[id] = SimpleNamespace(
+            id=id,
+            type="filter",
+            content=content,
+            updated_at=previous.updated_at + 1 if previous else 1,
+            meta=SimpleNamespace(manifest={}),
+        )
+        self.valves[id] = valves or {}
+
+    def get_function_by_id(self, id):
+        self.loads += 1
+        return self.functions.get(id)
+
+    def get_function_valves_by_id(self, id):
+        return self.valves.get(id)
+
+    def get_function_updated_at_by_id(self, id):
+        self.updated_at_lookups += 1
+        function = self.functions.get(id)
+        return function.updated_at if function else None
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(plugin.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def functions(monkeypatch):
+    functions = FakeFunctions()
+    monkeypatch.setattr(plugin, "Functions", functions)
+    return functions
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    bus = InvalidationBus("test")
+    monkeypatch.setattr(plugin, "INVALIDATION_BUS", bus)
+    return bus
+
+
+@pytest.fixture
+def executed(monkeypatch):
+    executed = []
+
+    def load_function_module_by_id(function_id, content):
+        executed.append(content)
+        return SimpleNamespace(content=content), "filter", {}
+
+    monkeypatch.setattr(
+        plugin, "load_function_module_by_id", load_function_module_by_id
+    )
+    return executed
+
+
+def test_function_is_cached_until_invalidated(clock, functions, bus):
+    registry = FunctionRegistry(3600)
+    functions.save("f", "v1")
+
+    assert registry.get_function("f").content == "v1"
+    assert registry.get_function("f").content == "v1"
+    assert functions.loads == 1
+
+    functions.save("f", "v2", {"priority": 1})
+    bus.publish("functions", "f")
+
+    assert registry.get_function("f").content == "v2"
+    assert registry.get_valves("f") == {"priority": 1}
+    assert functions.loads == 2
+
+
+def test_missed_invalidation_is_caught_by_updated_at(clock, functions, bus):
+    registry = FunctionRegistry(3600)
+    functions.save("f", "v1")
+    registry.get_function("f")
+
+    # Unchanged: only updated_at is looked up, once per VERIFY_INTERVAL
+    clock.now += FunctionRegistry.VERIFY_INTERVAL + 1
+    assert registry.get_function("f").content == "v1"
+    assert registry.get_function("f").content == "v1"
+    assert (functions.loads, functions.updated_at_lookups) == (1, 1)
+
+    # Changed by an instance whose invalidation did not arrive
+    functions.save("f", "v2")
+    assert registry.get_function("f").content == "v1"
+
+    clock.now += FunctionRegistry.VERIFY_INTERVAL + 1
+    assert registry.get_function("f").content == "v2"
+    assert functions.loads == 2
+
+
+def test_deleted_function_is_dropped(clock, functions, bus):
+    registry = FunctionRegistry(3600)
+    functions.save("f", "v1")
+    registry.get_function("f")
+
+    del functions.functions["f"]
+    clock.now += FunctionRegistry.VERIFY_INTERVAL + 1
+
+    assert registry.get_function("f") is None
+    assert registry.get_valves("f") == {}
+    with pytest.raises(Exception, match="Function not found: f"):
+        registry.get_module(None, "f")
+
+
+def test_module_is_executed_again_only_for_new_content(clock, functions, bus, executed):
+    registry = FunctionRegistry(3600)
+    functions.save("f", "v1")
+
+    module, function_type, _ = registry.get_module(None, "f")
+    assert (module.content, function_type) == ("v1", "filter")
+    registry.get_module(None, "f")
+    assert executed == ["v1"]
+
+    # New valves (or a toggle) do not change the module
+    functions.save("f", "v1", {"priority": 2})
+    bus.publish("function_valves", "f")
+    registry.get_module(None, "f")
+    assert executed == ["v1"]
+    assert registry.get_valves("f") == {"priority": 2}
+
+    functions.save("f", "v2")
+    bus.publish("functions", "f")
+    module, _, _ = registry.get_module(None, "f")
+    assert module.content == "v2"
+    assert executed == ["v1", "v2"]
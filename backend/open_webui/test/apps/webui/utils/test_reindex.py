@@ -0,0 +1,183 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils import reindex
+from open_webui.utils.reindex import KnowledgeReindexer, ReindexLease, ReindexStatus
+
+
+class FakeVectorDB:
+    supports_replace_collection = True
+
+    def __init__(self):
+        # collection name -> ids of the files indexed in it
+        self.collections = {}
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+    def delete(self, collection_name, filter):
+        self.collections.get(collection_name, set()).discard(filter["file_id"])
+
+    def replace_collection(self, collection_name, source_collection_name):
+        self.collections[collection_name] = self.collections.pop(source_collection_name)
+
+
+class FakeKnowledges:
+    def __init__(self, knowledge_bases):
+        self.knowledge_bases = {
+            id: SimpleNamespace(id=id, data={"file_ids": file_ids})
+            for id, file_ids in knowledge_bases.items()
+        }
+
+    def get_knowledge_bases(self):
+        return list(self.knowledge_bases.values())
+
+    def get_knowledge_by_id(self, id):
+        return self.knowledge_bases.get(id)
+
+
+class FakeFiles:
+    def __init__(self):
+        self.metadata = {}
+
+    def get_files_by_ids(self, ids):
+        return [SimpleNamespace(id=id) for id in ids]
+
+    def update_file_metadata_by_id(self, id, meta):
+        self.metadata[id] = meta
+
+
+@pytest.fixture
+def vector_db(monkeypatch):
+    vector_db = FakeVectorDB()
+    monkeypatch.setattr(reindex, "VECTOR_DB_CLIENT", vector_db)
+    monkeypatch.setattr(reindex, "Files", FakeFiles())
+    monkeypatch.setattr(
+        reindex, "Users", SimpleNamespace(get_user_by_id=lambda id: None)
+    )
+    monkeypatch.setattr(
+        reindex,
+        "ChunkEmbeddings",
+        SimpleNamespace(
+            delete_references=lambda collection_name: None,
+            replace_references=lambda collection_name, source_collection_name: None,
+        ),
+    )
+    monkeypatch.setattr(
+        reindex,
+        "BM25_INDEX",
+        SimpleNamespace(delete_collection=lambda collection_name: None),
+    )
+    return vector_db
+
+
+def make_reindexer(vector_db, tmp_path, failing_file_ids=()):
+    reindexer = KnowledgeReindexer(
+        tmp_path / "state.json", 2, ReindexLease(tmp_path / "state.lock")
+    )
+    processed = []
+
+    def process_file(user, collection_name, file_id, resumed):
+        processed.append((file_id, resumed))
+        if file_id in failing_file_ids:
+            raise ValueError(f"cannot read {file_id}")
+        vector_db.collections.setdefault(collection_name, set()).add(file_id)
+
+    reindexer._process_file = process_file
+    return reindexer, processed
+
+
+def run(reindexer, resume=False):
+    async def run():
+        if resume:
+            reindexer.resume(app=None)
+            await reindexer.resume_task
+        else:
+            assert reindexer.start(app=None, user=SimpleNamespace(id="user"))
+        await reindexer.task
+
+    asyncio.run(run())
+
+
+def test_shadow_collections_replace_the_live_ones(vector_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        reindex, "Knowledges", FakeKnowledges({"kb1": ["a", "b"], "kb2": ["c"]})
+    )
+    vector_db.collections = {"kb1": {"old"}, "kb2": {"old"}}
+    reindexer, processed = make_reindexer(vector_db, tmp_path)
+
+    run(reindexer)
+
+    assert sorted(processed) == [("a", False), ("b", False), ("c", False)]
+    # The shadow collections were swapped in and are gone
+    assert vector_db.collections == {"kb1": {"a", "b"}, "kb2": {"c"}}
+    assert reindex.Files.metadata["a"] == {"collection_name": "kb1"}
+
+    status = reindexer.get_status()
+    assert status["status"] == ReindexStatus.COMPLETED
+    assert (status["files_done"], status["knowledge_bases_done"]) == (3, 2)
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["status"] == ReindexStatus.COMPLETED
+
+
+def test_failed_knowledge_base_keeps_its_index(vector_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(reindex, "Knowledges", FakeKnowledges({"kb1": ["a"]}))
+    vector_db.collections = {"kb1": {"old"}}
+    reindexer, _ = make_reindexer(vector_db, tmp_path, failing_file_ids={"a"})
+
+    run(reindexer)
+
+    assert vector_db.collections == {"kb1": {"old"}}
+    status = reindexer.get_status()
+    assert status["files_failed"] == 1
+    assert status["errors"] == [
+        {"knowledge_id": "kb1", "file_id": "a", "error": "cannot read a"}
+    ]
+
+
+def test_interrupted_reindex_resumes_from_its_checkpoint(
+    vector_db, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(reindex, "Knowledges", FakeKnowledges({"kb1": ["a", "b"]}))
+    shadow_collection_name = reindex.get_shadow_collection_name("kb1", "reindex-id")
+    # Written by a worker that stopped while processing "b"
+    vector_db.collections = {"kb1": {"old"}, shadow_collection_name: {"a", "b"}}
+    (tmp_path / "state.json").write_text(
+        json.dumps(
+            {
+                "id": "reindex-id",
+                "status": ReindexStatus.RUNNING,
+                "user_id": "user",
+                "shadow_collections": True,
+                "knowledge": {
+                    "kb1": {
+                        "collection_name": shadow_collection_name,
+                        "file_ids": ["a", "b"],
+                        "done": ["a"],
+                        "failed": {},
+                        "cleared": True,
+                        "swapped": False,
+                    }
+                },
+                "deleted_knowledge_bases": [],
+                "error": None,
+                "started_at": 0,
+                "updated_at": 0,
+                "completed_at": None,
+            }
+        )
+    )
+    reindexer, processed = make_reindexer(vector_db, tmp_path)
+
+    run(reindexer, resume=True)
+
+    # Only the unfinished file, flagged to remove what the interrupted run wrote for it
+    assert processed == [("b", True)]
+    assert vector_db.collections == {"kb1": {"a", "b"}}
+    assert reindexer.get_status()["status"] == ReindexStatus.COMPLETED
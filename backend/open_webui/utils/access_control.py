@@ -4,6 +4,9 @@ from open_webui.models.groups import Groups
 
 
 from open_webui.config import DEFAULT_USER_PERMISSIONS
+from open_webui.env import USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL
+from open_webui.utils.cache import INVALIDATION_BUS, TTLCache
+import hashlib
 import json
 
 
@@ -25,48 +28,102 @@ def fill_missing_permissions(
     return permissions
 
 
-def get_permissions(
-    user_id: str,
-    default_permissions: Dict[str, Any],
+# Effective permissions by user id, as (default permissions fingerprint, snapshot)
+PERMISSIONS_CACHE = TTLCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL)
+
+
+def _on_permissions_invalidated(user_ids: Optional[list[str]]):
+    if user_ids is None:
+        PERMISSIONS_CACHE.clear()
+    else:
+        for user_id in user_ids:
+            PERMISSIONS_CACHE.delete(user_id)
+
+
+# Membership changes (and deleted groups) as well as changed group permissions
+INVALIDATION_BUS.subscribe("group_member", _on_permissions_invalidated)
+INVALIDATION_BUS.subscribe("group_permissions", _on_permissions_invalidated)
+
+
+def combine_permissions(
+    permissions: Dict[str, Any], group_permissions: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Combine permissions from multiple groups by taking the most permissive value."""
+    for key, value in group_permissions.items():
+        if isinstance(value, dict):
+            if key not in permissions:
+                permissions[key] = {}
+            permissions[key] = combine_permissions(permissions[key], value)
+        else:
+            if key not in permissions:
+                permissions[key] = value
+            else:
+                permissions[key] = (
+                    permissions[key] or value
+                )  # Use the most permissive value (True > False)
+    return permissions
+
+
+def flatten_permissions(
+    permissions: Dict[str, Any], prefix: str = ""
+) -> Dict[str, bool]:
+    """Flatten a permissions tree to dotted keys, e.g. {"chat.delete": True}. Inner
+    nodes are included too, as has_permission accepts any level of the hierarchy."""
+    flat = {}
+    for key, value in permissions.items():
+        path = f"{prefix}{key}"
+        flat[path] = bool(value)
+        if isinstance(value, dict):
+            flat.update(flatten_permissions(value, f"{path}."))
+    return flat
+
+
+def get_permissions_snapshot(
+    user_id: str, default_permissions: Dict[str, Any]
 ) -> Dict[str, Any]:
     """
-    Get all permissions for a user by combining the permissions of all groups the user is a member of.
-    If a permission is defined in multiple groups, the most permissive value is used (True > False).
-    Permissions are nested in a dict with the permission key as the key and a boolean as the value.
+    The effective permissions of a user: {"permissions": nested dict, "flat": dotted
+    keys -> bool}. Compiled once from the default permissions (completed with
+    DEFAULT_USER_PERMISSIONS) and the permissions of all groups of the user, and cached
+    until the groups or memberships of the user change. The cached entry is keyed by a
+    fingerprint of the default permissions, so changed defaults are picked up on every
+    instance. The snapshot is shared, do not modify it.
     """
+    default_permissions_json = json.dumps(default_permissions, sort_keys=True)
+    fingerprint = hashlib.sha256(default_permissions_json.encode()).hexdigest()
 
-    def combine_permissions(
-        permissions: Dict[str, Any], group_permissions: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Combine permissions from multiple groups by taking the most permissive value."""
-        for key, value in group_permissions.items():
-            if isinstance(value, dict):
-                if key not in permissions:
-                    permissions[key] = {}
-                permissions[key] = combine_permissions(permissions[key], value)
-            else:
-                if key not in permissions:
-                    permissions[key] = value
-                else:
-                    permissions[key] = (
-                        permissions[key] or value
-                    )  # Use the most permissive value (True > False)
-        return permissions
+    entry = PERMISSIONS_CACHE.get(user_id)
+    if entry is not None and entry[0] == fingerprint:
+        return entry[1]
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
+    generation = PERMISSIONS_CACHE.get_generation()
 
-    # Deep copy default permissions to avoid modifying the original dict
-    permissions = json.loads(json.dumps(default_permissions))
+    # Deep copy both defaults: filling in shares the nested dicts of the template, which
+    # combining the group permissions then modifies
+    permissions = fill_missing_permissions(
+        json.loads(default_permissions_json),
+        json.loads(json.dumps(DEFAULT_USER_PERMISSIONS)),
+    )
 
     # Combine permissions from all user groups
-    for group in user_groups:
-        group_permissions = group.permissions
-        permissions = combine_permissions(permissions, group_permissions)
+    for group in Groups.get_groups_by_member_id(user_id):
+        permissions = combine_permissions(permissions, group.permissions or {})
 
-    # Ensure all fields from default_permissions are present and filled in
-    permissions = fill_missing_permissions(permissions, default_permissions)
+    snapshot = {"permissions": permissions, "flat": flatten_permissions(permissions)}
+    PERMISSIONS_CACHE.set(user_id, (fingerprint, snapshot), generation)
+    return snapshot
 
-    return permissions
+
+def get_permissions(
+    user_id: str,
+    default_permissions: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Get all permissions for a user by combining the permissions of all groups the user is a member of.
+    If a permission is defined in multiple groups, the most permissive value is used (True > False).
+    Permissions are nested in a dict with the permission key as the key and a boolean as the value.
+    """
+    return get_permissions_snapshot(user_id, default_permissions)["permissions"]
 
 
 def has_permission(
@@ -80,31 +137,19 @@ def has_permission(
 
     Permission keys can be hierarchical and separated by dots ('.').
     """
+    flat = get_permissions_snapshot(user_id, default_permissions)["flat"]
+    # If any part of the hierarchy is missing, deny access
+    return flat.get(permission_key, False)
 
-    def get_permission(permissions: Dict[str, Any], keys: List[str]) -> bool:
-        """Traverse permissions dict using a list of keys (from dot-split permission_key)."""
-        for key in keys:
-            if key not in permissions:
-                return False  # If any part of the hierarchy is missing, deny access
-            permissions = permissions[key]  # Traverse one level deeper
-
-        return bool(permissions)  # Return the boolean at the final level
-
-    permission_hierarchy = permission_key.split(".")
-
-    # Retrieve user group permissions
-    user_groups = Groups.get_groups_by_member_id(user_id)
-
-    for group in user_groups:
-        group_permissions = group.permissions
-        if get_permission(group_permissions, permission_hierarchy):
-            return True
 
-    # Check default permissions afterward if the group permissions don't allow it
-    default_permissions = fill_missing_permissions(
-        default_permissions, DEFAULT_USER_PERMISSIONS
-    )
-    return get_permission(default_permissions, permission_hierarchy)
+def has_permissions(
+    user_id: str,
+    permission_keys: List[str],
+    default_permissions: Dict[str, Any] = {},
+) -> Dict[str, bool]:
+    """Check many permissions of a user at once, returns permission key -> allowed."""
+    flat = get_permissions_snapshot(user_id, default_permissions)["flat"]
+    return {key: flat.get(key, False) for key in permission_keys}
 
 
 def has_access(
@@ -115,15 +160,17 @@ def has_access(
     if access_control is None:
         return type == "read"
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
-    user_group_ids = [group.id for group in user_groups]
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
     permitted_user_ids = permission_access.get("user_ids", [])
 
-    return user_id in permitted_user_ids or any(
-        group_id in permitted_group_ids for group_id in user_group_ids
-    )
+    if user_id in permitted_user_ids:
+        return True
+    if not permitted_group_ids:
+        return False
+
+    user_group_ids = Groups.get_group_ids_by_member_id(user_id)
+    return not set(permitted_group_ids).isdisjoint(user_group_ids)
 
 
 # Get all users with access to a resource
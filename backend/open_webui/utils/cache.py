@@ -0,0 +1,223 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from open_webui.env import (
+    CACHE_INVALIDATION_CHANNEL,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries expire after `ttl` seconds, safe to use
+    from the worker threads that run sync endpoints. A ttl of 0 disables the cache.
+
+    Loading a value and storing it is not atomic, so an invalidation can happen in
+    between and the stored value would be stale. Callers that load from the database
+    pass the `generation` read before loading to `set`, which then skips storing if
+    anything was invalidated meanwhile.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.stats = {"hits": 0, "misses": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self.entries[key]
+                entry = None
+
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def get_generation(self) -> int:
+        with self.lock:
+            return self.generation
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        if not self.enabled:
+            return
+
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            self.entries[key] = (time.time() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.generation += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            stats = {**self.stats, "size": len(self.entries)}
+
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            **stats,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+class InvalidationBus:
+    """
+    Fans cache invalidations out to all instances.
+
+    Caches register a handler per topic. `publish` runs the handlers of this process
+    right away and, with a Redis URL, sends the invalidation over Redis pub/sub to the
+    other instances, where a subscriber thread (started with `start`) runs their
+    handlers. Handlers get the published data, or None meaning "drop everything": that
+    is also sent to all topics when the subscription was interrupted, as invalidations
+    may have been missed in the meantime.
+
+    Handlers subscribed with `local_only` only run for invalidations published by this
+    instance, for work that one instance does on behalf of all of them.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = None,
+    ):
+        self.channel = channel
+        self.instance_id = str(uuid.uuid4())
+        self.handlers: dict[str, list[Callable[[Any], None]]] = {}
+        self.local_handlers: dict[str, list[Callable[[Any], None]]] = {}
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+        self.redis = None
+        if redis_url:
+            self.redis = get_redis_connection(
+                redis_url, redis_sentinels, decode_responses=True
+            )
+
+    def subscribe(
+        self, topic: str, handler: Callable[[Any], None], local_only: bool = False
+    ):
+        handlers = self.local_handlers if local_only else self.handlers
+        handlers.setdefault(topic, []).append(handler)
+
+    def publish(self, topic: str, data: Any = None):
+        self._dispatch(topic, data, local=True)
+
+        if self.redis is not None:
+            try:
+                self.redis.publish(
+                    self.channel,
+                    json.dumps(
+                        {"origin": self.instance_id, "topic": topic, "data": data}
+                    ),
+                )
+            except Exception as e:
+                # Other instances fall back to the TTL of their caches
+                log.warning(f"Error publishing cache invalidation of {topic}: {e}")
+
+    def _dispatch(self, topic: str, data: Any, local: bool = False):
+        handlers = self.handlers.get(topic, [])
+        if local:
+            handlers = handlers + self.local_handlers.get(topic, [])
+
+        for handler in handlers:
+            try:
+                handler(data)
+            except Exception as e:
+                log.exception(f"Error invalidating cache of {topic}: {e}")
+
+    def _dispatch_all(self):
+        for topic in list(self.handlers.keys()):
+            self._dispatch(topic, None)
+
+    def _listen(self):
+        interrupted = False
+        while not self.stop_event.is_set():
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                if interrupted:
+                    self._dispatch_all()
+                    interrupted = False
+
+                while not self.stop_event.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None or message.get("type") != "message":
+                        continue
+
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") != self.instance_id:
+                        self._dispatch(payload.get("topic"), payload.get("data"))
+            except Exception as e:
+                log.warning(f"Cache invalidation subscription interrupted: {e}")
+                interrupted = True
+                self.stop_event.wait(1)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+    def start(self):
+        if self.redis is None or self.thread is not None:
+            return
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._listen, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+
+        self.stop_event.set()
+        self.thread.join(timeout=5)
+        self.thread = None
+
+
+INVALIDATION_BUS = InvalidationBus(
+    CACHE_INVALIDATION_CHANNEL,
+    REDIS_URL,
+    get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
@@ -41,6 +41,7 @@ from open_webui.models.models import Models
 
 
 from open_webui.utils.plugin import (
+    FUNCTION_REGISTRY,
     load_function_module_by_id,
     get_function_module_from_cache,
 )
@@ -333,7 +334,7 @@ async def chat_completed(request: Request, form_data: dict, user: Any):
 
     try:
         filter_functions = [
-            Functions.get_function_by_id(filter_id)
+            FUNCTION_REGISTRY.get_function(filter_id)
             for filter_id in get_sorted_filter_ids(
                 request, model, metadata.get("filter_ids", [])
             )
@@ -398,7 +399,7 @@ async def chat_action(request: Request, action_id: str, form_data: dict, user: A
     function_module, _, _ = get_function_module_from_cache(request, action_id)
 
     if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-        valves = Functions.get_function_valves_by_id(action_id)
+        valves = FUNCTION_REGISTRY.get_valves(action_id)
         function_module.valves = function_module.Valves(**(valves if valves else {}))
 
     if hasattr(function_module, "action"):
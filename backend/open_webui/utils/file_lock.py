@@ -0,0 +1,56 @@
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: lock the first byte of the file with msvcrt instead
+    fcntl = None
+    import msvcrt
+
+# Seconds between attempts to take a lock held by another process, on Windows
+POLL_INTERVAL = 0.1
+
+
+def lock_file(file, blocking: bool = True) -> bool:
+    """
+    Lock an open file exclusively, shared by the processes of this host. Without
+    blocking, returns False if another process holds the lock.
+    """
+    if fcntl is not None:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+        return True
+
+    while True:
+        file.seek(0)
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(POLL_INTERVAL)
+
+
+def unlock_file(file):
+    if fcntl is not None:
+        fcntl.flock(file, fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def locked(path: Path):
+    """Hold the lock of a lock file, which is created if needed and kept: removing it
+    could let two holders lock different files"""
+    with open(path, "a") as file:
+        lock_file(file)
+        try:
+            yield
+        finally:
+            unlock_file(file)
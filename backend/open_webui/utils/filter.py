@@ -2,6 +2,7 @@ import inspect
 import logging
 
 from open_webui.utils.plugin import (
+    FUNCTION_REGISTRY,
     load_function_module_by_id,
     get_function_module_from_cache,
 )
@@ -23,38 +24,7 @@ def get_function_module(request, function_id, load_from_db=True):
 
 
 def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None):
-    def get_priority(function_id):
-        function = Functions.get_function_by_id(function_id)
-        if function is not None:
-            valves = Functions.get_function_valves_by_id(function_id)
-            return valves.get("priority", 0) if valves else 0
-        return 0
-
-    filter_ids = [function.id for function in Functions.get_global_filter_functions()]
-    if "info" in model and "meta" in model["info"]:
-        filter_ids.extend(model["info"]["meta"].get("filterIds", []))
-        filter_ids = list(set(filter_ids))
-    active_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
-    ]
-
-    def get_active_status(filter_id):
-        function_module = get_function_module(request, filter_id)
-
-        if getattr(function_module, "toggle", None):
-            return filter_id in (enabled_filter_ids or [])
-
-        return True
-
-    active_filter_ids = [
-        filter_id for filter_id in active_filter_ids if get_active_status(filter_id)
-    ]
-
-    filter_ids = [fid for fid in filter_ids if fid in active_filter_ids]
-    filter_ids.sort(key=get_priority)
-
-    return filter_ids
+    return FUNCTION_REGISTRY.get_filter_chain(request, model, enabled_filter_ids)
 
 
 async def process_filter_functions(
@@ -82,7 +52,7 @@ async def process_filter_functions(
 
         # Apply valves to the function
         if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
+            valves = FUNCTION_REGISTRY.get_valves(filter_id)
             function_module.valves = function_module.Valves(
                 **(valves if valves else {})
             )
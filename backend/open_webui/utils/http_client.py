@@ -0,0 +1,118 @@
+import logging
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def get_base_url(url: str) -> str:
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+class HTTPClientPool:
+    """
+    Long-lived aiohttp sessions, one per upstream base URL (scheme://host:port).
+
+    Sessions keep their connections alive between requests, so chat completions to the
+    same upstream reuse an open TCP/TLS connection instead of doing a new handshake.
+    Timeouts are passed per request; responses must be released (not closed) to return
+    their connection to the pool. The sessions are closed in the app lifespan.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        limit_per_host: int,
+        dns_cache_ttl: int,
+        keepalive_timeout: float,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.sessions: dict[str, aiohttp.ClientSession] = {}
+        self.stats: dict[str, dict] = {}
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        base_url = get_base_url(url)
+
+        session = self.sessions.get(base_url)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(connector=connector, trust_env=True)
+            self.sessions[base_url] = session
+            self.stats.setdefault(base_url, {"requests": 0, "sessions_created": 0})
+            self.stats[base_url]["sessions_created"] += 1
+            log.debug(f"Created HTTP client session for {base_url}")
+
+        self.stats[base_url]["requests"] += 1
+        self.stats[base_url]["last_used_at"] = int(time.time())
+        return session
+
+    def get_stats(self) -> dict:
+        pools = {}
+        for base_url, session in self.sessions.items():
+            connector = session.connector
+            pools[base_url] = {
+                **self.stats.get(base_url, {}),
+                "closed": session.closed,
+                # aiohttp has no public API for these counts
+                "active_connections": (
+                    len(getattr(connector, "_acquired", ())) if connector else 0
+                ),
+                "idle_connections": (
+                    sum(
+                        len(conns)
+                        for conns in getattr(connector, "_conns", {}).values()
+                    )
+                    if connector
+                    else 0
+                ),
+            }
+
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "dns_cache_ttl": self.dns_cache_ttl,
+            "keepalive_timeout": self.keepalive_timeout,
+            "pools": pools,
+        }
+
+    async def close(self):
+        for base_url, session in self.sessions.items():
+            try:
+                await session.close()
+            except Exception as e:
+                log.warning(f"Error closing HTTP client session for {base_url}: {e}")
+        self.sessions = {}
+
+
+HTTP_CLIENT_POOL = HTTPClientPool(
+    limit=AIOHTTP_CLIENT_POOL_LIMIT,
+    limit_per_host=AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    dns_cache_ttl=AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    keepalive_timeout=AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+)
+
+
+async def release_response(response: aiohttp.ClientResponse):
+    """Return the connection of a fully read (or abandoned) response to its pool"""
+    if response:
+        response.release()
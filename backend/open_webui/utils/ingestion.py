@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from fastapi import Request
+
+from open_webui.env import (
+    FILE_PROCESSING_CONCURRENCY,
+    FILE_PROCESSING_POLL_INTERVAL,
+    FILE_PROCESSING_STALE_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.files import FileModel, Files, FileStatus
+from open_webui.models.knowledge import Knowledges
+from open_webui.models.users import Users
+from open_webui.socket.main import emit_to_user
+from open_webui.storage.provider import Storage
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def is_transcription_required(content_type: Optional[str]) -> bool:
+    return bool(content_type) and (
+        content_type.startswith("audio/") or content_type in {"video/webm"}
+    )
+
+
+def is_processing_required(request: Request, content_type: Optional[str]) -> bool:
+    """Whether an uploaded file has content to extract (images and videos only with an
+    external content extraction engine)"""
+    if not content_type or is_transcription_required(content_type):
+        return True
+    return (not content_type.startswith(("image/", "video/"))) or (
+        request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
+    )
+
+
+def process_uploaded_file(request: Request, file: FileModel, user):
+    """Extract (or transcribe), split and embed a file, and add it to a knowledge base
+    if the upload asked for it. Raises on failure."""
+    # Imported here, the routers import this module
+    from open_webui.routers.audio import transcribe
+    from open_webui.routers.retrieval import ProcessFileForm, process_file
+
+    job = (file.data or {}).get("ingestion", {})
+    content_type = (file.meta or {}).get("content_type")
+
+    if job.get("process", True):
+        if is_transcription_required(content_type):
+            file_path = Storage.get_file(file.path)
+            result = transcribe(request, file_path, (file.meta or {}).get("data", {}))
+            process_file(
+                request,
+                ProcessFileForm(file_id=file.id, content=result.get("text", "")),
+                user=user,
+            )
+        else:
+            process_file(request, ProcessFileForm(file_id=file.id), user=user)
+
+    knowledge_id = job.get("knowledge_id")
+    if knowledge_id:
+        process_file(
+            request,
+            ProcessFileForm(file_id=file.id, collection_name=knowledge_id),
+            user=user,
+        )
+        Knowledges.add_file_id_to_knowledge_by_id(knowledge_id, file.id)
+
+
+class IngestionQueue:
+    """
+    Background queue for processing uploaded files.
+
+    The queue itself is the `status` column of the file table: files are enqueued by
+    setting their status to queued, and a worker claims a file by atomically moving it
+    to processing. Files queued by this instance are picked up immediately; files queued
+    by other instances, or left behind by a crashed instance (no heartbeat within
+    FILE_PROCESSING_STALE_TIMEOUT), are found by polling. Status changes are pushed to
+    the file owner over socket.io as "file-events".
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float, stale_timeout: int):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.app = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.pending: set[str] = set()
+        self.tasks: list[asyncio.Task] = []
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self.tasks)
+
+    def start(self, app):
+        self.app = app
+        self.queue = asyncio.Queue()
+        self.tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ] + [asyncio.create_task(self._poller())]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def _put(self, file_id: str):
+        if self.queue is not None and file_id not in self.pending:
+            self.pending.add(file_id)
+            self.queue.put_nowait(file_id)
+
+    async def enqueue(self, file: FileModel, job: Optional[dict] = None) -> FileModel:
+        """Queue a file for processing. job: {"process": bool, "knowledge_id": str}"""
+        if not self.is_running:
+            # Nothing would pick the file up: it would stay queued forever
+            raise RuntimeError("The file processing queue is not running")
+
+        if job:
+            await asyncio.to_thread(
+                Files.update_file_data_by_id, file.id, {"ingestion": job}
+            )
+        file = await asyncio.to_thread(
+            Files.update_file_status_by_id, file.id, FileStatus.QUEUED
+        )
+        await self._emit(file)
+        self._put(file.id)
+        return file
+
+    async def _emit(self, file: FileModel):
+        try:
+            await emit_to_user(
+                file.user_id,
+                "file-events",
+                {
+                    "file_id": file.id,
+                    "status": file.status,
+                    "error": (file.data or {}).get("error"),
+                    "warning": (file.data or {}).get("warning"),
+                },
+            )
+        except Exception as e:
+            log.debug(f"Error emitting status of file {file.id}: {e}")
+
+    async def _poller(self):
+        while True:
+            try:
+                stale_before = int(time.time()) - self.stale_timeout
+                file_ids = await asyncio.to_thread(
+                    Files.get_file_ids_to_process, stale_before, self.concurrency * 4
+                )
+                for file_id in file_ids:
+                    self._put(file_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Error polling the file processing queue: {e}")
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def _worker(self):
+        while True:
+            file_id = await self.queue.get()
+            try:
+                await self._process(file_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Error processing file {file_id}: {e}")
+            finally:
+                self.pending.discard(file_id)
+
+    async def _process(self, file_id: str):
+        stale_before = int(time.time()) - self.stale_timeout
+        claimed = await asyncio.to_thread(
+            Files.claim_file_for_processing, file_id, stale_before
+        )
+        if not claimed:
+            return
+
+        file = await asyncio.to_thread(Files.get_file_by_id, file_id)
+        await self._emit(file)
+
+        user = await asyncio.to_thread(Users.get_user_by_id, file.user_id)
+        request = Request({"type": "http", "app": self.app})
+
+        job = asyncio.create_task(
+            asyncio.to_thread(process_uploaded_file, request, file, user)
+        )
+        try:
+            await self._wait_for_job(file_id, job)
+        except asyncio.CancelledError:
+            # Shutting down. The thread processing the file can not be interrupted (and
+            # is waited for on exit anyway), so let it finish and record its result:
+            # queueing the file again while it is still being processed would have it
+            # ingested twice
+            log.info(f"Finishing the processing of file {file_id} before shutdown")
+            await self._wait_for_job(file_id, job)
+            await self._record_result(file_id, job)
+            raise
+
+        file = await self._record_result(file_id, job)
+        if file:
+            await self._emit(file)
+
+    async def _wait_for_job(self, file_id: str, job: asyncio.Task):
+        # Keep the claim alive while processing, so other instances leave the file alone
+        while True:
+            done, _ = await asyncio.wait({job}, timeout=self.stale_timeout / 3)
+            if done:
+                return
+            try:
+                await asyncio.to_thread(Files.touch_file_by_id, file_id)
+            except Exception as e:
+                log.warning(f"Error keeping the claim of file {file_id}: {e}")
+
+    async def _record_result(
+        self, file_id: str, job: asyncio.Task
+    ) -> Optional[FileModel]:
+        try:
+            job.result()
+            return await asyncio.to_thread(
+                Files.update_file_status_by_id, file_id, FileStatus.DONE
+            )
+        except Exception as e:
+            log.exception(f"Error processing file {file_id}: {e}")
+            return await asyncio.to_thread(
+                Files.update_file_status_by_id,
+                file_id,
+                FileStatus.FAILED,
+                str(e.detail) if hasattr(e, "detail") else str(e),
+            )
+
+
+INGESTION_QUEUE = IngestionQueue(
+    concurrency=FILE_PROCESSING_CONCURRENCY,
+    poll_interval=FILE_PROCESSING_POLL_INTERVAL,
+    stale_timeout=FILE_PROCESSING_STALE_TIMEOUT,
+)
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import CHAT_SAVE_FLUSH_INTERVAL, SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+def resolve_updates(updates: dict) -> dict:
+    return {
+        key: value() if callable(value) else value for key, value in updates.items()
+    }
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind buffer for chat messages that are updated while a response streams.
+
+    Every `Chats.upsert_message_to_chat_by_id_and_message_id` call reloads and rewrites
+    the whole chat, so updates to the same (chat_id, message_id) are merged here and
+    written at most once per `flush_interval` seconds, and when `flush` is called at the
+    end (or cancellation) of the response. A value can be a function returning it, which
+    is called when the message is written: the content of a streaming response is then
+    serialized once per write instead of once per update.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        # (chat_id, message_id) -> {"message": last known stored message or None, "updates": dict}
+        self.entries: dict[tuple[str, str], dict] = {}
+        self.flush_tasks: dict[tuple[str, str], asyncio.Task] = {}
+
+    def get_message(self, chat_id: str, message_id: str) -> Optional[dict]:
+        """Return the message as it will be stored, including updates not yet written"""
+        entry = self.entries.get((chat_id, message_id))
+        if entry is None:
+            return Chats.get_message_by_id_and_message_id(chat_id, message_id)
+
+        if entry["message"] is None:
+            entry["message"] = (
+                Chats.get_message_by_id_and_message_id(chat_id, message_id) or {}
+            )
+        return {**entry["message"], **resolve_updates(entry["updates"])}
+
+    def upsert(self, chat_id: str, message_id: str, message: dict):
+        if self.flush_interval <= 0:
+            Chats.upsert_message_to_chat_by_id_and_message_id(
+                chat_id, message_id, resolve_updates(message)
+            )
+            return
+
+        key = (chat_id, message_id)
+        entry = self.entries.setdefault(key, {"message": None, "updates": {}})
+        # upsert_message_to_chat_by_id_and_message_id merges shallowly, so coalescing does too
+        entry["updates"].update(message)
+
+        if key not in self.flush_tasks:
+            self.flush_tasks[key] = asyncio.create_task(self._delayed_flush(key))
+
+    async def _delayed_flush(self, key: tuple[str, str]):
+        await asyncio.sleep(self.flush_interval)
+        self.flush_tasks.pop(key, None)
+        self._write(key)
+
+    def _write(self, key: tuple[str, str]):
+        entry = self.entries.pop(key, None)
+        if entry and entry["updates"]:
+            try:
+                Chats.upsert_message_to_chat_by_id_and_message_id(
+                    key[0], key[1], resolve_updates(entry["updates"])
+                )
+            except Exception as e:
+                log.exception(f"Error saving message {key[1]} of chat {key[0]}: {e}")
+
+    def flush(self, chat_id: str, message_id: str):
+        """Write pending updates of a message now"""
+        key = (chat_id, message_id)
+        task = self.flush_tasks.pop(key, None)
+        if task:
+            task.cancel()
+        self._write(key)
+
+    def flush_all(self):
+        for chat_id, message_id in list(self.entries.keys()):
+            self.flush(chat_id, message_id)
+
+
+MESSAGE_WRITE_BUFFER = MessageWriteBuffer(CHAT_SAVE_FLUSH_INTERVAL)
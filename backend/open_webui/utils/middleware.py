@@ -23,6 +23,7 @@ from starlette.responses import Response, StreamingResponse
 
 
 from open_webui.models.chats import Chats
+from open_webui.utils.message_buffer import MESSAGE_WRITE_BUFFER
 from open_webui.models.users import Users
 from open_webui.socket.main import (
     get_event_call,
@@ -70,7 +71,7 @@ from open_webui.utils.misc import (
     convert_logit_bias_input_to_json,
 )
 from open_webui.utils.tools import get_tools
-from open_webui.utils.plugin import load_function_module_by_id
+from open_webui.utils.plugin import FUNCTION_REGISTRY, load_function_module_by_id
 from open_webui.utils.filter import (
     get_sorted_filter_ids,
     process_filter_functions,
@@ -810,7 +811,7 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     try:
 
         filter_functions = [
-            Functions.get_function_by_id(filter_id)
+            FUNCTION_REGISTRY.get_function(filter_id)
             for filter_id in get_sorted_filter_ids(
                 request, model, metadata.get("filter_ids", [])
             )
@@ -1010,6 +1011,9 @@ async def process_chat_response(
     request, response, form_data, user, metadata, model, events, tasks
 ):
     async def background_tasks_handler():
+        # Make sure buffered updates of the response are stored before reading the messages
+        MESSAGE_WRITE_BUFFER.flush(metadata["chat_id"], metadata["message_id"])
+
         message_map = Chats.get_messages_by_chat_id(metadata["chat_id"])
         message = message_map.get(metadata["message_id"]) if message_map else None
 
@@ -1162,7 +1166,7 @@ async def process_chat_response(
         if event_emitter:
             if "error" in response:
                 error = response["error"].get("detail", response["error"])
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                MESSAGE_WRITE_BUFFER.upsert(
                     metadata["chat_id"],
                     metadata["message_id"],
                     {
@@ -1171,7 +1175,7 @@ async def process_chat_response(
                 )
 
             if "selected_model_id" in response:
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                MESSAGE_WRITE_BUFFER.upsert(
                     metadata["chat_id"],
                     metadata["message_id"],
                     {
@@ -1206,7 +1210,7 @@ async def process_chat_response(
                     )
 
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    MESSAGE_WRITE_BUFFER.upsert(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1233,6 +1237,8 @@ async def process_chat_response(
 
                     await background_tasks_handler()
 
+            MESSAGE_WRITE_BUFFER.flush(metadata["chat_id"], metadata["message_id"])
+
             if events and isinstance(events, list) and isinstance(response, dict):
                 extra_response = {}
                 for event in events:
@@ -1284,7 +1290,7 @@ async def process_chat_response(
         "__model__": model,
     }
     filter_functions = [
-        Functions.get_function_by_id(filter_id)
+        FUNCTION_REGISTRY.get_function(filter_id)
         for filter_id in get_sorted_filter_ids(
             request, model, metadata.get("filter_ids", [])
         )
@@ -1295,7 +1301,7 @@ async def process_chat_response(
         task_id = str(uuid4())  # Create a unique task ID.
         model_id = form_data.get("model", "")
 
-        Chats.upsert_message_to_chat_by_id_and_message_id(
+        MESSAGE_WRITE_BUFFER.upsert(
             metadata["chat_id"],
             metadata["message_id"],
             {
@@ -1317,11 +1323,15 @@ async def process_chat_response(
             # Even number of segments means the last backticks are opening a new block
             return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
 
+        def get_reasoning_display_content(content):
+            return "\n".join(
+                (f"> {line}" if not line.startswith(">") else line)
+                for line in content.splitlines()
+            )
+
         # Handle as a background task
         async def post_response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
+            def append_serialized_content_blocks(content, content_blocks, raw=False):
                 for block in content_blocks:
                     if block["type"] == "text":
                         content = f"{content}{block['content'].strip()}\n"
@@ -1377,9 +1387,8 @@ async def process_chat_response(
                                 content = f"{content}\n{tool_calls_display_content}\n\n"
 
                     elif block["type"] == "reasoning":
-                        reasoning_display_content = "\n".join(
-                            (f"> {line}" if not line.startswith(">") else line)
-                            for line in block["content"].splitlines()
+                        reasoning_display_content = get_reasoning_display_content(
+                            block["content"]
                         )
 
                         reasoning_duration = block.get("duration", None)
@@ -1430,7 +1439,192 @@ async def process_chat_response(
                         block_content = str(block["content"]).strip()
                         content = f"{content}{block['type']}: {block_content}\n"
 
-                return content.strip()
+                return content
+
+            def serialize_content_blocks(content_blocks, raw=False):
+                return append_serialized_content_blocks("", content_blocks, raw).strip()
+
+            # Serialized output of all blocks but the last one. While a response streams
+            # only the last block grows, so the prefix is reused until the blocks before
+            # it change (a tag closes a block, a tool call gets its results, ...).
+            serialized_prefix_signature = None
+            serialized_prefix = ""
+
+            def get_content_block_signature(block):
+                block_content = block.get("content", "")
+                return (
+                    id(block),
+                    block["type"],
+                    (
+                        len(block_content)
+                        if isinstance(block_content, (str, list))
+                        else str(block_content)
+                    ),
+                    block.get("duration"),
+                    len(block.get("results") or []),
+                    block.get("output") is not None,
+                )
+
+            def serialize_content_blocks_incremental(content_blocks):
+                nonlocal serialized_prefix_signature
+                nonlocal serialized_prefix
+
+                signature = [
+                    get_content_block_signature(block) for block in content_blocks[:-1]
+                ]
+                if signature != serialized_prefix_signature:
+                    serialized_prefix = append_serialized_content_blocks(
+                        "", content_blocks[:-1]
+                    )
+                    serialized_prefix_signature = signature
+
+                return append_serialized_content_blocks(
+                    serialized_prefix, content_blocks[-1:]
+                ).strip()
+
+            # While a response streams, updates are sent as the text added since the
+            # previous update instead of the whole message. The serialized form of a
+            # growing text or reasoning block is `<head><displayed text><tail>`, so the
+            # added text is taken from the end of the block content and inserted before
+            # the tail, without serializing the message again. A full snapshot is sent
+            # when the blocks changed in another way, and every so many updates or
+            # seconds. Every update carries a version: a client that missed the
+            # previous one (a second tab, a reload mid-stream) ignores deltas until
+            # the next snapshot instead of applying them to a stale base.
+            FULL_CONTENT_UPDATE_INTERVAL = 100
+            FULL_CONTENT_UPDATE_SECONDS = 2
+            streamed_block = None
+            last_full_content_update_at = 0
+            content_updates_since_full = 0
+            content_version = 0
+
+            def get_streamed_block(content_blocks):
+                """State of the last block for get_streamed_delta, None if it can only
+                be sent as part of a full snapshot"""
+                block = content_blocks[-1]
+                block_content = block.get("content")
+                if not isinstance(block_content, str):
+                    return None
+
+                streamed = {
+                    "block": block,
+                    "prefix_signature": [
+                        get_content_block_signature(block)
+                        for block in content_blocks[:-1]
+                    ],
+                    "length": len(block_content),
+                }
+                if block["type"] == "reasoning":
+                    if block.get("duration") is not None:
+                        return None
+                    # The display prefixes every line, the last line may still grow
+                    line_start = block_content.rfind("\n") + 1
+                    streamed["line_start"] = line_start
+                    streamed["lines_length"] = len(
+                        get_reasoning_display_content(block_content[:line_start])
+                    )
+                    streamed["sent"] = len(get_reasoning_display_content(block_content))
+                    streamed["tail"] = len("\n</details>")
+                elif block["type"] in ("tool_calls", "code_interpreter"):
+                    return None
+                else:
+                    # Displayed stripped, up to the end of the last non-space character
+                    streamed["end"] = len(block_content.rstrip())
+                    streamed["sent"] = len(block_content.strip())
+                    streamed["tail"] = 0
+
+                # Before any text is displayed, the whitespace around the head depends
+                # on what follows
+                return streamed if streamed["sent"] > 0 else None
+
+            def get_streamed_delta(content_blocks):
+                """Text added to the serialized content since the last update and the
+                length of the tail it is inserted before, None if the content changed
+                in another way"""
+                if streamed_block is None:
+                    return None
+
+                block = streamed_block["block"]
+                block_content = block.get("content")
+                if (
+                    content_blocks[-1] is not block
+                    or block.get("duration") is not None
+                    or not isinstance(block_content, str)
+                    or len(block_content) < streamed_block["length"]
+                    or [
+                        get_content_block_signature(block)
+                        for block in content_blocks[:-1]
+                    ]
+                    != streamed_block["prefix_signature"]
+                ):
+                    return None
+                streamed_block["length"] = len(block_content)
+
+                if "line_start" in streamed_block:
+                    line_start = streamed_block["line_start"]
+                    lines_length = streamed_block["lines_length"]
+                    last_lines = block_content[line_start:]
+                    display = get_reasoning_display_content(last_lines)
+                    if display and line_start:
+                        display = f"\n{display}"
+
+                    delta = display[streamed_block["sent"] - lines_length :]
+                    streamed_block["sent"] = lines_length + len(display)
+
+                    line_end = last_lines.rfind("\n") + 1
+                    if line_end:
+                        # Lines ended by a line break are displayed for good
+                        lines = get_reasoning_display_content(last_lines[:line_end])
+                        streamed_block["line_start"] = line_start + line_end
+                        streamed_block["lines_length"] = (
+                            lines_length + len(lines) + (1 if line_start else 0)
+                        )
+                else:
+                    end = streamed_block["end"]
+                    new_end = end + len(block_content[end:].rstrip())
+                    delta = block_content[end:new_end]
+                    streamed_block["end"] = new_end
+
+                return delta, streamed_block["tail"]
+
+            def get_content_update(content_blocks):
+                nonlocal streamed_block
+                nonlocal last_full_content_update_at
+                nonlocal content_updates_since_full
+                nonlocal content_version
+
+                content_version += 1
+                now = time.monotonic()
+                streamed_delta = None
+                if (
+                    content_updates_since_full < FULL_CONTENT_UPDATE_INTERVAL
+                    and now - last_full_content_update_at < FULL_CONTENT_UPDATE_SECONDS
+                ):
+                    streamed_delta = get_streamed_delta(content_blocks)
+
+                if streamed_delta is not None:
+                    delta, tail = streamed_delta
+                    update = {
+                        "content_delta": delta,
+                        "content_version": content_version,
+                    }
+                    if tail:
+                        update["content_delta_tail"] = tail
+                    content_updates_since_full += 1
+                else:
+                    update = {
+                        "content": serialize_content_blocks_incremental(content_blocks),
+                        "content_version": content_version,
+                    }
+                    streamed_block = get_streamed_block(content_blocks)
+                    content_updates_since_full = 0
+                    last_full_content_update_at = now
+
+                return update
+
+            def reset_content_updates():
+                nonlocal streamed_block
+                streamed_block = None
 
             def convert_content_blocks_to_messages(content_blocks):
                 messages = []
@@ -1472,7 +1666,8 @@ async def process_chat_response(
 
                 return messages
 
-            def tag_content_handler(content_type, tags, content, content_blocks):
+            def tag_content_handler(content_type, tags, content, content_blocks, pos=0):
+                """Handle the tags of content_type found in content from pos on"""
                 end_flag = False
 
                 def extract_attributes(tag_content):
@@ -1490,7 +1685,7 @@ async def process_chat_response(
                     for start_tag, end_tag in tags:
                         # Match start tag e.g., <tag> or <tag attr="value">
                         start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
-                        match = re.search(start_tag_pattern, content)
+                        match = re.compile(start_tag_pattern).search(content, pos)
                         if match:
                             attr_content = (
                                 match.group(1) if match.group(1) else ""
@@ -1544,7 +1739,7 @@ async def process_chat_response(
                     end_tag_pattern = rf"<{re.escape(end_tag)}>"
 
                     # Check if the content has the end tag
-                    if re.search(end_tag_pattern, content):
+                    if re.compile(end_tag_pattern).search(content, pos):
                         end_flag = True
 
                         block_content = content_blocks[-1]["content"]
@@ -1622,6 +1817,22 @@ async def process_chat_response(
 
                 return content, content_blocks, end_flag
 
+            def get_tag_scan_position(content, pos):
+                """
+                Where the next scan for tags in content can start, after a scan from pos
+                found none: at the first "<" that more text could turn into a tag. A tag
+                ends at the first ">" after its "<" and spans at most one line break
+                (after its name), so no tag starts before the last ">" or before the
+                last two line breaks.
+                """
+                start = max(pos, content.rfind(">", pos) + 1)
+                last_line_break = content.rfind("\n", start)
+                if last_line_break != -1:
+                    start = max(start, content.rfind("\n", start, last_line_break) + 1)
+
+                tag_start = content.find("<", start)
+                return tag_start if tag_start != -1 else len(content)
+
             message = Chats.get_message_by_id_and_message_id(
                 metadata["chat_id"], metadata["message_id"]
             )
@@ -1681,7 +1892,7 @@ async def process_chat_response(
                     )
 
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    MESSAGE_WRITE_BUFFER.upsert(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1695,6 +1906,15 @@ async def process_chat_response(
 
                     response_tool_calls = []
 
+                    # Content may have changed since the last streamed update (tool calls,
+                    # code interpreter output), start this response with a full snapshot
+                    reset_content_updates()
+
+                    # Content before this position has been scanned for tags without
+                    # finding any, so only newly arrived text is scanned. After tags
+                    # changed the blocks, the content is scanned again from the start.
+                    tag_scan_position = 0
+
                     async for line in response.body_iterator:
                         line = line.decode("utf-8") if isinstance(line, bytes) else line
                         data = line
@@ -1724,10 +1944,11 @@ async def process_chat_response(
                             if data:
                                 if "event" in data:
                                     await event_emitter(data.get("event", {}))
+                                    reset_content_updates()
 
                                 if "selected_model_id" in data:
                                     model_id = data["selected_model_id"]
-                                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                                    MESSAGE_WRITE_BUFFER.upsert(
                                         metadata["chat_id"],
                                         metadata["message_id"],
                                         {
@@ -1846,11 +2067,7 @@ async def process_chat_response(
 
                                         reasoning_block["content"] += reasoning_content
 
-                                        data = {
-                                            "content": serialize_content_blocks(
-                                                content_blocks
-                                            )
-                                        }
+                                        data = get_content_update(content_blocks)
 
                                     if value:
                                         if (
@@ -1889,6 +2106,11 @@ async def process_chat_response(
                                             content_blocks[-1]["content"] + value
                                         )
 
+                                        blocks_before = (
+                                            len(content_blocks),
+                                            content_blocks[-1],
+                                        )
+
                                         if DETECT_REASONING:
                                             content, content_blocks, _ = (
                                                 tag_content_handler(
@@ -1896,8 +2118,14 @@ async def process_chat_response(
                                                     reasoning_tags,
                                                     content,
                                                     content_blocks,
+                                                    tag_scan_position,
                                                 )
                                             )
+                                            if blocks_before != (
+                                                len(content_blocks),
+                                                content_blocks[-1],
+                                            ):
+                                                tag_scan_position = 0
 
                                         if DETECT_CODE_INTERPRETER:
                                             content, content_blocks, end = (
@@ -1906,12 +2134,19 @@ async def process_chat_response(
                                                     code_interpreter_tags,
                                                     content,
                                                     content_blocks,
+                                                    tag_scan_position,
                                                 )
                                             )
 
                                             if end:
                                                 break
 
+                                            if blocks_before != (
+                                                len(content_blocks),
+                                                content_blocks[-1],
+                                            ):
+                                                tag_scan_position = 0
+
                                         if DETECT_SOLUTION:
                                             content, content_blocks, _ = (
                                                 tag_content_handler(
@@ -1919,26 +2154,34 @@ async def process_chat_response(
                                                     solution_tags,
                                                     content,
                                                     content_blocks,
+                                                    tag_scan_position,
                                                 )
                                             )
 
+                                        if blocks_before == (
+                                            len(content_blocks),
+                                            content_blocks[-1],
+                                        ):
+                                            tag_scan_position = get_tag_scan_position(
+                                                content, tag_scan_position
+                                            )
+                                        else:
+                                            tag_scan_position = 0
+
                                         if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                                            # Save message in the database, serialized
+                                            # when the buffer writes it
+                                            MESSAGE_WRITE_BUFFER.upsert(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
                                                 {
-                                                    "content": serialize_content_blocks(
+                                                    "content": lambda: serialize_content_blocks(
                                                         content_blocks
                                                     ),
                                                 },
                                             )
                                         else:
-                                            data = {
-                                                "content": serialize_content_blocks(
-                                                    content_blocks
-                                                ),
-                                            }
+                                            data = get_content_update(content_blocks)
 
                                 await event_emitter(
                                     {
@@ -2329,7 +2572,7 @@ async def process_chat_response(
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    MESSAGE_WRITE_BUFFER.upsert(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -2337,6 +2580,8 @@ async def process_chat_response(
                         },
                     )
 
+                MESSAGE_WRITE_BUFFER.flush(metadata["chat_id"], metadata["message_id"])
+
                 # Send a webhook notification if the user is not active
                 if not get_active_status_by_user_id(user.id):
                     webhook_url = Users.get_user_webhook_url_by_id(user.id)
@@ -2367,7 +2612,7 @@ async def process_chat_response(
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    MESSAGE_WRITE_BUFFER.upsert(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -2375,6 +2620,8 @@ async def process_chat_response(
                         },
                     )
 
+                MESSAGE_WRITE_BUFFER.flush(metadata["chat_id"], metadata["message_id"])
+
             if response.background is not None:
                 await response.background()
 
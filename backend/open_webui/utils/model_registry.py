@@ -0,0 +1,265 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+from fastapi import Request
+
+from open_webui.env import (
+    MODEL_REGISTRY_REFRESH_INTERVAL,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.cache import INVALIDATION_BUS
+from open_webui.utils.models import get_all_models
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+REDIS_KEY_PREFIX = "open-webui:model-registry"
+
+# Invalidation topics of the sources of the model list
+SOURCE_TOPICS = ["models", "functions", "model_connections"]
+
+# Seconds to wait after a change before rebuilding, so a burst of changes (e.g. a
+# functions sync or an imported model list) causes a single rebuild
+REBUILD_DELAY = 1.0
+
+
+class ModelRegistry:
+    """
+    Versioned registry of all models, i.e. app.state.MODELS, and of the models of the
+    connections they are served by, app.state.OPENAI_MODELS and app.state.OLLAMA_MODELS.
+
+    Building the model list fans out to every connection and loads all functions, so
+    instead of rebuilding it per request, the registry is rebuilt by a background task:
+    every `refresh_interval` seconds, and shortly after models, functions or connections
+    change (signalled on INVALIDATION_BUS). Requests only look models up by id. Function
+    valves do not change the model list, new valves of a manifold are picked up by the
+    periodic refresh.
+
+    With a Redis URL every build is stored in Redis with a new version, and announced to
+    the other instances, which load it instead of building their own: a change is only
+    rebuilt by the instance that made it, and the periodic refresh is done by one
+    instance at a time. A new instance starts from the stored
+    registry, so it does not have to query the connections before serving requests.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = None,
+    ):
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self.updated_at: Optional[int] = None
+        self.app = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.rebuild_event: Optional[asyncio.Event] = None
+        self.lock: Optional[asyncio.Lock] = None
+        self.task: Optional[asyncio.Task] = None
+
+        self.redis = None
+        if redis_url:
+            self.redis = get_redis_connection(
+                redis_url, redis_sentinels, decode_responses=True
+            )
+
+        for topic in SOURCE_TOPICS:
+            INVALIDATION_BUS.subscribe(topic, self._on_source_changed, local_only=True)
+        INVALIDATION_BUS.subscribe("model_registry", self._on_version_published)
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        return self.lock
+
+    def _apply(self, app, snapshot: dict):
+        app.state.MODELS = snapshot["models"]
+        app.state.OPENAI_MODELS = snapshot["openai_models"]
+        # Not in registries stored before it was added, built again on the next change
+        app.state.OLLAMA_MODELS = snapshot.get("ollama_models", {})
+        self.version = snapshot["version"]
+        self.updated_at = snapshot["updated_at"]
+
+    def _load(self, app) -> bool:
+        """Load the registry stored in Redis if it is newer. Returns False if there is
+        none (or Redis is not used)."""
+        if self.redis is None or app is None:
+            return False
+
+        try:
+            value = self.redis.get(f"{REDIS_KEY_PREFIX}:snapshot")
+        except Exception as e:
+            log.warning(f"Error loading the model registry from Redis: {e}")
+            return False
+
+        if not value:
+            return False
+
+        snapshot = json.loads(value)
+        if snapshot["version"] > self.version:
+            self._apply(app, snapshot)
+        return True
+
+    def _next_version(self) -> int:
+        if self.redis is not None:
+            try:
+                return self.redis.incr(f"{REDIS_KEY_PREFIX}:version")
+            except Exception as e:
+                log.warning(f"Error incrementing the model registry version: {e}")
+        return self.version + 1
+
+    def _acquire_refresh(self) -> bool:
+        """Whether this instance does the periodic refresh, at most one per interval"""
+        if self.redis is None:
+            return True
+
+        try:
+            return bool(
+                self.redis.set(
+                    f"{REDIS_KEY_PREFIX}:refresh",
+                    INVALIDATION_BUS.instance_id,
+                    nx=True,
+                    ex=max(int(self.refresh_interval) - 1, 1),
+                )
+            )
+        except Exception as e:
+            log.warning(f"Error acquiring the model registry refresh: {e}")
+            return True
+
+    async def _build(self, app):
+        request = Request({"type": "http", "app": app})
+        models = await get_all_models(request)
+
+        snapshot = {
+            "version": await asyncio.to_thread(self._next_version),
+            "updated_at": int(time.time()),
+            "models": {model["id"]: model for model in models},
+            "openai_models": (
+                dict(app.state.OPENAI_MODELS)
+                if app.state.config.ENABLE_OPENAI_API
+                else {}
+            ),
+            "ollama_models": (
+                dict(app.state.OLLAMA_MODELS)
+                if app.state.config.ENABLE_OLLAMA_API
+                else {}
+            ),
+        }
+        self._apply(app, snapshot)
+        log.info(
+            f"Built model registry version {snapshot['version']} with {len(models)} models"
+        )
+
+        if self.redis is not None:
+            try:
+                await asyncio.to_thread(
+                    self.redis.set,
+                    f"{REDIS_KEY_PREFIX}:snapshot",
+                    json.dumps(snapshot, default=str),
+                )
+                INVALIDATION_BUS.publish("model_registry", snapshot["version"])
+            except Exception as e:
+                log.warning(f"Error storing the model registry in Redis: {e}")
+
+    async def rebuild(self, app):
+        async with self._get_lock():
+            await self._build(app)
+
+    async def ensure_built(self, app):
+        """Build the registry now if it was never built or loaded, e.g. for the first
+        request after a start without a stored registry"""
+        if self.version:
+            return
+
+        async with self._get_lock():
+            if not self.version and not await asyncio.to_thread(self._load, app):
+                await self._build(app)
+
+    def request_rebuild(self):
+        if self.loop is None:
+            # Not running in the background: build again on the next lookup
+            self.version = 0
+            return
+
+        self.loop.call_soon_threadsafe(self.rebuild_event.set)
+
+    def _on_source_changed(self, data):
+        self.request_rebuild()
+
+    def _on_version_published(self, version: Optional[int]):
+        # None: invalidations may have been missed, reload whatever is stored
+        if version is None or version > self.version:
+            self._load(self.app)
+
+    async def _refresher(self):
+        timeout = self.refresh_interval if self.refresh_interval > 0 else None
+        while True:
+            try:
+                await asyncio.wait_for(self.rebuild_event.wait(), timeout=timeout)
+                changed = True
+            except asyncio.TimeoutError:
+                changed = False
+
+            if changed:
+                await asyncio.sleep(REBUILD_DELAY)
+            elif not await asyncio.to_thread(self._acquire_refresh):
+                # Another instance refreshes, its registry is loaded when published
+                continue
+
+            self.rebuild_event.clear()
+            try:
+                await self.rebuild(self.app)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Error building the model registry: {e}")
+
+    def start(self, app):
+        self.app = app
+        self.loop = asyncio.get_running_loop()
+        self.rebuild_event = asyncio.Event()
+        if not self._load(app):
+            self.rebuild_event.set()
+        self.task = asyncio.create_task(self._refresher())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        self.loop = None
+
+    async def get_models(self, request: Request) -> list[dict]:
+        await self.ensure_built(request.app)
+        return list(request.app.state.MODELS.values())
+
+    async def get_model(self, request: Request, model_id: str) -> Optional[dict]:
+        await self.ensure_built(request.app)
+        return request.app.state.MODELS.get(model_id)
+
+    async def get_openai_model(self, request: Request, model_id: str) -> Optional[dict]:
+        await self.ensure_built(request.app)
+        return request.app.state.OPENAI_MODELS.get(model_id)
+
+    def get_status(self) -> dict:
+        return {
+            "version": self.version,
+            "updated_at": self.updated_at,
+            "refresh_interval": self.refresh_interval,
+            "redis": self.redis is not None,
+        }
+
+
+MODEL_REGISTRY = ModelRegistry(
+    MODEL_REGISTRY_REFRESH_INTERVAL,
+    REDIS_URL,
+    get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
@@ -15,6 +15,7 @@ from open_webui.models.models import Models
 
 
 from open_webui.utils.plugin import (
+    FUNCTION_REGISTRY,
     load_function_module_by_id,
     get_function_module_from_cache,
 )
@@ -271,7 +272,7 @@ async def get_all_models(request, user: UserModel = None):
 
         model["actions"] = []
         for action_id in action_ids:
-            action_function = Functions.get_function_by_id(action_id)
+            action_function = FUNCTION_REGISTRY.get_function(action_id)
             if action_function is None:
                 raise Exception(f"Action not found: {action_id}")
 
@@ -282,7 +283,7 @@ async def get_all_models(request, user: UserModel = None):
 
         model["filters"] = []
         for filter_id in filter_ids:
-            filter_function = Functions.get_function_by_id(filter_id)
+            filter_function = FUNCTION_REGISTRY.get_function(filter_id)
             if filter_function is None:
                 raise Exception(f"Filter not found: {filter_id}")
 
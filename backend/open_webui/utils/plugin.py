@@ -1,15 +1,24 @@
+import hashlib
 import os
 import re
 import subprocess
 import sys
+import time
 from importlib import util
 import types
 import tempfile
 import logging
-
-from open_webui.env import SRC_LOG_LEVELS, PIP_OPTIONS, PIP_PACKAGE_INDEX_OPTIONS
-from open_webui.models.functions import Functions
+from typing import Optional
+
+from open_webui.env import (
+    FUNCTION_CACHE_TTL,
+    PIP_OPTIONS,
+    PIP_PACKAGE_INDEX_OPTIONS,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.functions import FunctionModel, Functions
 from open_webui.models.tools import Tools
+from open_webui.utils.cache import INVALIDATION_BUS, TTLCache
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -166,60 +175,193 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
         os.unlink(temp_file.name)
 
 
-def get_function_module_from_cache(request, function_id, load_from_db=True):
-    if load_from_db:
-        # Always load from the database by default
-        # This is useful for hooks like "inlet" or "outlet" where the content might change
-        # and we want to ensure the latest content is used.
+def get_content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
-        function = Functions.get_function_by_id(function_id)
-        if not function:
+
+class FunctionRegistry:
+    """
+    Cache of function rows and valves, of the filter chains resolved from them and of
+    the compiled function modules.
+
+    Every FunctionsTable write publishes the function id on the "functions" (or, for
+    valves, "function_valves") topic of INVALIDATION_BUS, which drops it here on all
+    instances, together with all filter chains. As an invalidation can be missed
+    (e.g. by an instance without Redis next to the one that made the change), a cached
+    function is checked against the updated_at of its row every VERIFY_INTERVAL
+    seconds, a single column lookup, and the filter chains are resolved again as
+    often. Modules are kept next to the hash of the content they were executed from:
+    a module is only executed again if its content hash changed, not for e.g. new
+    valves or a toggle.
+
+    All entries expire after `ttl` seconds without a change (modules: without use),
+    so functions that are deleted or no longer used do not stay in memory.
+    """
+
+    # Bounds on the cached functions and modules, and on the filter chains, which are
+    # keyed per model and enabled toggles
+    MAX_FUNCTIONS = 1000
+    MAX_FILTER_CHAINS = 1000
+    VERIFY_INTERVAL = 30
+
+    def __init__(self, ttl: int):
+        verify_ttl = min(ttl, self.VERIFY_INTERVAL)
+        # function id -> (function, valves, hash of the content with replaced imports,
+        # time it was last checked against the database)
+        self.functions = TTLCache(self.MAX_FUNCTIONS, ttl)
+        # None -> (global filter ids, active filter ids)
+        self.filter_ids = TTLCache(1, verify_ttl)
+        self.filter_chains = TTLCache(self.MAX_FILTER_CHAINS, verify_ttl)
+        # function id -> (content hash, module)
+        self.modules = TTLCache(self.MAX_FUNCTIONS, ttl)
+
+        INVALIDATION_BUS.subscribe("functions", self._on_invalidated)
+        INVALIDATION_BUS.subscribe("function_valves", self._on_invalidated)
+
+    def _on_invalidated(self, function_id: Optional[str]):
+        if function_id is None:
+            self.functions.clear()
+        else:
+            self.functions.delete(function_id)
+        self.filter_ids.clear()
+        self.filter_chains.clear()
+
+    def _get_entry(self, function_id: str) -> Optional[tuple]:
+        entry = self.functions.get(function_id)
+
+        if entry is not None and time.time() - entry[3] > self.VERIFY_INTERVAL:
+            generation = self.functions.get_generation()
+            updated_at = Functions.get_function_updated_at_by_id(function_id)
+            if updated_at is not None and updated_at == entry[0].updated_at:
+                entry = (*entry[:3], time.time())
+                self.functions.set(function_id, entry, generation)
+            else:
+                # Changed or deleted without the invalidation reaching this instance
+                log.debug(f"Function {function_id} changed, reloading")
+                self._on_invalidated(function_id)
+                entry = None
+
+        if entry is None:
+            generation = self.functions.get_generation()
+            function = Functions.get_function_by_id(function_id)
+            if function is None:
+                return None
+
+            valves = Functions.get_function_valves_by_id(function_id) or {}
+            entry = (
+                function,
+                valves,
+                get_content_hash(replace_imports(function.content)),
+                time.time(),
+            )
+            # Skipped when the row may have changed while it was loaded
+            self.functions.set(function_id, entry, generation)
+        return entry
+
+    def get_function(self, function_id: str) -> Optional[FunctionModel]:
+        entry = self._get_entry(function_id)
+        return entry[0] if entry else None
+
+    def get_valves(self, function_id: str) -> dict:
+        entry = self._get_entry(function_id)
+        return entry[1] if entry else {}
+
+    def get_module(self, request, function_id: str):
+        entry = self._get_entry(function_id)
+        if entry is None:
             raise Exception(f"Function not found: {function_id}")
-        content = function.content
+        function, _, content_hash, _ = entry
 
-        new_content = replace_imports(content)
-        if new_content != content:
-            content = new_content
+        module = self.modules.get(function_id)
+        if module is not None and module[0] == content_hash:
+            # Kept for another `ttl` seconds while in use
+            self.modules.set(function_id, module)
+            return module[1], function.type, function.meta.manifest
+
+        content = replace_imports(function.content)
+        if content != function.content:
             # Update the function content in the database
             Functions.update_function_by_id(function_id, {"content": content})
 
-        if (
-            hasattr(request.app.state, "FUNCTION_CONTENTS")
-            and function_id in request.app.state.FUNCTION_CONTENTS
-        ) and (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            if request.app.state.FUNCTION_CONTENTS[function_id] == content:
-                return request.app.state.FUNCTIONS[function_id], None, None
-
         function_module, function_type, frontmatter = load_function_module_by_id(
             function_id, content
         )
-    else:
-        # Load from cache (e.g. "stream" hook)
-        # This is useful for performance reasons
+        self.modules.set(function_id, (content_hash, function_module))
+
+        return function_module, function_type, frontmatter
+
+    def _get_filter_ids(self) -> tuple[list[str], list[str]]:
+        filter_ids = self.filter_ids.get(None)
+
+        if filter_ids is None:
+            generation = self.filter_ids.get_generation()
+            filter_ids = (
+                [function.id for function in Functions.get_global_filter_functions()],
+                [
+                    function.id
+                    for function in Functions.get_functions_by_type(
+                        "filter", active_only=True
+                    )
+                ],
+            )
+            self.filter_ids.set(None, filter_ids, generation)
+        return filter_ids
+
+    def get_filter_chain(
+        self, request, model: dict, enabled_filter_ids: Optional[list] = None
+    ) -> list[str]:
+        """The ids of the filters to run for a model, in order of priority. Resolved
+        once per model, filterIds and enabled toggle filters until a function changes,
+        or at the latest after VERIFY_INTERVAL seconds."""
+        model_filter_ids = []
+        if "info" in model and "meta" in model["info"]:
+            model_filter_ids = model["info"]["meta"].get("filterIds", []) or []
+
+        key = (
+            model.get("id"),
+            tuple(model_filter_ids),
+            tuple(sorted(set(enabled_filter_ids or []))),
+        )
+        filter_chain = self.filter_chains.get(key)
 
-        if (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            return request.app.state.FUNCTIONS[function_id], None, None
+        if filter_chain is None:
+            generation = self.filter_chains.get_generation()
+            global_filter_ids, active_filter_ids = self._get_filter_ids()
+            filter_ids = list(set(global_filter_ids + model_filter_ids))
 
-        function_module, function_type, frontmatter = load_function_module_by_id(
-            function_id
-        )
+            def get_active_status(filter_id):
+                function_module, _, _ = self.get_module(request, filter_id)
+
+                if getattr(function_module, "toggle", None):
+                    return filter_id in (enabled_filter_ids or [])
+
+                return True
+
+            active_filter_ids = {
+                filter_id
+                for filter_id in active_filter_ids
+                if get_active_status(filter_id)
+            }
 
-    if not hasattr(request.app.state, "FUNCTIONS"):
-        request.app.state.FUNCTIONS = {}
+            filter_chain = [fid for fid in filter_ids if fid in active_filter_ids]
+            filter_chain.sort(key=lambda fid: self.get_valves(fid).get("priority", 0))
 
-    if not hasattr(request.app.state, "FUNCTION_CONTENTS"):
-        request.app.state.FUNCTION_CONTENTS = {}
+            self.filter_chains.set(key, filter_chain, generation)
 
-    request.app.state.FUNCTIONS[function_id] = function_module
-    request.app.state.FUNCTION_CONTENTS[function_id] = content
+        return list(filter_chain)
 
-    return function_module, function_type, frontmatter
+
+FUNCTION_REGISTRY = FunctionRegistry(FUNCTION_CACHE_TTL)
+
+
+def get_function_module_from_cache(request, function_id, load_from_db=True):
+    """
+    Get the compiled module of a function, with its type and frontmatter.
+
+    load_from_db is kept for existing callers: FUNCTION_REGISTRY is invalidated on
+    every change of a function, so the cached module is always the current one.
+    """
+    return FUNCTION_REGISTRY.get_module(request, function_id)
 
 
 def install_frontmatter_requirements(requirements: str):
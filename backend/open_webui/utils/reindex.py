@@ -0,0 +1,549 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request
+
+from open_webui.config import CACHE_DIR
+from open_webui.env import (
+    KNOWLEDGE_REINDEX_CONCURRENCY,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.chunk_embeddings import ChunkEmbeddings
+from open_webui.models.files import Files
+from open_webui.models.knowledge import Knowledges
+from open_webui.models.users import Users
+from open_webui.retrieval.bm25 import BM25_INDEX
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.socket.utils import RedisLock
+from open_webui.utils.file_lock import lock_file, unlock_file
+from open_webui.utils.redis import get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Seconds between checkpoints of the progress of a running reindex
+CHECKPOINT_INTERVAL = 5
+
+# Seconds the lease of a running reindex lasts, renewed at a third of it
+LEASE_TIMEOUT = 60
+
+REDIS_LEASE_KEY = "open-webui:knowledge-reindex:lease"
+
+
+class ReindexStatus:
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+def get_shadow_collection_name(knowledge_id: str, reindex_id: str) -> str:
+    # Unique per reindex: a backend may keep the shadow collection as the live one
+    # when swapping it in (Qdrant aliases it), so it cannot be reused
+    return f"{knowledge_id}-reindex-{reindex_id[:8]}"
+
+
+def supports_shadow_collections() -> bool:
+    return VECTOR_DB_CLIENT.supports_replace_collection
+
+
+class ReindexLease:
+    """
+    Makes sure a single worker runs the reindex, as every worker resumes it on startup.
+    A Redis lock with a Redis URL, otherwise a lock on a file next to the checkpoint,
+    which covers the workers sharing the cache directory.
+    """
+
+    def __init__(
+        self,
+        lock_path: Path,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = None,
+    ):
+        self.lock_path = lock_path
+        self.lock_file = None
+        self.redis_lock = None
+        if redis_url:
+            self.redis_lock = RedisLock(
+                redis_url, REDIS_LEASE_KEY, LEASE_TIMEOUT, redis_sentinels or []
+            )
+
+    def acquire(self) -> bool:
+        if self.redis_lock is not None:
+            return bool(self.redis_lock.aquire_lock())
+
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        file = open(self.lock_path, "a")
+        if not lock_file(file, blocking=False):
+            file.close()
+            return False
+        self.lock_file = file
+        return True
+
+    def renew(self) -> bool:
+        if self.redis_lock is not None:
+            return bool(self.redis_lock.renew_lock())
+        return self.lock_file is not None
+
+    def release(self):
+        if self.redis_lock is not None:
+            self.redis_lock.release_lock()
+        elif self.lock_file is not None:
+            unlock_file(self.lock_file)
+            self.lock_file.close()
+            self.lock_file = None
+
+
+class KnowledgeReindexer:
+    """
+    Background reindex of all knowledge bases, e.g. after changing the embedding model.
+
+    Files are processed in parallel (KNOWLEDGE_REINDEX_CONCURRENCY) into a shadow
+    collection per knowledge base, which replaces the live collection once all files
+    of the knowledge base are done, so searches keep working on the old index until
+    then. Backends without `replace_collection` are rebuilt in place instead.
+
+    Progress is checkpointed to a JSON file; a reindex that was interrupted by a
+    restart is resumed on startup, skipping the files that were already done. Only the
+    worker holding the lease runs (or resumes) a reindex.
+    """
+
+    def __init__(self, state_path: Path, concurrency: int, lease: ReindexLease):
+        self.state_path = state_path
+        self.concurrency = concurrency
+        self.lease = lease
+        self.state: Optional[dict] = None
+        self.task: Optional[asyncio.Task] = None
+        self.lease_task: Optional[asyncio.Task] = None
+        self.resume_task: Optional[asyncio.Task] = None
+        self.app = None
+
+        # Progress of the current run, for the ETA
+        self.run_started_at: Optional[float] = None
+        self.run_processed = 0
+        self.checkpointed_at = 0.0
+
+    ####################
+    # Checkpoints
+    ####################
+
+    def _load_state(self) -> Optional[dict]:
+        try:
+            if self.state_path.exists():
+                return json.loads(self.state_path.read_text())
+        except Exception as e:
+            log.exception(f"Error loading the reindex checkpoint: {e}")
+        return None
+
+    def _write_state(self, data: str):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(f"{self.state_path.name}.tmp")
+        tmp_path.write_text(data)
+        os.replace(tmp_path, self.state_path)
+
+    async def _checkpoint(self, force: bool = False):
+        if not force and time.time() - self.checkpointed_at < CHECKPOINT_INTERVAL:
+            return
+
+        self.state["updated_at"] = int(time.time())
+        self.checkpointed_at = time.time()
+        try:
+            await asyncio.to_thread(self._write_state, json.dumps(self.state))
+        except Exception as e:
+            log.exception(f"Error writing the reindex checkpoint: {e}")
+
+    ####################
+    # Control
+    ####################
+
+    def is_running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self, app, user) -> bool:
+        """Start a reindex of all knowledge bases, or resume an interrupted one.
+        Returns False if a reindex is already running, here or in another worker."""
+        if self.is_running() or not self.lease.acquire():
+            return False
+
+        state = self._load_state()
+        if state is None or state.get("status") != ReindexStatus.RUNNING:
+            state = {
+                "id": str(uuid.uuid4()),
+                "status": ReindexStatus.RUNNING,
+                "user_id": user.id,
+                "shadow_collections": supports_shadow_collections(),
+                "knowledge": None,
+                "deleted_knowledge_bases": [],
+                "error": None,
+                "started_at": int(time.time()),
+                "updated_at": int(time.time()),
+                "completed_at": None,
+            }
+
+        self._run_task(app, state)
+        return True
+
+    def resume(self, app):
+        """Resume a reindex that was interrupted by a shutdown, in the worker that gets
+        the lease. The others keep trying, to take over if that worker goes away."""
+        self.resume_task = asyncio.create_task(self._resume(app))
+
+    async def _resume(self, app):
+        while not self.is_running():
+            state = await asyncio.to_thread(self._load_state)
+            if state is None or state.get("status") != ReindexStatus.RUNNING:
+                return
+
+            if await asyncio.to_thread(self.lease.acquire):
+                # Read again: the previous lease holder may have finished it meanwhile
+                state = await asyncio.to_thread(self._load_state)
+                if state is None or state.get("status") != ReindexStatus.RUNNING:
+                    await asyncio.to_thread(self.lease.release)
+                    return
+
+                log.info(f"Resuming knowledge reindex {state['id']}")
+                self._run_task(app, state)
+                return
+
+            await asyncio.sleep(LEASE_TIMEOUT)
+
+    def _run_task(self, app, state: dict):
+        self.app = app
+        self.state = state
+        self.run_started_at = time.time()
+        self.run_processed = 0
+        self.task = asyncio.create_task(self._run())
+        self.lease_task = asyncio.create_task(self._keep_lease())
+
+    async def _keep_lease(self):
+        while True:
+            await asyncio.sleep(LEASE_TIMEOUT / 3)
+            try:
+                renewed = await asyncio.to_thread(self.lease.renew)
+            except Exception as e:
+                log.warning(f"Error renewing the knowledge reindex lease: {e}")
+                continue
+
+            if not renewed:
+                # Another worker may take over, stop and leave the checkpoint running
+                log.error("Lost the knowledge reindex lease, stopping the reindex")
+                self.task.cancel()
+                return
+
+    async def stop(self):
+        if self.resume_task is not None:
+            self.resume_task.cancel()
+            await asyncio.gather(self.resume_task, return_exceptions=True)
+            self.resume_task = None
+        if self.is_running():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        if self.lease_task is not None:
+            self.lease_task.cancel()
+            await asyncio.gather(self.lease_task, return_exceptions=True)
+            self.lease_task = None
+
+    def get_status(self) -> dict:
+        state = self.state or self._load_state()
+        if state is None:
+            return {"status": None}
+
+        knowledge = state.get("knowledge") or {}
+        total = sum(len(kb["file_ids"]) for kb in knowledge.values())
+        done = sum(len(kb["done"]) for kb in knowledge.values())
+        failed = sum(len(kb["failed"]) for kb in knowledge.values())
+        remaining = total - done - failed
+
+        rate = None
+        eta = None
+        if self.is_running() and self.run_processed:
+            rate = self.run_processed / (time.time() - self.run_started_at)
+            eta = int(remaining / rate)
+
+        return {
+            "id": state["id"],
+            "status": state["status"],
+            "running": self.is_running(),
+            "shadow_collections": state["shadow_collections"],
+            "knowledge_bases": len(knowledge),
+            "knowledge_bases_done": sum(
+                1 for kb in knowledge.values() if kb["swapped"]
+            ),
+            "files": total,
+            "files_done": done,
+            "files_failed": failed,
+            "files_remaining": remaining,
+            "progress": (done + failed) / total if total else 0.0,
+            "files_per_second": rate,
+            "eta": eta,
+            "errors": [
+                {"knowledge_id": knowledge_id, "file_id": file_id, "error": error}
+                for knowledge_id, kb in knowledge.items()
+                for file_id, error in kb["failed"].items()
+            ],
+            "deleted_knowledge_bases": state["deleted_knowledge_bases"],
+            "error": state["error"],
+            "started_at": state["started_at"],
+            "updated_at": state["updated_at"],
+            "completed_at": state["completed_at"],
+        }
+
+    ####################
+    # Reindex
+    ####################
+
+    def _plan(self) -> dict:
+        knowledge = {}
+        for knowledge_base in Knowledges.get_knowledge_bases():
+            if not knowledge_base.data or not isinstance(knowledge_base.data, dict):
+                log.warning(
+                    f"Knowledge base {knowledge_base.id} has no data or invalid data ({knowledge_base.data!r}). Deleting."
+                )
+                try:
+                    Knowledges.delete_knowledge_by_id(id=knowledge_base.id)
+                    self.state["deleted_knowledge_bases"].append(knowledge_base.id)
+                except Exception as e:
+                    log.error(
+                        f"Failed to delete invalid knowledge base {knowledge_base.id}: {e}"
+                    )
+                continue
+
+            file_ids = [
+                file.id
+                for file in Files.get_files_by_ids(
+                    knowledge_base.data.get("file_ids", [])
+                )
+            ]
+            knowledge[knowledge_base.id] = {
+                "collection_name": (
+                    get_shadow_collection_name(knowledge_base.id, self.state["id"])
+                    if self.state["shadow_collections"]
+                    else knowledge_base.id
+                ),
+                "file_ids": file_ids,
+                "done": [],
+                "failed": {},
+                "cleared": False,
+                "swapped": False,
+            }
+        return knowledge
+
+    def _clear_collection(self, collection_name: str):
+        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+            VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+        BM25_INDEX.delete_collection(collection_name)
+        ChunkEmbeddings.delete_references(collection_name=collection_name)
+
+    def _clear_shadow_collections(self):
+        # The next reindex builds new shadow collections, do not leave these behind
+        for knowledge_id, kb in (self.state["knowledge"] or {}).items():
+            if not kb["swapped"] and kb["collection_name"] != knowledge_id:
+                try:
+                    self._clear_collection(kb["collection_name"])
+                except Exception as e:
+                    log.warning(
+                        f"Error clearing shadow collection {kb['collection_name']}: {e}"
+                    )
+
+    def _process_file(self, user, collection_name: str, file_id: str, resumed: bool):
+        # Imported here, the routers import this module
+        from open_webui.routers.retrieval import ProcessFileForm, process_file
+
+        if resumed:
+            # Remove what an interrupted run may have written for this file
+            VECTOR_DB_CLIENT.delete(
+                collection_name=collection_name, filter={"file_id": file_id}
+            )
+
+        process_file(
+            Request({"type": "http", "app": self.app}),
+            ProcessFileForm(file_id=file_id, collection_name=collection_name),
+            user=user,
+        )
+
+    def _swap(self, knowledge_id: str, kb: dict):
+        collection_name = kb["collection_name"]
+
+        if collection_name != knowledge_id:
+            if kb["done"] and VECTOR_DB_CLIENT.has_collection(
+                collection_name=collection_name
+            ):
+                VECTOR_DB_CLIENT.replace_collection(knowledge_id, collection_name)
+                ChunkEmbeddings.replace_references(knowledge_id, collection_name)
+                for file_id in kb["done"]:
+                    Files.update_file_metadata_by_id(
+                        file_id, {"collection_name": knowledge_id}
+                    )
+            elif kb["failed"]:
+                # Keep the current index rather than swapping in an empty one
+                log.warning(
+                    f"All files of knowledge base {knowledge_id} failed to reindex, keeping its current index"
+                )
+                self._clear_collection(collection_name)
+            else:
+                self._clear_collection(knowledge_id)
+        elif not kb["cleared"]:
+            # A knowledge base without files
+            self._clear_collection(knowledge_id)
+
+        BM25_INDEX.delete_collection(knowledge_id)
+        BM25_INDEX.delete_collection(collection_name)
+
+    async def _finish_knowledge_base(self, knowledge_id: str, queue: asyncio.Queue):
+        kb = self.state["knowledge"][knowledge_id]
+
+        # Files added to or removed from the knowledge base while it was reindexed
+        knowledge_base = await asyncio.to_thread(
+            Knowledges.get_knowledge_by_id, knowledge_id
+        )
+        if knowledge_base is None:
+            await asyncio.to_thread(self._clear_collection, kb["collection_name"])
+            kb["swapped"] = True
+            return
+
+        current_file_ids = (knowledge_base.data or {}).get("file_ids", [])
+        added_file_ids = [
+            file_id for file_id in current_file_ids if file_id not in kb["file_ids"]
+        ]
+        if added_file_ids:
+            kb["file_ids"].extend(added_file_ids)
+            for file_id in added_file_ids:
+                queue.put_nowait((knowledge_id, file_id, False))
+            return
+
+        removed_file_ids = set(kb["done"]) - set(current_file_ids)
+        for file_id in removed_file_ids:
+            await asyncio.to_thread(
+                VECTOR_DB_CLIENT.delete,
+                collection_name=kb["collection_name"],
+                filter={"file_id": file_id},
+            )
+        kb["done"] = [file_id for file_id in kb["done"] if file_id in current_file_ids]
+
+        await asyncio.to_thread(self._swap, knowledge_id, kb)
+        kb["swapped"] = True
+        log.info(
+            f"Reindexed knowledge base {knowledge_id}: {len(kb['done'])} files, {len(kb['failed'])} failed"
+        )
+        await self._checkpoint(force=True)
+
+    async def _worker(self, user, queue: asyncio.Queue, locks: dict):
+        while True:
+            knowledge_id, file_id, resumed = await queue.get()
+            kb = self.state["knowledge"][knowledge_id]
+            try:
+                async with locks[knowledge_id]:
+                    if not kb["cleared"]:
+                        # Start from an empty collection (a leftover shadow collection
+                        # of a failed reindex, or the live collection if rebuilt in place)
+                        await asyncio.to_thread(
+                            self._clear_collection, kb["collection_name"]
+                        )
+                        kb["cleared"] = True
+                        await self._checkpoint(force=True)
+
+                try:
+                    await asyncio.to_thread(
+                        self._process_file,
+                        user,
+                        kb["collection_name"],
+                        file_id,
+                        resumed,
+                    )
+                    kb["done"].append(file_id)
+                except Exception as e:
+                    error = str(e.detail) if hasattr(e, "detail") else str(e)
+                    log.error(
+                        f"Error reindexing file {file_id} of knowledge base {knowledge_id}: {error}"
+                    )
+                    kb["failed"][file_id] = error
+
+                self.run_processed += 1
+                await self._checkpoint()
+
+                if len(kb["done"]) + len(kb["failed"]) >= len(kb["file_ids"]):
+                    async with locks[knowledge_id]:
+                        if not kb["swapped"]:
+                            await self._finish_knowledge_base(knowledge_id, queue)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Error reindexing knowledge base {knowledge_id}: {e}")
+            finally:
+                queue.task_done()
+
+    async def _run(self):
+        workers = []
+        try:
+            if self.state["knowledge"] is None:
+                self.state["knowledge"] = await asyncio.to_thread(self._plan)
+                await self._checkpoint(force=True)
+
+            user = await asyncio.to_thread(Users.get_user_by_id, self.state["user_id"])
+            knowledge = self.state["knowledge"]
+            log.info(f"Starting reindexing for {len(knowledge)} knowledge bases")
+
+            queue = asyncio.Queue()
+            locks = {knowledge_id: asyncio.Lock() for knowledge_id in knowledge}
+            for knowledge_id, kb in knowledge.items():
+                if kb["swapped"]:
+                    continue
+                for file_id in kb["file_ids"]:
+                    if file_id not in kb["done"] and file_id not in kb["failed"]:
+                        queue.put_nowait((knowledge_id, file_id, kb["cleared"]))
+
+            workers = [
+                asyncio.create_task(self._worker(user, queue, locks))
+                for _ in range(self.concurrency)
+            ]
+            await queue.join()
+
+            # Knowledge bases without files left to process
+            for knowledge_id, kb in knowledge.items():
+                if not kb["swapped"]:
+                    async with locks[knowledge_id]:
+                        await self._finish_knowledge_base(knowledge_id, queue)
+            await queue.join()
+
+            self.state["status"] = ReindexStatus.COMPLETED
+            self.state["completed_at"] = int(time.time())
+            log.info(
+                f"Reindexing completed. Deleted {len(self.state['deleted_knowledge_bases'])} invalid knowledge bases: {self.state['deleted_knowledge_bases']}"
+            )
+        except asyncio.CancelledError:
+            # Shutting down: the checkpoint stays running, so the reindex is resumed
+            raise
+        except Exception as e:
+            log.exception(f"Error reindexing knowledge bases: {e}")
+            self.state["status"] = ReindexStatus.FAILED
+            self.state["error"] = str(e)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if self.state["status"] == ReindexStatus.FAILED:
+                await asyncio.to_thread(self._clear_shadow_collections)
+            await self._checkpoint(force=True)
+            if self.lease_task is not None:
+                self.lease_task.cancel()
+            await asyncio.to_thread(self.lease.release)
+
+
+KNOWLEDGE_REINDEXER = KnowledgeReindexer(
+    CACHE_DIR / "reindex" / "state.json",
+    KNOWLEDGE_REINDEX_CONCURRENCY,
+    ReindexLease(
+        CACHE_DIR / "reindex" / "state.lock",
+        REDIS_URL,
+        get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+    ),
+)
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+from open_webui.env import USER_LAST_ACTIVE_FLUSH_INTERVAL, SRC_LOG_LEVELS
+from open_webui.models.users import Users
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class LastActiveBuffer:
+    """
+    Write-behind buffer for the last active timestamps of users.
+
+    Every authenticated request and socket connection marks its user as active. Instead
+    of an UPDATE per request, the latest timestamp per user is kept here and written in
+    one batch every `flush_interval` seconds by the task started with `start`, and when
+    the application stops. Until then the stored timestamps lag by at most the interval.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self.entries: dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.task: Optional[asyncio.Task] = None
+
+    def touch(self, user_id: str):
+        if self.task is None or self.flush_interval <= 0:
+            Users.update_user_last_active_by_id(user_id)
+            return
+
+        with self.lock:
+            self.entries[user_id] = int(time.time())
+
+    def flush(self):
+        with self.lock:
+            entries, self.entries = self.entries, {}
+
+        if entries:
+            try:
+                Users.update_users_last_active_by_ids(entries)
+            except Exception as e:
+                log.exception(f"Error saving last active time of users: {e}")
+
+    async def _flusher(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await asyncio.to_thread(self.flush)
+
+    def start(self):
+        if self.flush_interval > 0 and self.task is None:
+            self.task = asyncio.create_task(self._flusher())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        self.flush()
+
+
+LAST_ACTIVE_BUFFER = LastActiveBuffer(USER_LAST_ACTIVE_FLUSH_INTERVAL)
@@ -31,6 +31,61 @@ export const uploadFile = async (token: string, file: File, metadata?: object |
 		throw error;
 	}
 
+	if (res && ['queued', 'processing'].includes(res.status)) {
+		// Processed in the background, wait for it so callers get the processed file
+		return await waitForFileProcessing(token, res);
+	}
+
+	return res;
+};
+
+const FILE_PROCESSING_POLL_INTERVAL = 1000;
+// Stop waiting when a file is still queued or processing after this long
+const FILE_PROCESSING_TIMEOUT = 30 * 60 * 1000;
+
+const waitForFileProcessing = async (token: string, file: { id: string }) => {
+	const deadline = Date.now() + FILE_PROCESSING_TIMEOUT;
+	while (true) {
+		if (Date.now() > deadline) {
+			throw 'File processing timed out';
+		}
+
+		await new Promise((resolve) => setTimeout(resolve, FILE_PROCESSING_POLL_INTERVAL));
+
+		const res = await getFileProcessStatus(token, file.id);
+		if (!['queued', 'processing'].includes(res.status)) {
+			const processedFile = await getFileById(token, file.id);
+			// warning: the file was processed, but some of its chunks could not be embedded
+			return res.status === 'failed'
+				? { ...processedFile, error: res.error }
+				: { ...processedFile, warning: res.warning };
+		}
+	}
+};
+
+export const getFileProcessStatus = async (token: string, id: string) => {
+	let error = null;
+
+	const res = await fetch(`${WEBUI_API_BASE_URL}/files/${id}/process/status`, {
+		method: 'GET',
+		headers: {
+			Accept: 'application/json',
+			authorization: `Bearer ${token}`
+		}
+	})
+		.then(async (res) => {
+			if (!res.ok) throw await res.json();
+			return res.json();
+		})
+		.catch((err) => {
+			error = err.detail;
+			return null;
+		});
+
+	if (error) {
+		throw error;
+	}
+
 	return res;
 };
 